@@ -0,0 +1,144 @@
+"""
+end-to-end benchmark of extract_division against the fixture server, without touching the live sites.
+
+reports pages per second, p50/p99 latency per person, peak RSS and CPU time of the scraper process (browsers run in
+their own processes and are not included). Response cache, enrichment cache and FMInside index are disabled or empty,
+so every page is requested. The rate limits of the live hosts are lifted unless --rate is given, so the figures
+measure the scraper and not the token buckets, and the fetch strategies are learnt in a temporary file.
+
+usage: python -m benchmarks.division_benchmark <fixtures_dir> <division_url> [<division_url> ...]
+       [--latency 0.05] [--jitter 0.05] [--error-rate 0.01] [--rate 2 --burst 5] [--record] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+from fm_scraper.cli import SCRAPERS
+from fm_scraper.core import FetchStrategy, RateLimiter, ResponseCache
+from fm_scraper.fillers.enrichment_cache import EnrichmentCache
+from fm_scraper.fillers.fm_inside_index import FMInsideIndex
+from .fixture_server import FixtureServer
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# requests per second and burst of the hosts when the benchmark does not set them
+UNLIMITED_RATE = 1e9
+UNLIMITED_BURST = 10 ** 9
+
+
+def timed_persons(scraper: type, timings: list) -> callable:
+    """
+    time every extract_person_async of the scraper, return the function restoring it.
+    """
+    original = scraper.__dict__["extract_person_async"]
+    method = original.__get__(None, scraper)
+
+    async def extract_person_async(cls, person_url: str, **kwargs) -> dict | None:
+        start = time.perf_counter()
+        try:
+            return await method(person_url, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    scraper.extract_person_async = classmethod(extract_person_async)
+    return lambda: setattr(scraper, "extract_person_async", original)
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values: list, p: int) -> float | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def run(fixtures_dir: str, division_urls: list, rate: float = None, burst: int = None, **kwargs) -> dict:
+    """
+    :param rate: requests per second per host, unlimited if None
+    :param burst: burst of requests per host, unlimited if None
+    """
+    ResponseCache.configure(enabled=False)
+    EnrichmentCache.enabled = False
+    RateLimiter.configure(rate or UNLIMITED_RATE, burst or UNLIMITED_BURST)
+    directory = tempfile.mkdtemp()
+    FMInsideIndex.path = os.path.join(directory, "fminside_index.json.gz")
+    FetchStrategy.path = os.path.join(directory, "fetch_strategies.json")
+    FetchStrategy.reset()
+    timings = list()
+    records = 0
+    with FixtureServer(fixtures_dir, **kwargs) as server:
+        server.route()
+        cpu_start = os.times()
+        start = time.perf_counter()
+        try:
+            for url in division_urls:
+                scraper = SCRAPERS[urlparse(url).netloc]
+                restore = timed_persons(scraper, timings)
+                try:
+                    records += len(scraper.extract_division(url))
+                finally:
+                    restore()
+        finally:
+            server.unroute()
+        elapsed = time.perf_counter() - start
+        cpu_end = os.times()
+    cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return {
+        "seconds": round(elapsed, 3),
+        "pages": server.served,
+        "pages_per_second": round(server.served / elapsed, 2) if elapsed else None,
+        "injected_errors": server.errors,
+        "missing_pages": server.missing,
+        "megabytes": round(server.bytes / (1024 * 1024), 2),
+        "records": records,
+        "persons": len(timings),
+        "person_p50_seconds": percentile(timings, 50),
+        "person_p99_seconds": percentile(timings, 99),
+        "peak_rss_mb": peak_rss_mb(),
+        "cpu_seconds": round(cpu, 3),
+        "cpu_percent": round(100 * cpu / elapsed, 1) if elapsed else None,
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="end-to-end benchmark of extract_division on recorded pages")
+    arg_parser.add_argument("fixtures_dir")
+    arg_parser.add_argument("division_urls", nargs="+")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="random seconds added on top of the latency")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of responses failing")
+    arg_parser.add_argument("--error-status", type=int, default=503)
+    arg_parser.add_argument("--rate", type=float, help="requests per second per host, unlimited by default")
+    arg_parser.add_argument("--burst", type=int, help="burst of requests per host, unlimited by default")
+    arg_parser.add_argument("--record", action="store_true", help="fetch and save the pages not recorded yet")
+    arg_parser.add_argument("--json", help="also write the results to this file")
+    args = arg_parser.parse_args()
+    for url in args.division_urls:
+        if urlparse(url).netloc not in SCRAPERS:
+            raise SystemExit(f"Unsupported url {url}, use one of {', '.join(SCRAPERS)}")
+    results = run(args.fixtures_dir, args.division_urls, args.rate, args.burst, latency=args.latency, jitter=args.jitter,
+                  error_rate=args.error_rate, error_status=args.error_status, record=args.record)
+    for k, v in results.items():
+        print(f"{k:<22}{v if v is not None else 'n/a'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+local http server replaying recorded pages of the scraped sites, with latency and error injection.
+
+pages are stored as <fixtures_dir>/<host>/<quoted path and query>.html and served at http://127.0.0.1:<port>/<host>/...
+In record mode a missing page is fetched from the live site and saved, so a first run records the fixtures of a crawl.
+Search forms filled with playwright (see FORMS) are served as a minimal page that loads the recorded results of the
+searched name from <path>?name=<name>; live searches cannot be recorded, those results have to be saved by hand.
+
+fmtransferupdate search (/players?filter_name=<name>, /staff?filter_name=<name>) and person pages are plain GET
+urls, so they are served like any other page, but the scraper reads them once rendered by the browser while record
+mode saves the raw http response. When the raw response lacks the results (no fmtu-content-pane or itemscope data
+block), save the page rendered by a browser by hand as <fixtures_dir>/fmtransferupdate.com/<quoted path and query>.html,
+e.g. with FixtureServer.path("fmtransferupdate.com", "/players?filter_name=mario+rossi").
+
+usage: python -m benchmarks.fixture_server <fixtures_dir> [--port 8765] [--latency 0.05] [--error-rate 0.01] [--record]
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+import requests
+from fm_scraper.core import BaseRequest
+
+
+HOSTS = ("www.transfermarkt.com", "www.tuttocampo.it", "fminside.net", "fmtransferupdate.com")
+# host -> path of the search forms filled with playwright
+FORMS = {"fminside.net": "/players"}
+FORM_PAGE = """<html><body>
+<p class="fc-button-label" onclick="this.remove()">Consent</p>
+<input placeholder="Name" onkeydown="if (event.key === 'Enter') fetch(location.pathname + '?name=' +
+    encodeURIComponent(this.value)).then(r => r.text()).then(t => document.body.innerHTML = t)">
+</body></html>"""
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/58.0.3029.110 Safari/537.3')
+
+
+class FixtureServer:
+    """
+    threaded fixture server, usable as context manager. route() sends the requests of the scrapers to it.
+    """
+
+    def __init__(self, directory: str, port: int = 0, **kwargs) -> None:
+        self.directory = directory
+        self.latency = kwargs.get("latency", 0.0)
+        self.jitter = kwargs.get("jitter", 0.0)
+        self.error_rate = kwargs.get("error_rate", 0.0)
+        self.error_status = kwargs.get("error_status", 503)
+        self.record = kwargs.get("record", False)
+        self.served = 0
+        self.errors = 0
+        self.missing = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.__server = ThreadingHTTPServer(("127.0.0.1", port), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    def __enter__(self) -> "FixtureServer":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def port(self) -> int:
+        return self.__server.server_address[1]
+
+    def origin(self, host: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{host}"
+
+    def route(self, hosts: tuple = HOSTS) -> None:
+        for host in hosts:
+            BaseRequest.route(host, self.origin(host))
+
+    def unroute(self, hosts: tuple = HOSTS) -> None:
+        for host in hosts:
+            BaseRequest.route(host, None)
+
+    def start(self) -> None:
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def path(self, host: str, path_and_query: str) -> str:
+        return os.path.join(self.directory, host, quote(path_and_query, safe="")[:200] + ".html")
+
+    def load(self, host: str, path_and_query: str) -> bytes | None:
+        path = self.path(host, path_and_query)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        if not self.record:
+            return None
+        response = requests.get(f"https://{host}{path_and_query}", headers={"User-Agent": USER_AGENT})
+        if response.status_code != 200:
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(response.content)
+        return response.content
+
+    def __handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:
+                if server.latency or server.jitter:
+                    time.sleep(server.latency + random.uniform(0, server.jitter))
+                if random.random() < server.error_rate:
+                    with server.lock:
+                        server.errors += 1
+                    self.__reply(server.error_status, b"injected error", {"Retry-After": "1"})
+                    return
+                parts = self.path.split("/", 2)
+                host = parts[1]
+                path = "/" + (parts[2] if len(parts) > 2 else "")
+                if FORMS.get(host) == path:
+                    content = FORM_PAGE.encode("utf-8")
+                else:
+                    content = server.load(host, path)
+                if content is None:
+                    with server.lock:
+                        server.missing += 1
+                    self.__reply(404, b"not recorded")
+                    return
+                with server.lock:
+                    server.served += 1
+                    server.bytes += len(content)
+                self.__reply(200, content)
+
+            do_POST = do_GET
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def __reply(self, status: int, content: bytes, headers: dict = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                for k, v in (headers or dict()).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="replay recorded pages of the scraped sites")
+    arg_parser.add_argument("fixtures_dir")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="random seconds added on top of the latency")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of responses failing")
+    arg_parser.add_argument("--error-status", type=int, default=503)
+    arg_parser.add_argument("--record", action="store_true", help="fetch and save the pages not recorded yet")
+    args = arg_parser.parse_args()
+    server = FixtureServer(args.fixtures_dir, args.port, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, error_status=args.error_status, record=args.record)
+    print(f"serving {args.fixtures_dir} on http://127.0.0.1:{server.port}/<host>/...")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+parse time per page type, for every available parser backend, with and without partial parsing.
+
+recorded pages are read from a directory, the page type is the file name up to the first "-" or ".",
+e.g. transfermarkt_person-messi.html; the valid page types are the keys of HtmlParser.strainers.
+Pages can be recorded with --fetch <page_type>=<url>.
+
+usage: python -m benchmarks.parse_benchmark <pages_dir> [--repeat N] [--fetch page_type=url ...]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import time
+from fm_scraper.core import BaseRequest, HtmlParser
+
+
+BACKENDS = ("html.parser", "lxml")
+
+
+def fetch_pages(pages_dir: str, fetch: list) -> None:
+    os.makedirs(pages_dir, exist_ok=True)
+    for item in fetch:
+        page_type, url = item.split("=", 1)
+        if page_type not in HtmlParser.strainers:
+            raise SystemExit(f"unknown page type {page_type}")
+        content = BaseRequest._send_request(url, with_session=page_type.startswith("tuttocampo"))
+        if content:
+            name = f"{page_type}-{len([f for f in os.listdir(pages_dir) if f.startswith(page_type)])}.html"
+            with open(os.path.join(pages_dir, name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+
+def load_pages(pages_dir: str) -> dict:
+    pages = dict()
+    for name in sorted(os.listdir(pages_dir)):
+        page_type = name.split(".")[0].split("-")[0]
+        if page_type in HtmlParser.strainers:
+            with open(os.path.join(pages_dir, name), encoding="utf-8") as f:
+                pages.setdefault(page_type, list()).append(f.read())
+    return pages
+
+
+def measure(contents: list, page_type: str, backend: str, partial: bool, repeat: int) -> float:
+    timings = list()
+    for _ in range(repeat):
+        for content in contents:
+            start = time.perf_counter()
+            HtmlParser.parse(content, page_type, backend=backend, partial=partial)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="parse time per page type")
+    arg_parser.add_argument("pages_dir")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--fetch", nargs="*", default=list())
+    args = arg_parser.parse_args()
+    if args.fetch:
+        fetch_pages(args.pages_dir, args.fetch)
+    pages = load_pages(args.pages_dir)
+    if not pages:
+        raise SystemExit(f"no recorded pages in {args.pages_dir}")
+    backends = [b for b in BACKENDS if b == "html.parser" or importlib.util.find_spec(b)]
+    print(f"{'page type':<28}{'pages':>6}" + "".join(f"{b + (' partial' if p else ''):>22}"
+                                                   for b in backends for p in (False, True)))
+    for page_type, contents in pages.items():
+        row = f"{page_type:<28}{len(contents):>6}"
+        for backend in backends:
+            for partial in (False, True):
+                row += f"{measure(contents, page_type, backend, partial, args.repeat):>19.2f} ms"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+import sys
 from multiprocessing import freeze_support
-from fm_scraper.gui.pages import GUIMain
 
 
 def main():
+    # with arguments run headless, e.g. from cron on a server without display
+    if len(sys.argv) > 1:
+        from fm_scraper.cli import main as cli_main
+        sys.exit(cli_main())
+    from fm_scraper.gui.pages import GUIMain
     GUIMain()
 
 
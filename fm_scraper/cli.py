@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import contextlib
+import os
+import pandas as pd
+import sys
+from urllib.parse import urlparse
+# the scrapers are imported first: fm_scraper.core reads the settings of the scrapers package
+from fm_scraper.scrapers import TransfermarktScraper, TuttocampoScraper
+from fm_scraper.core import (
+    AsyncBrowserPool, AsyncHttpPool, CrawlJournal, Metrics, RateLimiter, ResponseCache, Scheduler
+)
+from fm_scraper.fillers import Enrichment
+from fm_scraper.scrapers.base_scraper import BaseScraper
+
+
+SCRAPERS = {
+    "www.transfermarkt.com": TransfermarktScraper,
+    "www.tuttocampo.it": TuttocampoScraper,
+}
+KINDS = ("division", "team", "person")
+
+
+class _Log:
+    """
+    message queue of the scrapers, printed on stderr.
+    """
+
+    def __init__(self, quiet: bool) -> None:
+        self.quiet = quiet
+
+    def put(self, text: str) -> None:
+        if not self.quiet:
+            print(text.strip(), file=sys.stderr, flush=True)
+
+
+def get_kind(url: str) -> str:
+    """
+    guess whether the url is a division, a team or a person from its path.
+    """
+    path = urlparse(url).path.lower()
+    if "/profil/" in path or "giocatore" in path:
+        return "person"
+    if "/verein/" in path or "/squadra/" in path:
+        return "team"
+    return "division"
+
+
+def parse_input(value: str) -> tuple:
+    """
+    an input is an url, optionally prefixed by its kind, e.g. team:https://www.transfermarkt.com/...
+    """
+    kind, _, url = value.partition(":")
+    if kind not in KINDS:
+        kind, url = None, value
+    url = url.strip()
+    scraper = SCRAPERS.get(urlparse(url).netloc)
+    if scraper is None:
+        raise ValueError(f"Unsupported url {url}, use one of {', '.join(SCRAPERS)}")
+    return scraper, kind or get_kind(url), url
+
+
+def read_inputs(args: argparse.Namespace) -> list:
+    values = list(args.urls)
+    for path in args.input:
+        # stdin is read but left open
+        with (contextlib.nullcontext(sys.stdin) if path == "-" else open(path, encoding="utf-8")) as f:
+            values += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    # the same url given twice is scraped once
+    return [parse_input(v) for v in dict.fromkeys(values)]
+
+
+def read_records(path: str) -> list:
+    """
+    records of a file written by an earlier run: .csv, .jsonl or .parquet.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    readers = {".csv": pd.read_csv, ".jsonl": lambda p: pd.read_json(p, lines=True), ".parquet": pd.read_parquet}
+    if extension not in readers:
+        raise ValueError(f"Unsupported file extension {extension}, use one of {', '.join(readers)}")
+    df = readers[extension](path)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+async def run(inputs: list, sink, **kwargs) -> int:
+    """
+    scrape every input on the same event loop, so browsers, connections and rate limits are shared by the whole run.
+    :return: number of failed inputs
+    """
+    log = kwargs.get("queue")
+
+    async def scrape(scraper, kind: str, url: str) -> bool:
+        try:
+            await getattr(scraper, f"extract_{kind}_async")(url, sink=sink, **kwargs)
+            return True
+        except Exception as e:
+            log.put(f"Error on scraping {url}: {e}")
+            return False
+
+    results = await asyncio.gather(*[scrape(*i) for i in inputs])
+    return results.count(False)
+
+
+def main(argv: list = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="fm_scraper",
+        description="scrape divisions, teams and persons from transfermarkt.com and tuttocampo.it without the gui"
+    )
+    arg_parser.add_argument("urls", nargs="*", help="urls to scrape, optionally prefixed by division:, team: or person:")
+    arg_parser.add_argument("-i", "--input", action="append", default=list(),
+                            help="file with one url per line, - for stdin")
+    arg_parser.add_argument("-o", "--output", required=True,
+                            help="output file: .csv, .jsonl, .parquet, .feather or .xlsx")
+    arg_parser.add_argument("-c", "--concurrency", type=int,
+                            help="requests in flight per host: browser contexts, connections, and person and "
+                                 "enrichment tasks")
+    arg_parser.add_argument("--rate", type=float, help="requests per second per host")
+    arg_parser.add_argument("--burst", type=int, help="burst of requests per host")
+    arg_parser.add_argument("--job-id", help="resumable job: re-running the same job only scrapes what is missing")
+    arg_parser.add_argument("--cache", action="store_true",
+                            help="reuse the cached responses, they can be as old as the CACHE_TTL of their host")
+    arg_parser.add_argument("--offline", action="store_true", help="only use cached responses")
+    arg_parser.add_argument("--metrics", help="write the metrics of the run to this file: .prom or .json")
+    arg_parser.add_argument("--enrich-later", action="store_true",
+                            help="do not enrich the records during the crawl, see --enrich")
+    arg_parser.add_argument("--enrich", metavar="RECORDS",
+                            help="enrich the records of an earlier run (.csv, .jsonl or .parquet) instead of scraping")
+    arg_parser.add_argument("-q", "--quiet", action="store_true", help="do not print the progress")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        inputs = read_inputs(args)
+        records = read_records(args.enrich) if args.enrich else None
+    except (OSError, ValueError) as e:
+        arg_parser.error(str(e))
+    if not inputs and records is None:
+        arg_parser.error("no url to scrape")
+    if args.concurrency:
+        AsyncBrowserPool.configure(max_contexts=args.concurrency)
+        AsyncHttpPool.configure(pool_size=args.concurrency)
+        Scheduler.configure(
+            task_limits={"person": args.concurrency, "enrichment": args.concurrency},
+            host_limits={host: args.concurrency for host in Scheduler.host_limits},
+            host_default=args.concurrency
+        )
+    if args.rate or args.burst:
+        RateLimiter.configure(args.rate, args.burst)
+    ResponseCache.configure(enabled=args.cache, offline=args.offline)
+    if args.enrich_later:
+        Enrichment.configure(mode="deferred")
+
+    log = _Log(args.quiet)
+    journal = CrawlJournal(args.job_id) if args.job_id else None
+    try:
+        with BaseScraper.open_writer(args.output) as writer:
+            if records is not None:
+                BaseScraper._run_job(Enrichment.enrich_records_async(records, writer.write), log)
+                failed = 0
+            else:
+                failed = BaseScraper._run_job(run(inputs, writer.write, queue=log, journal=journal), log)
+            log.put(f"{writer.count} records written to {args.output}")
+    finally:
+        if journal:
+            journal.close()
+    if args.metrics:
+        Metrics.export(args.metrics)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
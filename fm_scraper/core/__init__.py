@@ -1,2 +1,14 @@
 from .base_request import BaseRequest, TypeRequest
+from .browser_pool import AsyncBrowserPool, BrowserPool
+from .crawl_context import CrawlContext
+from .crawl_journal import CrawlJournal
+from .dedup import Dedup
+from .fetch_strategy import FetchStrategy
+from .html_parser import HtmlParser
+from .http_pool import AsyncHttpPool, HttpPool
+from .metrics import Metrics
+from .rate_limiter import RateLimiter
+from .record_store import RecordStore
+from .response_cache import ResponseCache
+from .scheduler import Scheduler
 from .utilities import *
@@ -1,15 +1,29 @@
-import os
-import random
-import requests
+import asyncio
 import time
 from enum import Enum
-from playwright.sync_api import sync_playwright
 from typing import Tuple
-from fm_scraper.browsers import WEBKIT_PATH
+from urllib.parse import urlparse
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import TimeoutError as SyncPlaywrightTimeoutError
 from fm_scraper.scrapers.settings import (
+    BLOCKED_HOSTS,
+    BLOCKED_RESOURCES,
+    BLOCKED_RESOURCES_DEFAULT,
     MAX_RETRIES,
-    MAX_WAIT_SECONDS
+    READY_MAX_RELOADS,
+    READY_TIMEOUT_SECONDS,
+    THROTTLE_STATUS_CODES,
+    WAIT_UNTIL,
+    WAIT_UNTIL_DEFAULT
 )
+from .browser_pool import AsyncBrowserPool, BrowserPool
+from .dedup import Dedup
+from .fetch_strategy import FetchStrategy
+from .http_pool import AsyncHttpPool, HttpPool
+from .metrics import Metrics
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
+from .scheduler import Scheduler
 
 
 class TypeRequest(Enum):
@@ -21,7 +35,127 @@ class BaseRequest:
 
     __user_agent = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
                     'Chrome/58.0.3029.110 Safari/537.3')
-    _parser = "html.parser"
+    __origins = dict()
+    __load_states = ("commit", "domcontentloaded", "load", "networkidle")
+    blocked_resources = dict(BLOCKED_RESOURCES)
+    blocked_hosts = tuple(BLOCKED_HOSTS)
+    wait_until = dict(WAIT_UNTIL)
+
+    @classmethod
+    def route(cls, host: str, origin: str | None) -> None:
+        """
+        send the requests for host to another origin, e.g. a local fixture server; None restores the host.
+        Cache keys and rate limits still refer to the original url.
+        """
+        if origin:
+            cls.__origins[host] = origin.rstrip("/")
+        else:
+            cls.__origins.pop(host, None)
+
+    @classmethod
+    def __resolve(cls, url: str) -> str:
+        parsed_url = urlparse(url)
+        origin = cls.__origins.get(parsed_url.netloc)
+        if not origin:
+            return url
+        return origin + parsed_url.path + (f"?{parsed_url.query}" if parsed_url.query else "")
+
+    @classmethod
+    def __is_blocked(cls, page_url: str, resource_type: str, request_url: str) -> bool:
+        """
+        whether a request made by the page of page_url is not needed to read it: resource types blocked for the host
+        of the page (BLOCKED_RESOURCES) or ad and analytics hosts (BLOCKED_HOSTS).
+        """
+        if resource_type in cls.blocked_resources.get(urlparse(page_url).netloc, BLOCKED_RESOURCES_DEFAULT):
+            return True
+        host = urlparse(request_url).netloc
+        return any(host == h or host.endswith(f".{h}") for h in cls.blocked_hosts)
+
+    @classmethod
+    def __new_page(cls, context, url: str) -> any:
+        page = context.new_page()
+
+        def route(r) -> None:
+            if cls.__is_blocked(url, r.request.resource_type, r.request.url):
+                Metrics.inc("fm_scraper_blocked_requests_total", host=urlparse(url).netloc,
+                            type=r.request.resource_type)
+                r.abort()
+            else:
+                r.continue_()
+
+        page.route("**/*", route)
+        return page
+
+    @classmethod
+    async def __new_page_async(cls, context, url: str) -> any:
+        page = await context.new_page()
+
+        async def route(r) -> None:
+            if cls.__is_blocked(url, r.request.resource_type, r.request.url):
+                Metrics.inc("fm_scraper_blocked_requests_total", host=urlparse(url).netloc,
+                            type=r.request.resource_type)
+                await r.abort()
+            else:
+                await r.continue_()
+
+        await page.route("**/*", route)
+        return page
+
+    @classmethod
+    def __goto(cls, page, url: str) -> any:
+        """
+        open url in the page and wait for the condition of its host (WAIT_UNTIL): a load state or a css selector.
+        """
+        wait = cls.wait_until.get(urlparse(url).netloc, WAIT_UNTIL_DEFAULT)
+        if wait in cls.__load_states:
+            return page.goto(cls.__resolve(url), wait_until=wait)
+        response = page.goto(cls.__resolve(url), wait_until="domcontentloaded")
+        try:
+            page.wait_for_selector(wait, state="attached", timeout=READY_TIMEOUT_SECONDS * 1000)
+        except SyncPlaywrightTimeoutError:
+            Metrics.inc("fm_scraper_wait_timeouts_total", host=urlparse(url).netloc)
+        return response
+
+    @classmethod
+    async def __goto_async(cls, page, url: str) -> any:
+        wait = cls.wait_until.get(urlparse(url).netloc, WAIT_UNTIL_DEFAULT)
+        if wait in cls.__load_states:
+            return await page.goto(cls.__resolve(url), wait_until=wait)
+        response = await page.goto(cls.__resolve(url), wait_until="domcontentloaded")
+        try:
+            await page.wait_for_selector(wait, state="attached", timeout=READY_TIMEOUT_SECONDS * 1000)
+        except PlaywrightTimeoutError:
+            Metrics.inc("fm_scraper_wait_timeouts_total", host=urlparse(url).netloc)
+        return response
+
+    @staticmethod
+    def __get_cached(url: str, cache_key: str) -> str | None:
+        content = ResponseCache.get(url, cache_key)
+        Metrics.inc("fm_scraper_cache_hits_total" if content is not None else "fm_scraper_cache_misses_total",
+                    host=urlparse(url).netloc)
+        return content
+
+    @staticmethod
+    def __record_response(url: str, transport: str, status_code: int, content: str | None, start: float) -> None:
+        host = urlparse(url).netloc
+        Metrics.observe("fm_scraper_request_seconds", time.perf_counter() - start, host=host, transport=transport)
+        Metrics.inc("fm_scraper_requests_total", host=host, transport=transport, status=status_code)
+        Metrics.inc("fm_scraper_response_bytes_total", len(content.encode("utf-8")) if content else 0, host=host)
+
+    @staticmethod
+    def __retry_delay(url: str, status_code: int, attempt: int, retry_after: str = None) -> float:
+        """
+        seconds to wait before retrying a failed request. Throttled hosts are paused through the rate limiter instead.
+        """
+        host = urlparse(url).netloc
+        if status_code in THROTTLE_STATUS_CODES:
+            Metrics.inc("fm_scraper_retries_total", host=host, reason="throttled")
+            RateLimiter.throttled(url, attempt, retry_after)
+            return 0
+        delay = RateLimiter.backoff(attempt)
+        Metrics.inc("fm_scraper_retries_total", host=host, reason="error")
+        Metrics.inc("fm_scraper_backoff_seconds_total", delay, host=host)
+        return delay
 
     @classmethod
     def __get_method(cls, type_request: TypeRequest) -> any:
@@ -32,76 +166,320 @@ class BaseRequest:
         return None
 
     @classmethod
-    def __get_playwright_browser(cls, p, **kwargs):
-        return p.webkit.launch(executable_path=os.path.join(WEBKIT_PATH), **kwargs)
+    def __get_async_method(cls, type_request: TypeRequest) -> any:
+        if type_request == TypeRequest.GET:
+            return cls.__send_get_request_async
+        if type_request == TypeRequest.POST:
+            return cls.__send_post_request_async
+        return None
+
+    @staticmethod
+    def _run_async(coroutine) -> any:
+        """
+        run a coroutine on a new event loop, closing the browsers and http clients of the loop at the end.
+        """
+        return asyncio.run(BaseRequest.__run_and_close(coroutine))
+
+    @staticmethod
+    async def __run_and_close(coroutine) -> any:
+        try:
+            return await coroutine
+        finally:
+            await AsyncBrowserPool.close()
+            await AsyncHttpPool.close()
 
     @classmethod
     def _send_request(cls, url: str, type_request:TypeRequest = TypeRequest.GET, with_session: bool=False, data: dict = None) -> str | None:
         fun = cls.__get_method(type_request)
+        cache_key = ResponseCache.key(type_request.name, url, data)
+        content = cls.__get_cached(url, cache_key)
+        if content is not None or ResponseCache.offline:
+            return content
         count = 0
-        content = None
         while count < MAX_RETRIES:
-            status_code, content = fun(url, with_session, data)
+            RateLimiter.acquire(url)
+            start = time.perf_counter()
+            status_code, content, headers = fun(url, with_session, data)
+            cls.__record_response(url, "browser" if with_session else "http", status_code, content, start)
             if status_code >= 300 and status_code != 404:
-                temp_sec = random.randint(0, MAX_WAIT_SECONDS)
                 count += 1
-                time.sleep(temp_sec)
+                time.sleep(cls.__retry_delay(url, status_code, count, headers.get("retry-after")))
                 continue
+            RateLimiter.success(url)
+            if status_code < 300:
+                ResponseCache.set(cache_key, content)
             return content
         return content
 
     @classmethod
     def _filter_request(cls, url: str, filter_data: dict) -> str | None:
+        cache_key = ResponseCache.key("FILTER", url, filter_data)
+        content = cls.__get_cached(url, cache_key)
+        if content is not None or ResponseCache.offline:
+            return content
         count = 0
         while count < MAX_RETRIES:
-            with sync_playwright() as p:
-                browser = cls.__get_playwright_browser(p)
-                context = browser.new_context(user_agent=cls.__user_agent)
-                page = context.new_page()
-                response = page.goto(url, timeout=0)
-                page.wait_for_load_state("load")
-                page.locator('p[class=fc-button-label]').get_by_text("Consent", exact=True).click()
-                for k,v in filter_data.items():
-                    page.locator(k).fill(v)
-                page.keyboard.press("Enter")
-                time.sleep(1)
-                content = page.content()
-                context.close()
-                browser.close()
+            RateLimiter.acquire(url)
+            start = time.perf_counter()
+            with BrowserPool.lease(user_agent=cls.__user_agent) as context:
+                page = cls.__new_page(context, url)
+                try:
+                    response = page.goto(cls.__resolve(url), timeout=0)
+                    page.wait_for_load_state("load")
+                    consent = page.locator('p[class=fc-button-label]').get_by_text("Consent", exact=True)
+                    # a reused context has already accepted the cookie banner
+                    if BrowserPool.is_fresh(context) or consent.count():
+                        consent.click()
+                    for k,v in filter_data.items():
+                        page.locator(k).fill(v)
+                    page.keyboard.press("Enter")
+                    time.sleep(1)
+                    content = page.content()
+                finally:
+                    page.close()
+            cls.__record_response(url, "filter", response.status, content, start)
             if response.status >= 300:
                 count += 1
-                time.sleep(random.randint(0, MAX_WAIT_SECONDS))
+                time.sleep(cls.__retry_delay(url, response.status, count, response.headers.get("retry-after")))
                 continue
+            RateLimiter.success(url)
+            ResponseCache.set(cache_key, content)
             return content
 
     @classmethod
-    def __send_get_request(cls, url:str, with_session: bool = False, data: dict = None) -> Tuple[int, str]:
+    def __send_get_request(cls, url:str, with_session: bool = False, data: dict = None) -> Tuple[int, str, dict]:
         if with_session:
-            with sync_playwright() as p:
-                browser = cls.__get_playwright_browser(p)
-                context = browser.new_context(
-                    user_agent=cls.__user_agent
-                )
-                page = context.new_page()
-                response = page.goto(url, wait_until='load')
-                content = page.content()
-                browser.close()
-                return response.status, content
-        response = requests.get(url, headers={"User-Agent": cls.__user_agent, "Content-Type":"application/x-www-form-urlencoded; charset=UTF-8"}, data=data)
-        return response.status_code, response.text
+            with BrowserPool.lease(user_agent=cls.__user_agent) as context:
+                page = cls.__new_page(context, url)
+                try:
+                    response = cls.__goto(page, url)
+                    return response.status, page.content(), response.headers
+                finally:
+                    page.close()
+        return HttpPool.request("GET", cls.__resolve(url), headers={"User-Agent": cls.__user_agent, "Content-Type":"application/x-www-form-urlencoded; charset=UTF-8"}, data=data)
 
     @classmethod
     def __send_post_request(cls, url: str, with_session: bool = False, data: dict = None) -> tuple:
         if with_session:
-            with sync_playwright() as p:
-                browser = cls.__get_playwright_browser(p)
-                context = browser.new_context(
-                    user_agent=cls.__user_agent
-                )
+            with BrowserPool.lease(user_agent=cls.__user_agent) as context:
                 page = context.new_page()
-                response = page.request.post(url=url, data=data, headers={"User-Agent": cls.__user_agent})
-                content = page.content()
-                browser.close()
-                return response.status, content
-        response = requests.post(url, headers={"User-Agent": cls.__user_agent}, data=data)
-        return response.status_code, response.text
+                try:
+                    response = page.request.post(url=cls.__resolve(url), data=data, headers={"User-Agent": cls.__user_agent})
+                    return response.status, page.content(), response.headers
+                finally:
+                    page.close()
+        return HttpPool.request("POST", cls.__resolve(url), headers={"User-Agent": cls.__user_agent}, data=data)
+
+    @classmethod
+    async def _send_request_async(cls, url: str, type_request:TypeRequest = TypeRequest.GET, with_session: bool=False, data: dict = None, pattern: str = None) -> str | None:
+        """
+        :param pattern: url pattern of the page (e.g. tuttocampo_team), a browser fetch of a pattern with content
+        markers is tried over plain http first, see FetchStrategy
+        :return: content of the page, None when every retry failed
+        """
+        fun = cls.__get_async_method(type_request)
+        cache_key = ResponseCache.key(type_request.name, url, data)
+        content = cls.__get_cached(url, cache_key)
+        if content is not None or ResponseCache.offline:
+            return content
+        # concurrent requests for the same page share a single fetch
+        if not with_session or type_request != TypeRequest.GET:
+            pattern = None
+        return await Dedup.run(cache_key, lambda: cls.__fetch_adaptive_async(fun, url, cache_key, with_session, data,
+                                                                             pattern), "request")
+
+    @classmethod
+    async def __fetch_adaptive_async(cls, fun, url: str, cache_key: str, with_session: bool, data: dict,
+                                     pattern: str = None) -> str | None:
+        if FetchStrategy.is_adaptive(pattern):
+            content = await cls.__probe_http_async(url, cache_key, pattern)
+            if content is not None:
+                return content
+        return await cls.__fetch_async(fun, url, cache_key, with_session, data)
+
+    @classmethod
+    async def __probe_http_async(cls, url: str, cache_key: str, pattern: str) -> str | None:
+        """
+        fetch the page over plain http once, if the pattern is not known to need the browser.
+        :return: the content if it has the markers of the pattern, None if the browser is needed
+        """
+        if not FetchStrategy.use_http(pattern):
+            return None
+        status_code, content, headers = None, None, dict()
+        try:
+            async with Scheduler.host_slot(url):
+                await RateLimiter.acquire_async(url)
+                start = time.perf_counter()
+                status_code, content, headers = await cls.__send_get_request_async(url)
+                cls.__record_response(url, "http", status_code, content, start)
+        except Exception:
+            # a probe that failed tells nothing about the page, the browser fetch follows
+            pass
+        strategy = FetchStrategy.observe(pattern, status_code, content)
+        Metrics.inc("fm_scraper_http_probes_total", pattern=pattern, strategy=strategy or "unknown")
+        if status_code in THROTTLE_STATUS_CODES:
+            RateLimiter.throttled(url, 1, headers.get("retry-after"))
+        if strategy != FetchStrategy.HTTP:
+            return None
+        RateLimiter.success(url)
+        ResponseCache.set(cache_key, content)
+        return content
+
+    @classmethod
+    async def __fetch_async(cls, fun, url: str, cache_key: str, with_session: bool, data: dict) -> str | None:
+        count = 0
+        while count < MAX_RETRIES:
+            async with Scheduler.host_slot(url):
+                await RateLimiter.acquire_async(url)
+                start = time.perf_counter()
+                status_code, content, headers = await fun(url, with_session, data)
+                cls.__record_response(url, "browser" if with_session else "http", status_code, content, start)
+            if status_code >= 300 and status_code != 404:
+                count += 1
+                delay = cls.__retry_delay(url, status_code, count, headers.get("retry-after"))
+                if count < MAX_RETRIES:
+                    await asyncio.sleep(delay)
+                continue
+            RateLimiter.success(url)
+            if status_code < 300:
+                ResponseCache.set(cache_key, content)
+            return content
+        return None
+
+    @classmethod
+    async def _filter_request_async(cls, url: str, filter_data: dict) -> str | None:
+        cache_key = ResponseCache.key("FILTER", url, filter_data)
+        content = cls.__get_cached(url, cache_key)
+        if content is not None or ResponseCache.offline:
+            return content
+        return await Dedup.run(cache_key, lambda: cls.__filter_async(url, cache_key, filter_data), "request")
+
+    @classmethod
+    async def __filter_async(cls, url: str, cache_key: str, filter_data: dict) -> str | None:
+        count = 0
+        while count < MAX_RETRIES:
+            async with Scheduler.host_slot(url):
+                await RateLimiter.acquire_async(url)
+                start = time.perf_counter()
+                async with AsyncBrowserPool.lease(user_agent=cls.__user_agent) as context:
+                    page = await cls.__new_page_async(context, url)
+                    try:
+                        response = await page.goto(cls.__resolve(url), timeout=0)
+                        await page.wait_for_load_state("load")
+                        consent = page.locator('p[class=fc-button-label]').get_by_text("Consent", exact=True)
+                        if AsyncBrowserPool.is_fresh(context) or await consent.count():
+                            await consent.click()
+                        for k,v in filter_data.items():
+                            await page.locator(k).fill(v)
+                        await page.keyboard.press("Enter")
+                        await asyncio.sleep(1)
+                        content = await page.content()
+                    finally:
+                        await page.close()
+                cls.__record_response(url, "filter", response.status, content, start)
+            if response.status >= 300:
+                count += 1
+                await asyncio.sleep(cls.__retry_delay(url, response.status, count, response.headers.get("retry-after")))
+                continue
+            RateLimiter.success(url)
+            ResponseCache.set(cache_key, content)
+            return content
+
+    @classmethod
+    async def _ready_request_async(cls, url: str, selector: str, timeout: float = READY_TIMEOUT_SECONDS,
+                                   reloads: int = READY_MAX_RELOADS, pattern: str = None) -> Tuple[str | None, str | None]:
+        """
+        load a page in the browser and wait inside the live page until selector is in the document, loading the page
+        again at most reloads times when it does not show up within timeout seconds.
+        :param pattern: url pattern of the page, if it has content markers the page is tried over plain http first
+        :return: content of the page and None once ready, otherwise None and the reason why it never was ready
+        """
+        cache_key = ResponseCache.key("READY", url, {"selector": selector})
+        content = cls.__get_cached(url, cache_key)
+        if content is not None:
+            return content, None
+        if ResponseCache.offline:
+            return None, "not cached"
+        return await Dedup.run(cache_key, lambda: cls.__ready_async(url, cache_key, selector, timeout, reloads,
+                                                                    pattern), "request")
+
+    @classmethod
+    async def __ready_async(cls, url: str, cache_key: str, selector: str, timeout: float,
+                            reloads: int, pattern: str = None) -> Tuple[str | None, str | None]:
+        if FetchStrategy.is_adaptive(pattern):
+            content = await cls.__probe_http_async(url, cache_key, pattern)
+            if content is not None:
+                return content, None
+        host = urlparse(url).netloc
+        reason = None
+        for attempt in range(reloads + 1):
+            status_code, headers, content, reason = await cls.__ready_attempt_async(url, selector, timeout)
+            if reason is None:
+                RateLimiter.success(url)
+                ResponseCache.set(cache_key, content)
+                return content, None
+            if status_code == 404:
+                break
+            if attempt < reloads:
+                Metrics.inc("fm_scraper_reloads_total", host=host)
+                if status_code >= 300:
+                    # nothing is held while waiting, other requests of the host can use the slot and the context
+                    await asyncio.sleep(cls.__retry_delay(url, status_code, attempt + 1, headers.get("retry-after")))
+        Metrics.inc("fm_scraper_not_ready_total", host=host)
+        return None, reason
+
+    @classmethod
+    async def __ready_attempt_async(cls, url: str, selector: str,
+                                    timeout: float) -> Tuple[int, dict, str | None, str | None]:
+        """
+        load the page once and wait for selector. The host slot is taken before the browser context, as every other
+        browser fetch does, so that waiting for one never holds the other.
+        :return: status code, headers, content of the page and None once ready, otherwise the reason why it is not
+        """
+        content, status_code, headers, reason = None, 0, dict(), None
+        async with Scheduler.host_slot(url):
+            await RateLimiter.acquire_async(url)
+            start = time.perf_counter()
+            async with AsyncBrowserPool.lease(user_agent=cls.__user_agent) as context:
+                page = await cls.__new_page_async(context, url)
+                try:
+                    response = await page.goto(cls.__resolve(url), wait_until="domcontentloaded")
+                    if response:
+                        status_code, headers = response.status, response.headers
+                    if status_code < 300:
+                        await page.wait_for_selector(selector, state="attached", timeout=timeout * 1000)
+                        content = await page.content()
+                    else:
+                        reason = f"status {status_code}"
+                except PlaywrightTimeoutError:
+                    reason = f"{selector} not found within {timeout}s"
+                except PlaywrightError as e:
+                    reason = str(e).splitlines()[0]
+                finally:
+                    await page.close()
+            cls.__record_response(url, "browser", status_code, content, start)
+        return status_code, headers, content, reason
+
+    @classmethod
+    async def __send_get_request_async(cls, url:str, with_session: bool = False, data: dict = None) -> Tuple[int, str, dict]:
+        if with_session:
+            async with AsyncBrowserPool.lease(user_agent=cls.__user_agent) as context:
+                page = await cls.__new_page_async(context, url)
+                try:
+                    response = await cls.__goto_async(page, url)
+                    return response.status, await page.content(), response.headers
+                finally:
+                    await page.close()
+        return await AsyncHttpPool.request("GET", cls.__resolve(url), headers={"User-Agent": cls.__user_agent, "Content-Type":"application/x-www-form-urlencoded; charset=UTF-8"}, data=data)
+
+    @classmethod
+    async def __send_post_request_async(cls, url: str, with_session: bool = False, data: dict = None) -> tuple:
+        if with_session:
+            async with AsyncBrowserPool.lease(user_agent=cls.__user_agent) as context:
+                page = await context.new_page()
+                try:
+                    response = await page.request.post(url=cls.__resolve(url), data=data, headers={"User-Agent": cls.__user_agent})
+                    return response.status, await page.content(), response.headers
+                finally:
+                    await page.close()
+        return await AsyncHttpPool.request("POST", cls.__resolve(url), headers={"User-Agent": cls.__user_agent}, data=data)
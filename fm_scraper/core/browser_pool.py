@@ -0,0 +1,337 @@
+import asyncio
+import atexit
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from playwright.async_api import async_playwright, BrowserContext as AsyncBrowserContext
+from playwright.sync_api import sync_playwright, BrowserContext, Error as PlaywrightError
+from typing import AsyncIterator, Iterator
+from fm_scraper.browsers import WEBKIT_PATH
+from fm_scraper.scrapers.settings import (
+    MAX_ASYNC_BROWSER_CONTEXTS,
+    MAX_BROWSER_CONTEXTS,
+    MAX_PAGES_PER_BROWSER,
+    MAX_PAGES_PER_CONTEXT
+)
+from .metrics import Metrics
+
+
+class _ThreadBrowser:
+    """
+    playwright driver, browser and idle contexts owned by a single thread.
+    """
+
+    def __init__(self) -> None:
+        self.__playwright = None
+        self.__browser = None
+        self.__idle = dict()
+        self.__served = dict()
+        self.__browser_pages = 0
+        self.__leased = 0
+
+    def __del__(self) -> None:
+        # the thread owning this browser is shutting down: best effort cleanup
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def acquire(self, context_kwargs: dict) -> BrowserContext:
+        self.__ensure_browser()
+        idle = self.__idle.setdefault(self.__key(context_kwargs), list())
+        context = None
+        while idle and context is None:
+            candidate = idle.pop()
+            if self.__is_alive(candidate):
+                context = candidate
+            else:
+                self.__discard(candidate)
+        if context is None:
+            context = self.__browser.new_context(**context_kwargs)
+            self.__served[id(context)] = 0
+        self.__leased += 1
+        return context
+
+    def release(self, context: BrowserContext, context_kwargs: dict, healthy: bool) -> None:
+        self.__leased -= 1
+        self.__browser_pages += 1
+        self.__served[id(context)] = self.__served.get(id(context), 0) + 1
+        idle = self.__idle.setdefault(self.__key(context_kwargs), list())
+        if (not healthy or not self.__is_alive(context) or self.__served[id(context)] >= MAX_PAGES_PER_CONTEXT
+                or len(idle) >= MAX_BROWSER_CONTEXTS):
+            self.__discard(context)
+        else:
+            idle.append(context)
+        if self.__browser_pages >= MAX_PAGES_PER_BROWSER and self.__leased == 0:
+            self.__close_browser()
+
+    def is_fresh(self, context: BrowserContext) -> bool:
+        return self.__served.get(id(context), 0) == 0
+
+    def close(self) -> None:
+        self.__close_browser()
+        if self.__playwright:
+            self.__playwright.stop()
+            self.__playwright = None
+
+    def __ensure_browser(self) -> None:
+        if self.__browser and self.__browser.is_connected():
+            return
+        if self.__browser:
+            self.__close_browser()
+        if not self.__playwright:
+            self.__playwright = sync_playwright().start()
+        with Metrics.timer("fm_scraper_browser_launch_seconds"):
+            self.__browser = self.__playwright.webkit.launch(executable_path=WEBKIT_PATH)
+
+    def __is_alive(self, context: BrowserContext) -> bool:
+        return bool(self.__browser and self.__browser.is_connected() and context in self.__browser.contexts)
+
+    def __discard(self, context: BrowserContext) -> None:
+        self.__served.pop(id(context), None)
+        try:
+            context.close()
+        except PlaywrightError:
+            pass
+
+    def __close_browser(self) -> None:
+        for contexts in self.__idle.values():
+            for context in contexts:
+                self.__discard(context)
+        self.__idle = dict()
+        self.__served = dict()
+        self.__browser_pages = 0
+        if self.__browser:
+            try:
+                self.__browser.close()
+            except PlaywrightError:
+                pass
+            self.__browser = None
+
+    @staticmethod
+    def __key(context_kwargs: dict) -> tuple:
+        return tuple(sorted((k, repr(v)) for k, v in context_kwargs.items()))
+
+
+class BrowserPool:
+    """
+    long-lived pool of webkit browsers and contexts.
+    playwright's sync api is bound to the thread that started it, so each thread owns its own driver and browser,
+    while the number of contexts leased at the same time is capped per process. Contexts are recycled after
+    MAX_PAGES_PER_CONTEXT pages and browsers after MAX_PAGES_PER_BROWSER pages.
+    """
+
+    __local = threading.local()
+    __slots = threading.BoundedSemaphore(MAX_BROWSER_CONTEXTS)
+
+    @classmethod
+    @contextmanager
+    def lease(cls, **context_kwargs) -> Iterator[BrowserContext]:
+        with cls.__slots:
+            state = cls.__get_state()
+            context = state.acquire(context_kwargs)
+            healthy = False
+            try:
+                yield context
+                healthy = True
+            finally:
+                state.release(context, context_kwargs, healthy)
+
+    @classmethod
+    def is_fresh(cls, context: BrowserContext) -> bool:
+        """
+        true if the context has never served a page, e.g. cookie banners have not been accepted yet.
+        """
+        return cls.__get_state().is_fresh(context)
+
+    @classmethod
+    def close(cls) -> None:
+        """
+        close the browser owned by the calling thread.
+        """
+        state = getattr(cls.__local, "state", None)
+        if state:
+            state.close()
+            cls.__local.state = None
+
+    @classmethod
+    def __get_state(cls) -> _ThreadBrowser:
+        state = getattr(cls.__local, "state", None)
+        if state is None:
+            state = _ThreadBrowser()
+            cls.__local.state = state
+        return state
+
+
+class _LoopBrowser:
+    """
+    async playwright driver and browsers owned by a single event loop.
+    A browser that reached MAX_PAGES_PER_BROWSER is retired: new leases go to a fresh browser and the old one is closed
+    as soon as its last context is returned.
+    """
+
+    def __init__(self, max_contexts: int) -> None:
+        self.max_contexts = max_contexts
+        self.slots = asyncio.Semaphore(max_contexts)
+        self.__lock = asyncio.Lock()
+        self.__playwright = None
+        self.__browser = None
+        self.__browser_pages = 0
+        self.__retired = list()
+        self.__leases = dict()
+        self.__owners = dict()
+        self.__idle = dict()
+        self.__served = dict()
+
+    async def acquire(self, context_kwargs: dict) -> AsyncBrowserContext:
+        async with self.__lock:
+            await self.__ensure_browser()
+            idle = self.__idle.setdefault(self.__key(context_kwargs), list())
+            context = None
+            while idle and context is None:
+                candidate = idle.pop()
+                if self.__is_alive(candidate):
+                    context = candidate
+                else:
+                    await self.__discard(candidate)
+            if context is None:
+                context = await self.__browser.new_context(**context_kwargs)
+                self.__served[id(context)] = 0
+                self.__owners[id(context)] = self.__browser
+            owner = self.__owners[id(context)]
+            self.__leases[id(owner)] = self.__leases.get(id(owner), 0) + 1
+            return context
+
+    async def release(self, context: AsyncBrowserContext, context_kwargs: dict, healthy: bool) -> None:
+        async with self.__lock:
+            owner = self.__owners.get(id(context))
+            self.__leases[id(owner)] = self.__leases.get(id(owner), 1) - 1
+            self.__served[id(context)] = self.__served.get(id(context), 0) + 1
+            idle = self.__idle.setdefault(self.__key(context_kwargs), list())
+            if owner is self.__browser:
+                self.__browser_pages += 1
+            if (not healthy or owner is not self.__browser or not self.__is_alive(context)
+                    or self.__served[id(context)] >= MAX_PAGES_PER_CONTEXT or len(idle) >= self.max_contexts):
+                await self.__discard(context)
+            else:
+                idle.append(context)
+            if self.__browser and self.__browser_pages >= MAX_PAGES_PER_BROWSER:
+                await self.__retire_browser()
+            for browser in [b for b in self.__retired if not self.__leases.get(id(b))]:
+                self.__retired.remove(browser)
+                await self.__close_browser(browser)
+
+    def is_fresh(self, context: AsyncBrowserContext) -> bool:
+        return self.__served.get(id(context), 0) == 0
+
+    async def close(self) -> None:
+        async with self.__lock:
+            if self.__browser:
+                await self.__retire_browser()
+            for browser in self.__retired:
+                await self.__close_browser(browser)
+            self.__retired = list()
+            if self.__playwright:
+                await self.__playwright.stop()
+                self.__playwright = None
+
+    async def __ensure_browser(self) -> None:
+        if self.__browser and self.__browser.is_connected():
+            return
+        if self.__browser:
+            await self.__retire_browser()
+        if not self.__playwright:
+            self.__playwright = await async_playwright().start()
+        with Metrics.timer("fm_scraper_browser_launch_seconds"):
+            self.__browser = await self.__playwright.webkit.launch(executable_path=WEBKIT_PATH)
+
+    def __is_alive(self, context: AsyncBrowserContext) -> bool:
+        owner = self.__owners.get(id(context))
+        return bool(owner and owner.is_connected() and context in owner.contexts)
+
+    async def __discard(self, context: AsyncBrowserContext) -> None:
+        self.__served.pop(id(context), None)
+        self.__owners.pop(id(context), None)
+        try:
+            await context.close()
+        except PlaywrightError:
+            pass
+
+    async def __retire_browser(self) -> None:
+        for contexts in self.__idle.values():
+            for context in contexts:
+                await self.__discard(context)
+        self.__idle = dict()
+        self.__retired.append(self.__browser)
+        self.__browser = None
+        self.__browser_pages = 0
+
+    async def __close_browser(self, browser) -> None:
+        self.__leases.pop(id(browser), None)
+        for context_id in [k for k, v in self.__owners.items() if v is browser]:
+            self.__owners.pop(context_id, None)
+            self.__served.pop(context_id, None)
+        try:
+            await browser.close()
+        except PlaywrightError:
+            pass
+
+    @staticmethod
+    def __key(context_kwargs: dict) -> tuple:
+        return tuple(sorted((k, repr(v)) for k, v in context_kwargs.items()))
+
+
+class AsyncBrowserPool:
+    """
+    async counterpart of BrowserPool: one browser per event loop, shared by every coroutine of the loop,
+    with at most max_contexts (MAX_ASYNC_BROWSER_CONTEXTS by default) contexts leased at the same time.
+    """
+
+    __states = weakref.WeakKeyDictionary()
+    max_contexts = MAX_ASYNC_BROWSER_CONTEXTS
+
+    @classmethod
+    def configure(cls, max_contexts: int = None) -> None:
+        """
+        applies to the event loops started afterwards.
+        """
+        if max_contexts is not None:
+            cls.max_contexts = max_contexts
+
+    @classmethod
+    @asynccontextmanager
+    async def lease(cls, **context_kwargs) -> AsyncIterator[AsyncBrowserContext]:
+        state = cls.__get_state()
+        async with state.slots:
+            context = await state.acquire(context_kwargs)
+            healthy = False
+            try:
+                yield context
+                healthy = True
+            finally:
+                await state.release(context, context_kwargs, healthy)
+
+    @classmethod
+    def is_fresh(cls, context: AsyncBrowserContext) -> bool:
+        return cls.__get_state().is_fresh(context)
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        close the browsers owned by the running event loop.
+        """
+        state = cls.__states.pop(asyncio.get_running_loop(), None)
+        if state:
+            await state.close()
+
+    @classmethod
+    def __get_state(cls) -> _LoopBrowser:
+        loop = asyncio.get_running_loop()
+        state = cls.__states.get(loop)
+        if state is None:
+            state = _LoopBrowser(cls.max_contexts)
+            cls.__states[loop] = state
+        return state
+
+
+atexit.register(BrowserPool.close)
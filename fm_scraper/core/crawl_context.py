@@ -0,0 +1,25 @@
+import contextvars
+from typing import Hashable
+
+
+class CrawlContext:
+    """
+    identity of the crawl the running task belongs to. Crawls sharing an event loop (the jobs of the JobRunner) keep
+    their seen urls and pending enrichments apart through it; tasks inherit it from the task that created them.
+    """
+
+    __current = contextvars.ContextVar("fm_scraper_crawl", default=None)
+
+    @classmethod
+    def current(cls) -> Hashable:
+        """
+        id of the crawl of the running task, None outside of a job.
+        """
+        return cls.__current.get()
+
+    @classmethod
+    def enter(cls, crawl_id: Hashable) -> None:
+        """
+        make the running task, and the tasks it creates from now on, part of the crawl.
+        """
+        cls.__current.set(crawl_id)
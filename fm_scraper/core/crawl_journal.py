@@ -0,0 +1,94 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+from fm_scraper.scrapers.settings import JOURNAL_PATH
+
+
+class CrawlJournal:
+    """
+    durable journal of a crawl job, stored in sqlite.
+    It records every discovered team/person url and, once scraped, its records, so that re-running a job with the same
+    id only fetches what is missing.
+    """
+
+    def __init__(self, job_id: str, path: str = JOURNAL_PATH) -> None:
+        self.job_id = job_id
+        self.__lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "job_id TEXT NOT NULL, url TEXT NOT NULL, kind TEXT NOT NULL, parent TEXT, "
+            "completed INTEGER NOT NULL DEFAULT 0, records TEXT, updated REAL, "
+            "PRIMARY KEY (job_id, url))"
+        )
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS entries_parent ON entries (job_id, parent)")
+
+    def discover(self, urls: List[str], kind: str, parent: str = None) -> None:
+        with self.__lock:
+            self.__connection.executemany(
+                "INSERT OR IGNORE INTO entries (job_id, url, kind, parent, updated) VALUES (?, ?, ?, ?, ?)",
+                [(self.job_id, url, kind, parent, time.time()) for url in urls]
+            )
+
+    def complete(self, url: str, kind: str, records: List[dict] = None, parent: str = None) -> None:
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT INTO entries (job_id, url, kind, parent, completed, records, updated) VALUES (?, ?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (job_id, url) DO UPDATE SET completed = 1, records = excluded.records, "
+                "parent = COALESCE(excluded.parent, entries.parent), updated = excluded.updated",
+                (self.job_id, url, kind, parent, json.dumps(records, default=str) if records is not None else None,
+                 time.time())
+            )
+
+    def completed_records(self, url: str) -> List[dict] | None:
+        """
+        records of an already completed url, None if the url still has to be scraped.
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT records FROM entries WHERE job_id = ? AND url = ? AND completed = 1", (self.job_id, url)
+            ).fetchone()
+        if not row:
+            return None
+        return json.loads(row[0]) if row[0] else list()
+
+    def is_completed(self, url: str) -> bool:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT 1 FROM entries WHERE job_id = ? AND url = ? AND completed = 1", (self.job_id, url)
+            ).fetchone()
+        return row is not None
+
+    def children_records(self, parent: str) -> List[dict]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT records FROM entries WHERE job_id = ? AND parent = ? AND completed = 1 AND records IS NOT NULL",
+                (self.job_id, parent)
+            ).fetchall()
+        return [record for row in rows for record in json.loads(row[0])]
+
+    def pending_children(self, parent: str) -> int:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT COUNT(*) FROM entries WHERE job_id = ? AND parent = ? AND completed = 0", (self.job_id, parent)
+            ).fetchone()
+        return row[0]
+
+    def progress(self) -> dict:
+        """
+        number of completed and discovered urls, by kind.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT kind, SUM(completed), COUNT(*) FROM entries WHERE job_id = ? GROUP BY kind", (self.job_id,)
+            ).fetchall()
+        return {kind: (done, total) for kind, done, total in rows}
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
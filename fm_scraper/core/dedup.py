@@ -0,0 +1,82 @@
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Hashable
+from .crawl_context import CrawlContext
+from .metrics import Metrics
+
+
+class _LoopFlights:
+    """
+    keys seen and work in flight of a single event loop.
+    """
+
+    def __init__(self) -> None:
+        self.seen = set()
+        self.flights = dict()
+
+
+class Dedup:
+    """
+    crawl-wide deduplication. A crawl runs on a single event loop, so every team and person task of a job shares the
+    same state: first() is the seen-set of the crawl (see CrawlContext), run() coalesces concurrent calls for the same
+    key into one, whatever the crawl of the callers.
+    """
+
+    __states = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def first(cls, key: Hashable, kind: str = None) -> bool:
+        """
+        True the first time the key is seen in the crawl, False afterwards.
+        """
+        state = cls.__get_state()
+        key = (CrawlContext.current(), key)
+        if key in state.seen:
+            Metrics.inc("fm_scraper_deduplicated_total", kind=kind or "item")
+            return False
+        state.seen.add(key)
+        return True
+
+    @classmethod
+    async def run(cls, key: Hashable, function: Callable[[], Awaitable], kind: str = None) -> any:
+        """
+        run function once for all the callers asking for the same key at the same time, they all get its result.
+        """
+        state = cls.__get_state()
+        future = state.flights.get(key)
+        while future is not None:
+            Metrics.inc("fm_scraper_coalesced_total", kind=kind or "item")
+            try:
+                # a cancelled caller must not cancel the shared work
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # the caller running the work was cancelled (e.g. its job), not this one: run it again
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            future = state.flights.get(key)
+        future = asyncio.get_running_loop().create_future()
+        state.flights[key] = future
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # retrieved, so that it is not reported when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            state.flights.pop(key, None)
+
+    @classmethod
+    def __get_state(cls) -> _LoopFlights:
+        loop = asyncio.get_running_loop()
+        state = cls.__states.get(loop)
+        if state is None:
+            state = _LoopFlights()
+            cls.__states[loop] = state
+        return state
@@ -0,0 +1,114 @@
+import atexit
+import json
+import os
+import threading
+from fm_scraper.scrapers.settings import CONTENT_MARKERS, STRATEGY_PATH, STRATEGY_PROBE_INTERVAL
+
+
+class FetchStrategy:
+    """
+    remembers, per url pattern (e.g. tuttocampo_person), whether its pages can be read over plain http or need the
+    browser. A page fetched over http is accepted only if it contains one of the CONTENT_MARKERS of its pattern.
+    Patterns that needed the browser are probed over http again every STRATEGY_PROBE_INTERVAL fetches, so a site
+    that starts rendering server side is picked up. Strategies are stored as a json file in STRATEGY_PATH.
+    """
+
+    HTTP = "http"
+    BROWSER = "browser"
+
+    markers = dict(CONTENT_MARKERS)
+    path = STRATEGY_PATH
+    probe_interval = STRATEGY_PROBE_INTERVAL
+
+    __strategies = None
+    __browser_fetches = dict()
+    __dirty = False
+    __lock = threading.Lock()
+
+    @classmethod
+    def is_adaptive(cls, pattern: str | None) -> bool:
+        return pattern in cls.markers
+
+    @classmethod
+    def is_valid(cls, pattern: str, content: str | None) -> bool:
+        return bool(content) and any(marker in content for marker in cls.markers[pattern])
+
+    @classmethod
+    def get(cls, pattern: str) -> str | None:
+        with cls.__lock:
+            cls.__load()
+            return cls.__strategies.get(pattern)
+
+    @classmethod
+    def use_http(cls, pattern: str) -> bool:
+        """
+        whether the next page of the pattern should be tried over http first.
+        """
+        with cls.__lock:
+            cls.__load()
+            if cls.__strategies.get(pattern) != cls.BROWSER:
+                return True
+            fetches = cls.__browser_fetches.get(pattern, 0) + 1
+            cls.__browser_fetches[pattern] = 0 if fetches >= cls.probe_interval else fetches
+            return fetches >= cls.probe_interval
+
+    @classmethod
+    def observe(cls, pattern: str, status_code: int | None, content: str | None) -> str | None:
+        """
+        learn from the plain http response of a page of the pattern: with the markers http is enough, a 200 without
+        them needs the browser. Error statuses and failed requests (status_code None) tell nothing, the strategy is
+        kept as it is.
+        :return: the strategy learnt, None if unknown
+        """
+        if status_code != 200:
+            return None
+        strategy = cls.HTTP if cls.is_valid(pattern, content) else cls.BROWSER
+        cls.remember(pattern, strategy)
+        return strategy
+
+    @classmethod
+    def remember(cls, pattern: str, strategy: str) -> None:
+        with cls.__lock:
+            cls.__load()
+            if cls.__strategies.get(pattern) != strategy:
+                cls.__strategies[pattern] = strategy
+                cls.__browser_fetches.pop(pattern, None)
+                cls.__dirty = True
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        forget the strategies, every pattern is tried over http again.
+        """
+        with cls.__lock:
+            cls.__strategies = dict()
+            cls.__browser_fetches = dict()
+            cls.__dirty = True
+
+    @classmethod
+    def save(cls) -> None:
+        with cls.__lock:
+            if not cls.__dirty or cls.__strategies is None or not cls.path:
+                return
+            os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+            temp_path = f"{cls.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(cls.__strategies, f, indent=2)
+            os.replace(temp_path, cls.path)
+            cls.__dirty = False
+
+    @classmethod
+    def __load(cls) -> None:
+        if cls.__strategies is not None:
+            return
+        cls.__strategies = dict()
+        if not cls.path:
+            return
+        try:
+            with open(cls.path, encoding="utf-8") as f:
+                cls.__strategies = {k: v for k, v in json.load(f).items() if v in (cls.HTTP, cls.BROWSER)}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+
+atexit.register(FetchStrategy.save)
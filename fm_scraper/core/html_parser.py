@@ -0,0 +1,65 @@
+import importlib.util
+from bs4 import BeautifulSoup, SoupStrainer
+from fm_scraper.scrapers.settings import HTML_PARSER, PARTIAL_PARSING
+from .metrics import Metrics
+
+
+def _classes(attrs: dict) -> list:
+    value = attrs.get("class") or ""
+    return value if isinstance(value, list) else value.split()
+
+
+class HtmlParser:
+    """
+    builds the soups of the scraped pages with the configured parser backend (HTML_PARSER).
+    When PARTIAL_PARSING is set, only the subtrees read by the scrapers for the given page type are built; the full
+    document is parsed instead if the strainer does not match anything, e.g. after a layout change.
+    The strainers keep whole elements in document order, so find_next across kept elements behaves as on the full page.
+    """
+
+    backend = HTML_PARSER if HTML_PARSER == "html.parser" or importlib.util.find_spec(HTML_PARSER) else "html.parser"
+    partial = PARTIAL_PARSING
+    strainers = {
+        # transfermarkt
+        "transfermarkt_division": SoupStrainer(lambda name, attrs: name == "div" and "grid-view" in _classes(attrs)),
+        "transfermarkt_team": SoupStrainer(lambda name, attrs:
+                                           (name == "table" and "items" in _classes(attrs))
+                                           or (name == "h1" and "data-header__headline-wrapper" in _classes(attrs))),
+        "transfermarkt_staff": SoupStrainer(lambda name, attrs: name == "div" and "large-8" in _classes(attrs)),
+        "transfermarkt_person": SoupStrainer("main"),
+        # tuttocampo
+        "tuttocampo_division": SoupStrainer(lambda name, attrs: name == "div" and attrs.get("id") == "last_match_ranking"),
+        "tuttocampo_team": SoupStrainer(lambda name, attrs:
+                                        name in ("table", "h1")
+                                        or (name == "div" and attrs.get("id") == "team_staff")),
+        "tuttocampo_person": SoupStrainer(lambda name, attrs:
+                                          (name == "table" and "tc-table-slim" in _classes(attrs))
+                                          or attrs.get("itemprop") in ("affiliation", "role")
+                                          or (name == "div" and {"data", "roles"} <= set(_classes(attrs)))),
+        # fillers
+        "fminside_search": SoupStrainer(lambda name, attrs: name == "div" and attrs.get("id") == "player_table"),
+        "fminside_player": SoupStrainer(lambda name, attrs:
+                                        name == "div" and (attrs.get("id") == "player" or "column" in _classes(attrs))),
+        "fmtransferupdate_search": SoupStrainer(lambda name, attrs: attrs.get("id") == "fmtu-content-pane"),
+        "fmtransferupdate_person": SoupStrainer(lambda name, attrs: name == "div" and "itemscope" in attrs),
+    }
+
+    @classmethod
+    def parse(cls, content: str | bytes | None, page_type: str = None, **kwargs) -> BeautifulSoup:
+        """
+        parse the content of a page.
+        :param content: html of the page
+        :param page_type: key of strainers, if missing the whole document is parsed
+        :param partial: overrides PARTIAL_PARSING
+        :param backend: overrides HTML_PARSER
+        :return:
+        """
+        content = content or ""
+        backend = kwargs.get("backend", cls.backend)
+        strainer = cls.strainers.get(page_type) if kwargs.get("partial", cls.partial) else None
+        with Metrics.timer("fm_scraper_parse_seconds", page_type=page_type or "full"):
+            if strainer:
+                soup = BeautifulSoup(content, backend, parse_only=strainer)
+                if soup.contents:
+                    return soup
+            return BeautifulSoup(content, backend)
@@ -0,0 +1,129 @@
+import asyncio
+import atexit
+import threading
+import warnings
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Tuple
+from urllib.parse import urlparse
+from fm_scraper.scrapers.settings import (
+    HTTP2_ENABLED,
+    HTTP_POOL_DEFAULT_SIZE,
+    HTTP_POOL_SIZES
+)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+def _use_http2() -> bool:
+    if HTTP2_ENABLED and httpx and not h2:
+        warnings.warn("HTTP2_ENABLED needs httpx[http2] (the h2 package), falling back to HTTP/1.1")
+        return False
+    return HTTP2_ENABLED
+
+
+class HttpPool:
+    """
+    shared keep-alive connection pools for plain http requests, one thread safe client per host.
+    Pool sizes are configured per host by HTTP_POOL_SIZES. When HTTP2_ENABLED is set and httpx (with its http2 extra)
+    is installed, requests to the same host are multiplexed over HTTP/2.
+    """
+
+    __clients = dict()
+    __lock = threading.Lock()
+
+    @classmethod
+    def request(cls, method: str, url: str, **kwargs) -> Tuple[int, str, dict]:
+        response = cls.__get_client(urlparse(url).netloc).request(method, url, **kwargs)
+        return response.status_code, response.text, response.headers
+
+    @classmethod
+    def close(cls) -> None:
+        with cls.__lock:
+            for client in cls.__clients.values():
+                client.close()
+            cls.__clients = dict()
+
+    @classmethod
+    def __get_client(cls, host: str) -> any:
+        client = cls.__clients.get(host)
+        if client is None:
+            with cls.__lock:
+                client = cls.__clients.get(host)
+                if client is None:
+                    client = cls.__create_client(HTTP_POOL_SIZES.get(host, HTTP_POOL_DEFAULT_SIZE))
+                    cls.__clients[host] = client
+        return client
+
+    @staticmethod
+    def __create_client(pool_size: int) -> any:
+        if httpx and _use_http2():
+            return httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                timeout=httpx.Timeout(None),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+class AsyncHttpPool:
+    """
+    async counterpart of HttpPool: one httpx.AsyncClient per host and event loop, sized by HTTP_POOL_SIZES.
+    Requests above the pool size wait for a free connection. Without httpx the blocking HttpPool is run in a thread.
+    """
+
+    __clients = weakref.WeakKeyDictionary()
+    pool_size = None
+
+    @classmethod
+    def configure(cls, pool_size: int = None) -> None:
+        """
+        use the same pool size for every host, overriding HTTP_POOL_SIZES. Applies to the clients created afterwards.
+        """
+        cls.pool_size = pool_size
+
+    @classmethod
+    async def request(cls, method: str, url: str, **kwargs) -> Tuple[int, str, dict]:
+        if not httpx:
+            return await asyncio.to_thread(HttpPool.request, method, url, **kwargs)
+        response = await cls.__get_client(urlparse(url).netloc).request(method, url, **kwargs)
+        return response.status_code, response.text, response.headers
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        close the clients owned by the running event loop.
+        """
+        clients = cls.__clients.pop(asyncio.get_running_loop(), dict())
+        for client in clients.values():
+            await client.aclose()
+
+    @classmethod
+    def __get_client(cls, host: str) -> any:
+        clients = cls.__clients.setdefault(asyncio.get_running_loop(), dict())
+        client = clients.get(host)
+        if client is None:
+            pool_size = cls.pool_size or HTTP_POOL_SIZES.get(host, HTTP_POOL_DEFAULT_SIZE)
+            client = httpx.AsyncClient(
+                http2=_use_http2(),
+                follow_redirects=True,
+                timeout=httpx.Timeout(None),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+            clients[host] = client
+        return client
+
+
+atexit.register(HttpPool.close)
@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from fm_scraper.scrapers.settings import METRICS_BUCKETS
+
+
+class _Histogram:
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(METRICS_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = 0
+        while index < len(METRICS_BUCKETS) and value > METRICS_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Metrics:
+    """
+    process wide counters, gauges and latency histograms, labelled e.g. by host, page type or filler.
+    They can be exported as json or in the prometheus text format, and summarized for a job by comparing two snapshots.
+    """
+
+    __counters = dict()
+    __gauges = dict()
+    __histograms = dict()
+    __lock = threading.Lock()
+
+    @classmethod
+    def inc(cls, name: str, value: float = 1, **labels) -> None:
+        key = cls.__key(name, labels)
+        with cls.__lock:
+            cls.__counters[key] = cls.__counters.get(key, 0) + value
+
+    @classmethod
+    def gauge(cls, name: str, delta: float, **labels) -> None:
+        """
+        move a gauge up or down, e.g. the number of waiting tasks.
+        """
+        key = cls.__key(name, labels)
+        with cls.__lock:
+            cls.__gauges[key] = cls.__gauges.get(key, 0) + delta
+
+    @classmethod
+    def observe(cls, name: str, seconds: float, **labels) -> None:
+        key = cls.__key(name, labels)
+        with cls.__lock:
+            histogram = cls.__histograms.get(key)
+            if histogram is None:
+                histogram = _Histogram()
+                cls.__histograms[key] = histogram
+            histogram.observe(seconds)
+
+    @classmethod
+    @contextmanager
+    def timer(cls, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.observe(name, time.perf_counter() - start, **labels)
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls.__lock:
+            cls.__counters = dict()
+            cls.__gauges = dict()
+            cls.__histograms = dict()
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        with cls.__lock:
+            return {
+                "counters": {cls.__format(k): v for k, v in cls.__counters.items()},
+                "gauges": {cls.__format(k): v for k, v in cls.__gauges.items()},
+                "histograms": {cls.__format(k): {"count": h.count, "sum": h.sum, "buckets": list(h.counts)}
+                               for k, h in cls.__histograms.items()},
+            }
+
+    @classmethod
+    def to_json(cls, since: dict = None) -> str:
+        return json.dumps(cls.__delta(since), indent=4)
+
+    @classmethod
+    def to_prometheus(cls) -> str:
+        lines = list()
+        with cls.__lock:
+            for kind, values in (("counter", cls.__counters), ("gauge", cls.__gauges)):
+                for name in sorted({k[0] for k in values}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    lines += [f"{cls.__format(k)} {v}" for k, v in values.items() if k[0] == name]
+            for name in sorted({k[0] for k in cls.__histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (_, labels), h in [(k, h) for k, h in cls.__histograms.items() if k[0] == name]:
+                    cumulative = 0
+                    for bound, count in zip(list(METRICS_BUCKETS) + ["+Inf"], h.counts):
+                        cumulative += count
+                        lines.append(f"{cls.__format((name + '_bucket', labels + (('le', str(bound)),)))} {cumulative}")
+                    lines.append(f"{cls.__format((name + '_sum', labels))} {h.sum}")
+                    lines.append(f"{cls.__format((name + '_count', labels))} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def export(cls, path: str, since: dict = None) -> None:
+        """
+        write the metrics to path, in the prometheus text format if it ends with .prom, as json otherwise.
+        """
+        content = cls.to_prometheus() if path.endswith(".prom") else cls.to_json(since)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    @classmethod
+    def summary(cls, since: dict = None) -> str:
+        """
+        one line per metric that changed since the given snapshot, histograms as count, total, p50 and p99.
+        """
+        delta = cls.__delta(since)
+        lines = [f"{k}: {round(v, 3)}" for k, v in sorted(delta["counters"].items())]
+        for k, h in sorted(delta["histograms"].items()):
+            lines.append(f"{k}: {h['count']} in {h['sum']:.2f}s, p50 {cls.__quantile(h, 0.50)}, "
+                         f"p99 {cls.__quantile(h, 0.99)}")
+        return "\n".join(lines)
+
+    @classmethod
+    def __delta(cls, since: dict = None) -> dict:
+        current = cls.snapshot()
+        if not since:
+            return current
+        counters = {k: v - since["counters"].get(k, 0) for k, v in current["counters"].items()}
+        histograms = dict()
+        for k, h in current["histograms"].items():
+            before = since["histograms"].get(k, {"count": 0, "sum": 0.0, "buckets": [0] * len(h["buckets"])})
+            histograms[k] = {
+                "count": h["count"] - before["count"],
+                "sum": h["sum"] - before["sum"],
+                "buckets": [a - b for a, b in zip(h["buckets"], before["buckets"])],
+            }
+        return {
+            "counters": {k: v for k, v in counters.items() if v},
+            "gauges": current["gauges"],
+            "histograms": {k: h for k, h in histograms.items() if h["count"]},
+        }
+
+    @staticmethod
+    def __quantile(histogram: dict, q: float) -> str:
+        # upper bound of the bucket holding the quantile
+        target = q * histogram["count"]
+        cumulative = 0
+        for bound, count in zip(METRICS_BUCKETS, histogram["buckets"]):
+            cumulative += count
+            if cumulative >= target:
+                return f"<={bound}s"
+        return f">{METRICS_BUCKETS[-1]}s"
+
+    @staticmethod
+    def __key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def __format(key: tuple) -> str:
+        name, labels = key
+        if not labels:
+            return name
+        return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
@@ -0,0 +1,131 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from fm_scraper.scrapers.settings import (
+    BACKOFF_BASE_SECONDS,
+    MAX_WAIT_SECONDS,
+    RATE_LIMIT_DEFAULT,
+    RATE_LIMITS
+)
+from .metrics import Metrics
+
+
+class _TokenBucket:
+    """
+    token bucket of a single host. Tokens are reserved in advance, so concurrent callers are queued one after the other
+    instead of waking up together. The refill rate is halved on throttling and slowly restored on success.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            self.tokens -= 1
+            return max(wait, self.blocked_until - now)
+
+    def success(self) -> None:
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def throttled(self, seconds: float) -> None:
+        with self.lock:
+            self.rate = max(self.max_rate / 20, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """
+    per-host rate limiter shared by every thread and event loop of the process.
+    Limits are configured in RATE_LIMITS as (requests per second, burst).
+    """
+
+    __buckets = dict()
+    __lock = threading.Lock()
+    __limit = None
+
+    @classmethod
+    def configure(cls, rate: float = None, burst: int = None) -> None:
+        """
+        apply the same limit to every host, overriding RATE_LIMITS.
+        """
+        if rate is None and burst is None:
+            cls.__limit = None
+        else:
+            default_rate, default_burst = RATE_LIMIT_DEFAULT
+            cls.__limit = (rate or default_rate, burst or default_burst)
+        with cls.__lock:
+            cls.__buckets = dict()
+
+    @classmethod
+    def acquire(cls, url: str) -> None:
+        wait = cls.__get_bucket(url).reserve()
+        if wait > 0:
+            Metrics.inc("fm_scraper_rate_limit_wait_seconds_total", wait, host=urlparse(url).netloc)
+            time.sleep(wait)
+
+    @classmethod
+    async def acquire_async(cls, url: str) -> None:
+        wait = cls.__get_bucket(url).reserve()
+        if wait > 0:
+            Metrics.inc("fm_scraper_rate_limit_wait_seconds_total", wait, host=urlparse(url).netloc)
+            await asyncio.sleep(wait)
+
+    @classmethod
+    def success(cls, url: str) -> None:
+        cls.__get_bucket(url).success()
+
+    @classmethod
+    def throttled(cls, url: str, attempt: int, retry_after: str = None) -> None:
+        """
+        pause the whole host for the time asked by the Retry-After header, or for a jittered backoff.
+        """
+        seconds = cls.parse_retry_after(retry_after)
+        cls.__get_bucket(url).throttled(seconds if seconds is not None else cls.backoff(attempt))
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        # exponential backoff with full jitter
+        return random.uniform(0, min(MAX_WAIT_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    @staticmethod
+    def parse_retry_after(value: str) -> float | None:
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_date.tzinfo is None:
+            retry_date = retry_date.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+
+    @classmethod
+    def __get_bucket(cls, url: str) -> _TokenBucket:
+        host = urlparse(url).netloc
+        bucket = cls.__buckets.get(host)
+        if bucket is None:
+            with cls.__lock:
+                bucket = cls.__buckets.get(host)
+                if bucket is None:
+                    bucket = _TokenBucket(*(cls.__limit or RATE_LIMITS.get(host, RATE_LIMIT_DEFAULT)))
+                    cls.__buckets[host] = bucket
+        return bucket
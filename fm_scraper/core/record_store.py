@@ -0,0 +1,93 @@
+import bisect
+import pandas as pd
+import threading
+from typing import List
+
+
+class RecordStore:
+    """
+    append-only store of dataframe chunks. Appending keeps a reference to the chunk, the chunks are concatenated only
+    when the whole frame is asked for (e.g. on export) and the result replaces them. Slices and single rows are read
+    from the chunks directly. The store is thread safe, snapshot() gives a frozen copy to read while rows keep coming.
+    """
+
+    def __init__(self) -> None:
+        self.__chunks: List[pd.DataFrame] = list()
+        self.__offsets: List[int] = list()
+        self.__length = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.__length
+
+    @property
+    def empty(self) -> bool:
+        return self.__length == 0
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        columns of all chunks, in order of appearance.
+        """
+        with self.__lock:
+            return list(dict.fromkeys(c for chunk in self.__chunks for c in chunk.columns))
+
+    def append(self, rows: pd.DataFrame) -> None:
+        if rows is None or rows.empty:
+            return
+        with self.__lock:
+            self.__offsets.append(self.__length)
+            self.__chunks.append(rows)
+            self.__length += len(rows)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__chunks = list()
+            self.__offsets = list()
+            self.__length = 0
+
+    def snapshot(self) -> "RecordStore":
+        """
+        store holding the rows appended so far, unaffected by later appends. The chunks are shared, not copied.
+        """
+        store = RecordStore()
+        with self.__lock:
+            store.__chunks = list(self.__chunks)
+            store.__offsets = list(self.__offsets)
+            store.__length = self.__length
+        return store
+
+    def frame(self) -> pd.DataFrame:
+        """
+        all rows as a single dataframe with a 0..n-1 index.
+        """
+        with self.__lock:
+            if not self.__chunks:
+                return pd.DataFrame()
+            if len(self.__chunks) > 1 or not self.__chunks[0].index.equals(pd.RangeIndex(self.__length)):
+                self.__chunks = [pd.concat(self.__chunks, ignore_index=True)]
+                self.__offsets = [0]
+            return self.__chunks[0]
+
+    def rows(self, start: int, stop: int) -> pd.DataFrame:
+        """
+        rows from start to stop (excluded), only the chunks holding them are touched.
+        """
+        with self.__lock:
+            start, stop = max(0, start), min(stop, self.__length)
+            if start >= stop:
+                return pd.DataFrame()
+            parts = list()
+            chunk = bisect.bisect_right(self.__offsets, start) - 1
+            while chunk < len(self.__chunks) and self.__offsets[chunk] < stop:
+                offset = self.__offsets[chunk]
+                parts.append(self.__chunks[chunk].iloc[max(0, start - offset):stop - offset])
+                chunk += 1
+        return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    def row(self, index: int) -> pd.Series:
+        with self.__lock:
+            if not 0 <= index < self.__length:
+                raise IndexError(f"Row {index} out of range")
+            chunk = bisect.bisect_right(self.__offsets, index) - 1
+            return self.__chunks[chunk].iloc[index - self.__offsets[chunk]]
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from fm_scraper.scrapers.settings import (
+    CACHE_DEFAULT_TTL,
+    CACHE_DIR,
+    CACHE_ENABLED,
+    CACHE_MAX_BYTES,
+    CACHE_OFFLINE,
+    CACHE_TTL
+)
+
+
+class ResponseCache:
+    """
+    content-addressed on-disk cache of http responses.
+    Entries are gzip files named after the hash of the request, expire after the TTL of their domain and are evicted
+    least recently used first once the cache grows over CACHE_MAX_BYTES. In offline mode only cached entries are
+    served, whatever their age.
+    """
+
+    enabled = CACHE_ENABLED
+    offline = CACHE_OFFLINE
+    directory = CACHE_DIR
+    max_bytes = CACHE_MAX_BYTES
+
+    __size = None
+    __lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, enabled: bool = None, offline: bool = None, directory: str = None, max_bytes: int = None) -> None:
+        if enabled is not None:
+            cls.enabled = enabled
+        if offline is not None:
+            cls.offline = offline
+        if directory is not None:
+            cls.directory = directory
+            cls.__size = None
+        if max_bytes is not None:
+            cls.max_bytes = max_bytes
+
+    @staticmethod
+    def key(method: str, url: str, body: dict = None) -> str:
+        body = json.dumps(body, sort_keys=True, default=str) if body else ""
+        return hashlib.sha256(f"{method}\n{url}\n{body}".encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, url: str, key: str) -> str | None:
+        if not cls.enabled and not cls.offline:
+            return None
+        path = cls.__path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                created = float(f.readline())
+                if not cls.offline and time.time() - created > cls.__get_ttl(url):
+                    return None
+                content = f.read()
+            # the modification time tracks the last use of the entry
+            os.utime(path)
+        except (OSError, EOFError, ValueError):
+            return None
+        return content
+
+    @classmethod
+    def set(cls, key: str, content: str) -> None:
+        if not cls.enabled or content is None:
+            return
+        path = cls.__path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                f.write(f"{time.time()}\n")
+                f.write(content)
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with cls.__lock:
+            if cls.__size is None:
+                cls.__size = cls.__compute_size()
+            else:
+                cls.__size += size - replaced
+            if cls.__size > cls.max_bytes:
+                cls.__evict()
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls.__lock:
+            for path, _, _ in cls.__entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            cls.__size = 0
+
+    @classmethod
+    def __evict(cls) -> None:
+        # drop the least recently used entries until the cache is back to 90% of its limit
+        entries = sorted(cls.__entries(), key=lambda e: e[1])
+        size = sum(e[2] for e in entries)
+        target = cls.max_bytes * 0.9
+        for path, _, entry_size in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError:
+                pass
+        cls.__size = size
+
+    @classmethod
+    def __compute_size(cls) -> int:
+        return sum(e[2] for e in cls.__entries())
+
+    @classmethod
+    def __entries(cls) -> list:
+        entries = list()
+        if not os.path.isdir(cls.directory):
+            return entries
+        for folder in os.scandir(cls.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith(".gz"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    @classmethod
+    def __path(cls, key: str) -> str:
+        return os.path.join(cls.directory, key[:2], f"{key}.gz")
+
+    @staticmethod
+    def __get_ttl(url: str) -> int:
+        return CACHE_TTL.get(urlparse(url).netloc, CACHE_DEFAULT_TTL)
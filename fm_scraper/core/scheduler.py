@@ -0,0 +1,114 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List
+from urllib.parse import urlparse
+from fm_scraper.scrapers.settings import HOST_CONCURRENCY, HOST_CONCURRENCY_DEFAULT, TASK_LIMITS
+from .metrics import Metrics
+
+
+class _LoopSlots:
+    """
+    semaphores of a single event loop, one per task type and one per host.
+    """
+
+    def __init__(self, task_limits: dict, host_limits: dict, host_default: int) -> None:
+        self.task_limits = task_limits
+        self.host_limits = host_limits
+        self.host_default = host_default
+        self.tasks = dict()
+        self.hosts = dict()
+
+    def task(self, task_type: str) -> asyncio.Semaphore:
+        if task_type not in self.task_limits:
+            raise ValueError(f"Unknown task type {task_type}, use one of {', '.join(self.task_limits)}")
+        if task_type not in self.tasks:
+            self.tasks[task_type] = asyncio.Semaphore(self.task_limits[task_type])
+        return self.tasks[task_type]
+
+    def host(self, host: str) -> asyncio.Semaphore:
+        if host not in self.hosts:
+            self.hosts[host] = asyncio.Semaphore(self.host_limits.get(host, self.host_default))
+        return self.hosts[host]
+
+
+class Scheduler:
+    """
+    single bounded scheduler of the crawl. Work is split in typed tasks (team, squad, staff, person, enrichment), each
+    type runs at most TASK_LIMITS[type] tasks at the same time and each host serves at most HOST_CONCURRENCY[host]
+    requests at the same time, so browsers, sockets and memory are sized by the settings whatever the fan-out.
+    A task may wait for tasks of other types, never for tasks of its own type.
+    """
+
+    __states = weakref.WeakKeyDictionary()
+    task_limits = dict(TASK_LIMITS)
+    host_limits = dict(HOST_CONCURRENCY)
+    host_default = HOST_CONCURRENCY_DEFAULT
+
+    @classmethod
+    def configure(cls, task_limits: dict = None, host_limits: dict = None, host_default: int = None) -> None:
+        """
+        update the limits, applies to the event loops started afterwards.
+        :param host_default: limit of the hosts missing from host_limits
+        """
+        if task_limits:
+            cls.task_limits = {**cls.task_limits, **task_limits}
+        if host_limits:
+            cls.host_limits = {**cls.host_limits, **host_limits}
+        if host_default:
+            cls.host_default = host_default
+
+    @classmethod
+    async def run(cls, task_type: str, coroutine: Awaitable) -> any:
+        """
+        run a task once a slot of its type is free.
+        """
+        start = time.perf_counter()
+        Metrics.gauge("fm_scraper_tasks_waiting", 1, type=task_type)
+        try:
+            await cls.__get_state().task(task_type).acquire()
+        finally:
+            Metrics.gauge("fm_scraper_tasks_waiting", -1, type=task_type)
+        Metrics.observe("fm_scraper_task_wait_seconds", time.perf_counter() - start, type=task_type)
+        try:
+            with Metrics.timer("fm_scraper_task_seconds", type=task_type):
+                return await coroutine
+        finally:
+            cls.__get_state().task(task_type).release()
+
+    @classmethod
+    async def map(cls, task_type: str, function: Callable[..., Awaitable], items: Iterable) -> List:
+        """
+        run function on every item as tasks of the given type, keeping the results in the order of the items.
+        Tasks are created as slots become free, so a long list does not allocate all of its coroutines upfront.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        pending = iter(enumerate(items))
+
+        async def worker() -> None:
+            for index, item in pending:
+                results[index] = await cls.run(task_type, function(item))
+
+        workers = min(len(items), cls.task_limits.get(task_type, 1))
+        await asyncio.gather(*[worker() for _ in range(workers)])
+        return results
+
+    @classmethod
+    @asynccontextmanager
+    async def host_slot(cls, url: str) -> AsyncIterator[None]:
+        """
+        hold one of the request slots of the host of the url.
+        """
+        async with cls.__get_state().host(urlparse(url).netloc):
+            yield
+
+    @classmethod
+    def __get_state(cls) -> _LoopSlots:
+        loop = asyncio.get_running_loop()
+        state = cls.__states.get(loop)
+        if state is None:
+            state = _LoopSlots(cls.task_limits, cls.host_limits, cls.host_default)
+            cls.__states[loop] = state
+        return state
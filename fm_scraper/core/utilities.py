@@ -19,7 +19,8 @@ class ClassUtilities:
         if not methods_to_exclude:
             methods_to_exclude = list()
         methods = [method for name, method in clazz.__dict__.items()
-                   if not name.startswith("_") and name not in methods_to_exclude]
+                   if not name.startswith("_") and name not in methods_to_exclude
+                   and not inspect.iscoroutinefunction(getattr(method, "__func__", method))]
         available_methods = list()
         for i in methods:
             data = {
@@ -1,2 +1,5 @@
 from .fm_inside import FMInsideFiller
 from .fm_transferupdate import FMTransferUpdateFiller
+from .enrichment import Enrichment
+from .enrichment_cache import EnrichmentCache
+from .fm_inside_index import FMInsideIndex
@@ -1,9 +1,15 @@
 from abc import ABC, abstractmethod
-from fm_scraper.core import BaseRequest
+from fm_scraper.core import BaseRequest, Metrics, Scheduler
+from .enrichment_cache import EnrichmentCache
 
 
 class BaseFiller(ABC, BaseRequest):
 
+    # outcomes of a lookup, only found and not found are cached
+    FOUND = "found"
+    NOT_FOUND = "not_found"
+    FAILED = "failed"
+
     def __init__(self, item: any) -> None:
         self.item = item
 
@@ -12,7 +18,32 @@ class BaseFiller(ABC, BaseRequest):
     def _get_base_url() -> str:
         pass
 
-    @staticmethod
+    def check_and_fill(self) -> any:
+        return self._run_async(self.check_and_fill_async())
+
+    async def check_and_fill_async(self) -> any:
+        filler = type(self).__name__
+        key = EnrichmentCache.key(self.item)
+        fields = EnrichmentCache.get(filler, key)
+        if fields is not None:
+            Metrics.inc("fm_scraper_enrichment_cache_hits_total", filler=filler)
+            self.item.update(fields)
+            return self.item
+        before = dict(self.item)
+        with Metrics.timer("fm_scraper_filler_seconds", filler=filler):
+            result = await Scheduler.run("enrichment", self._fill_async())
+        if result == BaseFiller.FOUND:
+            EnrichmentCache.set(filler, key, {k: v for k, v in self.item.items() if before.get(k) != v})
+        elif result == BaseFiller.NOT_FOUND:
+            EnrichmentCache.set(filler, key, dict())
+        else:
+            # a lookup that could not reach the site is tried again on the next run
+            Metrics.inc("fm_scraper_enrichment_failed_total", filler=filler)
+        return self.item
+
     @abstractmethod
-    def check_and_fill() -> any:
+    async def _fill_async(self) -> str:
+        """
+        :return: FOUND, NOT_FOUND or FAILED when a page could not be fetched
+        """
         pass
@@ -0,0 +1,178 @@
+import asyncio
+import weakref
+from typing import Callable, Iterable, List, Type
+from fm_scraper.core import BaseRequest, CrawlContext, Metrics
+from fm_scraper.scrapers.settings import DEBUG, ENRICHMENT_MODE, ENRICHMENT_WORKERS
+from .base_filler import BaseFiller
+from .fm_inside import FMInsideFiller
+from .fm_transferupdate import FMTransferUpdateFiller
+
+
+class _LoopStage:
+    """
+    queues, workers and pending records of the enrichment stage of a single event loop, the pending records are
+    grouped by (crawl, group).
+    """
+
+    def __init__(self) -> None:
+        self.queues = dict()
+        self.workers = list()
+        self.groups = dict()
+
+
+class Enrichment:
+    """
+    enrichment stage of the crawl. Scraped records are queued to the filler of their type and filled by
+    ENRICHMENT_WORKERS[filler] workers, so the scraping tasks move on to the next page instead of waiting for
+    fminside or fmtransferupdate; the requests of the fillers are still paced by the rate limits of their hosts.
+    With ENRICHMENT_MODE = "deferred" nothing is filled during the crawl, the stored records can be enriched later
+    with enrich_records. The crawls running on the same event loop share the workers, each one waits for its own
+    records only.
+    """
+
+    fillers = {
+        "player": FMInsideFiller,
+        "staff": FMTransferUpdateFiller,
+    }
+    mode = ENRICHMENT_MODE
+    workers = dict(ENRICHMENT_WORKERS)
+
+    __states = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def configure(cls, mode: str = None, workers: dict = None) -> None:
+        """
+        :param mode: "pipeline" to enrich during the crawl, "deferred" to skip the enrichment
+        :param workers: workers per filler, e.g. {"FMInsideFiller": 2}
+        """
+        if mode:
+            if mode not in ("pipeline", "deferred"):
+                raise ValueError(f"Unknown enrichment mode {mode}, use pipeline or deferred")
+            cls.mode = mode
+        if workers:
+            cls.workers = {**cls.workers, **workers}
+
+    @classmethod
+    def submit(cls, record: dict, callback: Callable[[dict], None] = None, group: str = None, mode: str = None) -> None:
+        """
+        queue a record to its filler, callback is called with the record once it is filled (or right away if the
+        record has no filler or the enrichment is deferred).
+        :param group: records of the same group can be waited for together, e.g. the persons of a team
+        :param mode: overrides the configured mode
+        """
+        filler = cls.fillers.get(record.get("type"))
+        if (mode or cls.mode) == "deferred" or filler is None:
+            if callback:
+                callback(record)
+            return
+        state = cls.__get_state()
+        queue = state.queues.get(filler)
+        if queue is None:
+            queue = state.queues[filler] = asyncio.Queue()
+            state.workers += [asyncio.create_task(cls.__work(filler, queue))
+                              for _ in range(cls.workers.get(filler.__name__, 1))]
+        future = asyncio.get_running_loop().create_future()
+        group = (CrawlContext.current(), group)
+        state.groups.setdefault(group, set()).add(future)
+        future.add_done_callback(lambda f: cls.__discard(state, group, f))
+        Metrics.gauge("fm_scraper_enrichment_queued", 1, filler=filler.__name__)
+        queue.put_nowait((record, callback, future))
+
+    @classmethod
+    async def wait(cls, group: str = None) -> None:
+        """
+        wait for the records of the group, all the records of the crawl if group is None.
+        """
+        state = cls.__get_state()
+        crawl = CrawlContext.current()
+        while True:
+            pending = [f for (c, g), futures in state.groups.items() if c == crawl and (group is None or g == group)
+                       for f in futures]
+            if not pending:
+                return
+            await asyncio.gather(*pending)
+
+    @classmethod
+    def cancel(cls) -> None:
+        """
+        drop the records of the crawl still queued, their callbacks are not called.
+        """
+        crawl = CrawlContext.current()
+        for (c, _), futures in list(cls.__get_state().groups.items()):
+            if c == crawl:
+                for future in list(futures):
+                    future.cancel()
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        wait for the pending records of the crawl, then stop the workers of the loop unless other crawls still have
+        records queued.
+        """
+        state = cls.__get_state()
+        try:
+            await cls.wait()
+        finally:
+            if not any(state.groups.values()) and cls.__states.get(asyncio.get_running_loop()) is state:
+                cls.__states.pop(asyncio.get_running_loop(), None)
+                for worker in state.workers:
+                    worker.cancel()
+                await asyncio.gather(*state.workers, return_exceptions=True)
+
+    @classmethod
+    def enrich_records(cls, records: Iterable[dict]) -> List[dict]:
+        """
+        enrich records scraped earlier, e.g. with the deferred mode.
+        """
+        return BaseRequest._run_async(cls.enrich_records_async(records))
+
+    @classmethod
+    async def enrich_records_async(cls, records: Iterable[dict], sink: Callable[[dict], None] = None) -> List[dict]:
+        records = list(records)
+        for record in records:
+            cls.submit(record, sink, mode="pipeline")
+        await cls.close()
+        return records
+
+    @classmethod
+    async def __work(cls, filler: Type[BaseFiller], queue: asyncio.Queue) -> None:
+        while True:
+            record, callback, future = await queue.get()
+            Metrics.gauge("fm_scraper_enrichment_queued", -1, filler=filler.__name__)
+            if future.cancelled():
+                # the crawl waiting for the record was cancelled
+                continue
+            try:
+                try:
+                    await filler(record).check_and_fill_async()
+                except Exception as e:
+                    # the record is kept as scraped
+                    Metrics.inc("fm_scraper_enrichment_errors_total", filler=filler.__name__)
+                    if DEBUG:
+                        print(f"Error on enriching {record.get('first_name')} {record.get('last_name')}: {e}")
+                if future.cancelled():
+                    continue
+                if callback:
+                    callback(record)
+                future.set_result(record)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+    @staticmethod
+    def __discard(state: _LoopStage, group: tuple, future: asyncio.Future) -> None:
+        futures = state.groups.get(group)
+        if futures is not None:
+            futures.discard(future)
+            # the loop of the JobRunner outlives the crawls, so the empty groups are dropped
+            if not futures:
+                state.groups.pop(group, None)
+
+    @classmethod
+    def __get_state(cls) -> _LoopStage:
+        loop = asyncio.get_running_loop()
+        state = cls.__states.get(loop)
+        if state is None:
+            state = _LoopStage()
+            cls.__states[loop] = state
+        return state
@@ -0,0 +1,91 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from fm_scraper.scrapers.settings import (
+    ENRICHMENT_CACHE_ENABLED,
+    ENRICHMENT_CACHE_PATH,
+    ENRICHMENT_CACHE_TTL,
+    ENRICHMENT_NEGATIVE_TTL
+)
+
+
+class EnrichmentCache:
+    """
+    persistent cache of the fields resolved by the fillers, keyed by the normalized (name, date of birth, type) of a
+    person. Lookups that found nothing are cached too, with a shorter TTL, lookups that failed are not cached.
+    """
+
+    enabled = ENRICHMENT_CACHE_ENABLED
+    path = ENRICHMENT_CACHE_PATH
+
+    __connection = None
+    __lock = threading.Lock()
+
+    @staticmethod
+    def key(item: dict) -> str | None:
+        if not item.get("first_name") and not item.get("last_name"):
+            return None
+        name = f"{item.get('first_name') or ''} {item.get('last_name') or ''}"
+        name = unicodedata.normalize("NFKD", name)
+        name = " ".join("".join(c for c in name if not unicodedata.combining(c)).lower().split())
+        return f"{name}|{item.get('date_of_birth') or ''}|{item.get('type') or ''}"
+
+    @classmethod
+    def get(cls, filler: str, key: str) -> dict | None:
+        """
+        the cached fields, an empty dict for a cached negative result, None on a miss.
+        """
+        if not cls.enabled or not key:
+            return None
+        with cls.__lock:
+            row = cls.__get_connection().execute(
+                "SELECT fields, updated FROM enrichment WHERE filler = ? AND key = ?", (filler, key)
+            ).fetchone()
+        if not row:
+            return None
+        fields = json.loads(row[0])
+        ttl = ENRICHMENT_CACHE_TTL if fields else ENRICHMENT_NEGATIVE_TTL
+        if time.time() - row[1] > ttl:
+            return None
+        return fields
+
+    @classmethod
+    def set(cls, filler: str, key: str, fields: dict) -> None:
+        if not cls.enabled or not key:
+            return
+        with cls.__lock:
+            cls.__get_connection().execute(
+                "INSERT OR REPLACE INTO enrichment (filler, key, fields, updated) VALUES (?, ?, ?, ?)",
+                (filler, key, json.dumps(fields, default=str), time.time())
+            )
+
+    @classmethod
+    def invalidate(cls, filler: str = None, key: str = None) -> None:
+        """
+        drop the cached entries of a filler and/or a key, or the whole cache.
+        """
+        query, params = "DELETE FROM enrichment WHERE 1 = 1", list()
+        if filler:
+            query += " AND filler = ?"
+            params.append(filler)
+        if key:
+            query += " AND key = ?"
+            params.append(key)
+        with cls.__lock:
+            cls.__get_connection().execute(query, params)
+
+    @classmethod
+    def __get_connection(cls) -> sqlite3.Connection:
+        if cls.__connection is None:
+            os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+            cls.__connection = sqlite3.connect(cls.path, check_same_thread=False, isolation_level=None)
+            cls.__connection.execute("PRAGMA journal_mode=WAL")
+            cls.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS enrichment ("
+                "filler TEXT NOT NULL, key TEXT NOT NULL, fields TEXT NOT NULL, updated REAL NOT NULL, "
+                "PRIMARY KEY (filler, key))"
+            )
+        return cls.__connection
@@ -1,80 +1,155 @@
-from bs4 import BeautifulSoup
-from typing import Callable, List
-from urllib.parse import urljoin
-from fm_scraper.core import DateUtilities, StringUtilities, TypeRequest
+import asyncio
+import re
+import warnings
+from urllib.parse import urljoin, urlparse
+from fm_scraper.core import DateUtilities, HtmlParser, StringUtilities
+from fm_scraper.scrapers.settings import FMINSIDE_INDEX_PAGE_URL
 from .base_filler import BaseFiller
+from .fm_inside_index import FMInsideIndex, IndexEntry
 
 
 class FMInsideFiller(BaseFiller):
 
+    # the last part of the url of a player starts with its unique id, e.g. /players/7-fm-24/2000255018-jude-bellingham
+    __url_unique_id = re.compile(r"/(\d+)-[^/]+/?$")
+
     @staticmethod
     def _get_base_url() -> str:
         return "https://fminside.net/players"
 
     @classmethod
-    def __query_request(cls, full_name: str) -> str:
-        return cls._filter_request(
+    async def __query_request(cls, full_name: str) -> str:
+        return await cls._filter_request_async(
             url=cls._get_base_url(),
             filter_data={
                 "[placeholder=Name]":full_name
             }
         )
 
-    def check_and_fill(self) -> any:
+    @classmethod
+    def build_index(cls, pages: int) -> int:
+        """
+        index the players listed in the first pages of FMInside, so that later lookups skip the live search.
+        :return: number of players indexed
+        """
+        return cls._run_async(cls.build_index_async(pages))
+
+    @classmethod
+    async def build_index_async(cls, pages: int) -> int:
+        # the other pages are fetched only if the first one is a player listing
+        players = cls.__index_player_table(await cls.__index_page_request(1))
+        if not players:
+            warnings.warn(f"{FMINSIDE_INDEX_PAGE_URL.format(page=1)} lists no player, check FMINSIDE_INDEX_PAGE_URL: "
+                          f"the index is not built")
+            return 0
+        responses = await asyncio.gather(*[cls.__index_page_request(page) for page in range(2, pages + 1)])
+        for response in responses:
+            players += cls.__index_player_table(response)
+        FMInsideIndex.save()
+        return len(players)
+
+    @classmethod
+    async def __index_page_request(cls, page: int) -> str | None:
+        return await cls._send_request_async(FMINSIDE_INDEX_PAGE_URL.format(page=page), with_session=True,
+                                             pattern="fminside_index")
+
+    async def _fill_async(self) -> str:
         full_name = f"{self.item['first_name']} {self.item['last_name']}".lower().strip()
-        response = self.__query_request(full_name)
+        analysed = set()
+        fetched = True
+        # local index first, live search only when it does not resolve the player
+        for entry in FMInsideIndex.search(full_name, 0.80):
+            analysed.add(entry.url)
+            fetched = await self.__analise_entry(entry) and fetched
+            if self.item.get("db_unique_id"):
+                return self.FOUND
+        response = await self.__query_request(full_name)
+        if response is None:
+            return self.FAILED
+        for name, url in self.__index_player_table(response):
+            if url not in analysed and StringUtilities.safe_equals(name, full_name, True, 0.80):
+                fetched = await self.__analise_item(url) and fetched
+        if self.item.get("db_unique_id"):
+            return self.FOUND
+        return self.NOT_FOUND if fetched else self.FAILED
+
+    @classmethod
+    def __index_player_table(cls, response: str) -> list:
+        players = list()
         if response:
-            soup = BeautifulSoup(response, self._parser)
-            if soup:
-                player_table = soup.find("div", id="player_table")
-                if player_table:
-                    items = player_table.find_all("b")
-                    urls = [t.find("a").attrs['href'] for t in items
-                            if StringUtilities.safe_equals(t.text, full_name, True, 0.80)]
-                    for u in urls:
-                        self.__analise_item(u)
-        return self.item
-
-    def __analise_item(self, url: str) -> None:
+            player_table = HtmlParser.parse(response, "fminside_search").find("div", id="player_table")
+            if player_table:
+                for t in player_table.find_all("b"):
+                    a = t.find("a")
+                    if a and a.attrs.get("href"):
+                        age, unique_id = cls.__get_listed_details(t, a.attrs["href"])
+                        players.append((t.text, a.attrs["href"]))
+                        FMInsideIndex.add(t.text, a.attrs["href"], age, unique_id)
+        return players
+
+    @classmethod
+    def __get_listed_details(cls, name, url: str) -> tuple:
+        """
+        age and unique id of a listed player, so that the index resolves it without its page: the age cell of its row
+        and the unique id in its url. Each is None when the listing does not show it.
+        """
+        age = None
+        row = name.find_parent(["ul", "tr"])
+        # a row holding several players is the whole table, its first age cell would be someone else's
+        if row and len(row.find_all("b")) == 1:
+            age = StringUtilities.extract_safe_text(row.find(class_="age"))
+        match = cls.__url_unique_id.search(urlparse(url).path)
+        return int(age) if age and age.isdigit() else None, match.group(1) if match else None
+
+    async def __analise_entry(self, entry: IndexEntry) -> bool:
+        age = FMInsideIndex.current_age(entry)
+        if age is None or not entry.unique_id:
+            return await self.__analise_item(entry.url)
+        if self.__check_name(entry.name) and self.__check_age(age):
+            self.item["db_unique_id"] = entry.unique_id
+        return True
+
+    async def __analise_item(self, url: str) -> bool:
+        """
+        :return: False if the page of the player could not be fetched
+        """
         # get player data and compare
-        response = self._send_request(urljoin(self._get_base_url(), url))
+        response = await self._send_request_async(urljoin(self._get_base_url(), url))
+        if response is None:
+            return False
         if response:
             # player info section
-            player_info = BeautifulSoup(response, self._parser).find("div", id="player")
+            player_info = HtmlParser.parse(response, "fminside_player").find("div", id="player")
             if player_info:
                 player_details = player_info.find_next("div", attrs={"class":"column"}).find_all("li")
+                name = self.__get_detail(player_details[0], "name")
+                age = self.__get_detail(player_details[1], "age")
+                age = int(age) if age else None
+                unique_id = self.__get_detail(player_details[-1], "unique id")
+                if name:
+                    FMInsideIndex.add(name, url, age, unique_id)
                 # compare name, birth of date and club (if applicable)
-                funcs: List[Callable] = [self.__compare_name, self.__compare_birth_date]
-                if all([f(player_details) for f in funcs]):
-                    self.item["db_unique_id"] = self.__get_db_unique_id(player_details)
+                if name and self.__check_name(name) and self.__check_age(age):
+                    self.item["db_unique_id"] = unique_id
+        return True
 
     # compare
-    def __compare_name(self, items: list) -> bool:
-        item = items[0]
-        key = item.find_next("span")
-        if key and key.text.strip().lower() == "name":
-            name = StringUtilities.extract_safe_text(item.find_next("span", attrs={"value"}))
-            return StringUtilities.safe_equals(
-                name, f"{self.item['first_name']} {self.item['last_name']}",
-                True, 0.90
-            )
-        return False
+    def __check_name(self, name: str) -> bool:
+        return StringUtilities.safe_equals(
+            name, f"{self.item['first_name']} {self.item['last_name']}",
+            True, 0.90
+        )
 
-    def __compare_birth_date(self, items: list) -> bool:
-        item = items[1]
-        key = item.find_next("span")
-        if key and key.text.strip().lower() == "age":
-            age = int(StringUtilities.extract_safe_text(item.find_next("span", attrs={"value"})))
-            if age and "date_of_birth" in self.item and self.item["date_of_birth"]:
-                true_age = DateUtilities.get_years_from_today(self.item["date_of_birth"])
-                return age in [true_age, true_age-1]
+    def __check_age(self, age: int | None) -> bool:
+        if age and "date_of_birth" in self.item and self.item["date_of_birth"]:
+            true_age = DateUtilities.get_years_from_today(self.item["date_of_birth"])
+            return age in [true_age, true_age-1]
         return False
 
-    # setters
+    # getters
     @staticmethod
-    def __get_db_unique_id(items: list) -> str:
-        item = items[-1]
+    def __get_detail(item, label: str) -> str | None:
         key = item.find_next("span")
-        if key and key.text.strip().lower() == "unique id":
-            unique_db = StringUtilities.extract_safe_text(item.find_next("span", attrs={"value"}))
-            return unique_db
+        if key and key.text.strip().lower() == label:
+            return StringUtilities.extract_safe_text(item.find_next("span", attrs={"value"}))
+        return None
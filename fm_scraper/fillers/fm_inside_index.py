@@ -0,0 +1,135 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import Counter, namedtuple
+from Levenshtein import ratio
+from typing import List
+from fm_scraper.core import StringUtilities
+from fm_scraper.scrapers.settings import FMINSIDE_INDEX_PATH, FMINSIDE_INDEX_TTL
+
+
+IndexEntry = namedtuple("IndexEntry", ["name", "url", "age", "unique_id", "updated"])
+
+
+class FMInsideIndex:
+    """
+    local searchable index of FMInside players (name, age, unique id, url), stored as a gzip json file.
+    Candidates are selected through the trigrams shared with the query and then reranked by Levenshtein ratio.
+    """
+
+    path = FMINSIDE_INDEX_PATH
+
+    __entries = None
+    __by_url = dict()
+    __grams = dict()
+    __dirty = False
+    __lock = threading.Lock()
+
+    @classmethod
+    def add(cls, name: str, url: str, age: int = None, unique_id: str = None) -> None:
+        with cls.__lock:
+            cls.__load()
+            position = cls.__by_url.get(url)
+            if position is not None:
+                old = cls.__entries[position]
+                entry = IndexEntry(
+                    old.name if not name else name.strip().lower(), url,
+                    age if age is not None else old.age,
+                    unique_id if unique_id else old.unique_id,
+                    time.time() if age is not None else old.updated
+                )
+                cls.__entries[position] = entry
+                if entry.name != old.name:
+                    cls.__reindex(position, old.name, entry.name)
+            else:
+                cls.__insert(IndexEntry(name.strip().lower(), url, age, unique_id, time.time()))
+            cls.__dirty = True
+
+    @classmethod
+    def search(cls, full_name: str, acceptable_ratio: float = 0.80, limit: int = 10) -> List[IndexEntry]:
+        with cls.__lock:
+            cls.__load()
+            query = cls.__normalize(full_name)
+            grams = cls.__get_grams(query)
+            counter = Counter()
+            for gram in grams:
+                counter.update(cls.__grams.get(gram, ()))
+            # blocking: only entries sharing a good part of the trigrams are compared
+            minimum = max(1, len(grams) // 3)
+            blocked = [cls.__entries[i] for i, count in counter.most_common(limit * 5) if count >= minimum]
+        candidates = [e for e in blocked
+                      if StringUtilities.safe_equals(cls.__normalize(e.name), query, True, acceptable_ratio)]
+        candidates.sort(key=lambda e: ratio(cls.__normalize(e.name), query), reverse=True)
+        return candidates[:limit]
+
+    @staticmethod
+    def current_age(entry: IndexEntry) -> int | None:
+        """
+        age of the entry, None if unknown or too old to be trusted.
+        """
+        if entry.age is None or time.time() - entry.updated > FMINSIDE_INDEX_TTL:
+            return None
+        return entry.age
+
+    @classmethod
+    def save(cls) -> None:
+        with cls.__lock:
+            if not cls.__dirty or cls.__entries is None:
+                return
+            os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+            temp_path = f"{cls.path}.{os.getpid()}.tmp"
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                json.dump([list(e) for e in cls.__entries], f, separators=(",", ":"))
+            os.replace(temp_path, cls.path)
+            cls.__dirty = False
+
+    @classmethod
+    def __load(cls) -> None:
+        if cls.__entries is not None:
+            return
+        cls.__entries, cls.__by_url, cls.__grams = list(), dict(), dict()
+        try:
+            with gzip.open(cls.path, "rt", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, EOFError, ValueError):
+            rows = list()
+        for row in rows:
+            cls.__insert(IndexEntry(*row))
+
+    @classmethod
+    def __insert(cls, entry: IndexEntry) -> None:
+        position = len(cls.__entries)
+        cls.__entries.append(entry)
+        cls.__by_url[entry.url] = position
+        for gram in cls.__get_grams(cls.__normalize(entry.name)):
+            cls.__grams.setdefault(gram, list()).append(position)
+
+    @classmethod
+    def __reindex(cls, position: int, old_name: str, new_name: str) -> None:
+        old_grams = cls.__get_grams(cls.__normalize(old_name))
+        new_grams = cls.__get_grams(cls.__normalize(new_name))
+        for gram in old_grams - new_grams:
+            positions = cls.__grams.get(gram, list())
+            if position in positions:
+                positions.remove(position)
+            if not positions:
+                cls.__grams.pop(gram, None)
+        for gram in new_grams - old_grams:
+            cls.__grams.setdefault(gram, list()).append(position)
+
+    @staticmethod
+    def __normalize(name: str) -> str:
+        name = unicodedata.normalize("NFKD", name)
+        return " ".join("".join(c for c in name if not unicodedata.combining(c)).lower().split())
+
+    @staticmethod
+    def __get_grams(name: str) -> set:
+        padded = f"  {name} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+atexit.register(FMInsideIndex.save)
@@ -1,8 +1,7 @@
 import Levenshtein
-from bs4 import BeautifulSoup
 from dateutil import parser
 from typing import Callable, List
-from fm_scraper.core import StringUtilities
+from fm_scraper.core import HtmlParser, StringUtilities
 from .base_filler import BaseFiller
 
 
@@ -13,19 +12,23 @@ class FMTransferUpdateFiller(BaseFiller):
         return "https://fmtransferupdate.com/"
 
     @classmethod
-    def __query_request(cls, full_name: str, person_type: str) -> str:
+    async def __query_request(cls, full_name: str, person_type: str) -> str:
         typology = "players" if person_type == "player" else "staff"
-        return cls._send_request(
+        return await cls._send_request_async(
             url=f"{cls._get_base_url()}{typology}?filter_name={full_name}",
-            with_session=True
+            with_session=True,
+            pattern="fmtransferupdate_search"
         )
 
-    def check_and_fill(self) -> any:
+    async def _fill_async(self) -> str:
         full_name_1 = f"{self.item['first_name']}+{self.item['last_name']}".lower().strip()
         full_name_2 = f"{self.item['first_name']} {self.item['last_name']}".lower().strip()
-        response = self.__query_request(full_name_1, self.item["type"])
+        response = await self.__query_request(full_name_1, self.item["type"])
+        if response is None:
+            return self.FAILED
+        fetched = True
         if response:
-            soup = BeautifulSoup(response, "html.parser")
+            soup = HtmlParser.parse(response, "fmtransferupdate_search")
             if soup:
                 content_panel = soup.find(id="fmtu-content-pane")
                 if content_panel:
@@ -36,14 +39,24 @@ class FMTransferUpdateFiller(BaseFiller):
                                                    and any(i in tag.attrs['href'] for i in ['players', 'staff']))
                     for item in items:
                         url = item.attrs['href']
-                        self.__analise_item(url)
-        return self.item
+                        fetched = await self.__analise_item(url) and fetched
+        if self.item.get("db_unique_id"):
+            return self.FOUND
+        return self.NOT_FOUND if fetched else self.FAILED
 
-    def __analise_item(self, url: str) -> None:
+    async def __analise_item(self, url: str) -> bool:
+        """
+        :return: False if the page of the person could not be fetched
+        """
         # get player/staff data and compare
-        response = self._send_request(url, with_session=True)
+        response = await self._send_request_async(url, with_session=True, pattern="fmtransferupdate_person")
+        if response is None:
+            return False
         if response:
-            item_soup = BeautifulSoup(response, "html.parser").find("div", itemscope=True)
+            item_soup = HtmlParser.parse(response, "fmtransferupdate_person").find("div", itemscope=True)
+            if item_soup is None:
+                # not the page of a person (e.g. a consent page), the lookup is not conclusive
+                return False
             # compare name, birth of date and club (if applicable)
             funcs: List[Callable] = [self.__compare_name, self.__compare_birth_date]
             if all([f(item_soup) for f in funcs]):
@@ -51,6 +64,7 @@ class FMTransferUpdateFiller(BaseFiller):
                 self.item["citizenship"] = self.__get_citizenships(item_soup)
                 if self.item.get("type") == "staff":
                     self.item["job"] = self.__get_job(item_soup)
+        return True
 
     # compare
     def __compare_name(self, soup) -> bool:
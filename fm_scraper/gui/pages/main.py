@@ -10,6 +10,7 @@ from fm_scraper.gui.settings import (
     WINDOW_MIN_WIDTH
 )
 from fm_scraper.gui.themes import GUITheme
+from fm_scraper.scrapers import JobRunner
 
 
 class GUIMain:
@@ -30,5 +31,7 @@ class GUIMain:
         dpg.show_viewport()
         dpg.set_primary_window(MAIN_WINDOW_TAG, True)
         dpg.start_dearpygui()
+        # stop the jobs still running when the window is closed
+        JobRunner.shutdown()
         dpg.destroy_context()
         dpg.show_debug()
@@ -13,10 +13,13 @@ MAIN_WINDOW_TAG = "main_window"
 WINDOW_PROCESS_DATA_TAG = "options_window"
 WINDOW_TABLE_TAG = "table_window"
 TABLE_TAG = "data_table"
+TABLE_PAGE_LABEL_TAG = "data_table_page"
 MESSAGE_LOG_TEXT_TAG = "log_field"
 WINDOW_SCRAPING_TAG = "window_scraping"
 MODAL_MESSAGE_LOG_TAG = "modal_log"
 BUTTON_MODAL_EXIT_TAG = "log_exit_button"
+JOBS_GROUP_TAG = "jobs_group"
+EXPORT_PROGRESS_TAG = "export_progress"
 
 # queue
 MESSAGE_QUEUE = None
@@ -30,3 +33,17 @@ WINDOW_MIN_WIDTH = 900
 WINDOW_MIN_HEIGHT = 900
 WINDOW_MAX_WIDTH = 600
 WINDOW_MAX_HEIGHT = 600
+
+# table
+TABLE_PAGE_SIZE = 100
+
+# log
+LOG_MAX_LINES = 2000
+LOG_FLUSH_SECONDS = 0.25
+LOG_FILE_PATH = None
+
+# jobs
+JOB_POLL_SECONDS = 0.5
+
+# export
+EXPORT_BATCH_SIZE = 5000
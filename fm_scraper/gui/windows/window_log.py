@@ -1,10 +1,14 @@
 import time
 import dearpygui.dearpygui as dpg
+from collections import deque
 from pydispatch import dispatcher
-from threading import Thread
+from threading import Lock, Thread
 from fm_scraper.gui.components import Modal
 from fm_scraper.gui.settings import (
     BUTTON_MODAL_EXIT_TAG,
+    LOG_FILE_PATH,
+    LOG_FLUSH_SECONDS,
+    LOG_MAX_LINES,
     MESSAGE_LOG_TEXT_TAG,
     MODAL_MESSAGE_LOG_TAG,
     SIGNAL_SCRAPING_COMPLETED,
@@ -12,18 +16,32 @@ from fm_scraper.gui.settings import (
 
 
 class WindowLog(Modal):
+    """
+    log console of a scraping job. Messages are read from the queue in batches every LOG_FLUSH_SECONDS, only the last
+    LOG_MAX_LINES lines are kept on screen and, if LOG_FILE_PATH is set, the whole log is also appended to that file.
+    """
 
     __FRAME_PADDING = 1
     __is_completed = None
 
-    def __init__(self, queue) -> None:
+    def __init__(self, queue, job=None) -> None:
         self.queue = queue
+        # a console per job, all of them can be open at the same time
+        suffix = f"_{job.id}" if job else ""
+        self.__window_tag = f"{MODAL_MESSAGE_LOG_TAG}{suffix}"
+        self.__text_tag = f"{MESSAGE_LOG_TEXT_TAG}{suffix}"
+        self.__button_tag = f"{BUTTON_MODAL_EXIT_TAG}{suffix}"
+        self.__sender = job or dispatcher.Any
+        self.__lines = deque(["Start scraping...."], maxlen=LOG_MAX_LINES)
+        self.__lock = Lock()
+        self.__line_height = None
+        self.__file = open(LOG_FILE_PATH, "a", encoding="utf-8") if LOG_FILE_PATH else None
         with dpg.mutex():
-            with dpg.window(label="Scraping Logger", modal=True, no_close=True,
-                            tag=MODAL_MESSAGE_LOG_TAG, width=500, height=400) as modal_message:
+            with dpg.window(label=f"Scraping Logger - {job.name}" if job else "Scraping Logger", no_close=True,
+                            tag=self.__window_tag, width=500, height=400) as modal_message:
                 dpg.add_button(
                     label="Ok",
-                    tag=BUTTON_MODAL_EXIT_TAG,
+                    tag=self.__button_tag,
                     width=-1,
                     show=True,
                     enabled=False,
@@ -32,7 +50,7 @@ class WindowLog(Modal):
                 # log console
                 with dpg.child_window():
                     dpg.add_input_text(
-                        tag=MESSAGE_LOG_TEXT_TAG,
+                        tag=self.__text_tag,
                         multiline=True,
                         readonly=True,
                         tracked=True,
@@ -43,26 +61,30 @@ class WindowLog(Modal):
                     )
         dpg.split_frame()
         self._center_modal_window(modal_message)
-        dispatcher.connect(self.__end_logging, signal=SIGNAL_SCRAPING_COMPLETED)
+        dispatcher.connect(self.__end_logging, signal=SIGNAL_SCRAPING_COMPLETED, sender=self.__sender)
         # start thread for reading messages from queue
         self.__is_completed = False
         thread = Thread(target=self.__read_queue_thread)
         thread.start()
 
-    @classmethod
-    def __update_log(cls, text: str) -> None:
-        text = dpg.get_value(MESSAGE_LOG_TEXT_TAG) + text
-        dpg.set_value(MESSAGE_LOG_TEXT_TAG, text)
-        dpg.set_item_height(MESSAGE_LOG_TEXT_TAG, int(dpg.get_text_size(text)[1] + (2 * 3)))
+    def __update_log(self, text: str) -> None:
+        with self.__lock:
+            if self.__file:
+                self.__file.write(text)
+                self.__file.flush()
+            # the first part continues the last line on screen
+            parts = text.split("\n")
+            self.__lines[-1] += parts[0]
+            self.__lines.extend(parts[1:])
+            if self.__line_height is None:
+                self.__line_height = dpg.get_text_size("A")[1]
+            dpg.set_value(self.__text_tag, "\n".join(self.__lines))
+            dpg.set_item_height(self.__text_tag, int(self.__line_height * len(self.__lines) + (2 * 3)))
 
     def __read_queue_thread(self) -> None:
         while not self.__is_completed:
             self.__read_queue()
-            time.sleep(0.1)
-
-    @classmethod
-    def __show_new_message(cls, message: str) -> None:
-        cls.__update_log(message)
+            time.sleep(LOG_FLUSH_SECONDS)
 
     def __read_queue(self) -> None:
         text = ""
@@ -79,4 +101,10 @@ class WindowLog(Modal):
         self.__is_completed = True
         text = "\n...... scraping completed"
         self.__update_log(text)
-        dpg.enable_item(BUTTON_MODAL_EXIT_TAG)
+        # under the lock, the reader thread may still be writing its last batch
+        with self.__lock:
+            if self.__file:
+                self.__file.close()
+                self.__file = None
+        dispatcher.disconnect(self.__end_logging, signal=SIGNAL_SCRAPING_COMPLETED, sender=self.__sender)
+        dpg.enable_item(self.__button_tag)
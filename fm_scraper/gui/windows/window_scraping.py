@@ -1,11 +1,18 @@
 import dearpygui.dearpygui as dpg
 import inspect
+import time
 import fm_scraper.scrapers as scrapers
 from pathlib import Path
 from pydispatch import dispatcher
+from queue import Queue
+from threading import Lock, Thread
 from fm_scraper.core.utilities import ClassUtilities
 from fm_scraper.gui.components import Modal
 from fm_scraper.gui.settings import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_PROGRESS_TAG,
+    JOB_POLL_SECONDS,
+    JOBS_GROUP_TAG,
     MESSAGE_QUEUE,
     SIGNAL_SCRAPING_COMPLETED,
     SIGNAL_TABLE_LOADED_DATA,
@@ -13,6 +20,8 @@ from fm_scraper.gui.settings import (
     WINDOW_SCRAPING_TAG,
 )
 from fm_scraper.gui.themes import GUITheme
+from fm_scraper.scrapers import Job, JobRunner, RecordWriter
+from fm_scraper.scrapers.base_scraper import BaseScraper
 from fm_scraper.scrapers.settings import DEBUG
 from .window_log import WindowLog
 from .window_table import WindowTable
@@ -20,9 +29,12 @@ from .window_table import WindowTable
 
 class WindowScraping(Modal):
 
-    __scrapers = {n:c for n,c in inspect.getmembers(scrapers, inspect.isclass)}
+    __scrapers = {n:c for n,c in inspect.getmembers(scrapers, inspect.isclass) if issubclass(c, BaseScraper)}
     __url_scraped_successfully = "Url scraped successfully!"
     __url_scraped_failed = "Error on running {method}.\nError: {error}."
+    __jobs = list()
+    __monitor = None
+    __jobs_lock = Lock()
 
     def __init__(self):
         GUITheme.load_other_themes()
@@ -34,6 +46,8 @@ class WindowScraping(Modal):
             dpg.add_file_extension("", color=(255, 150, 150, 255))
             dpg.add_file_extension(".xlsx")
             dpg.add_file_extension(".csv")
+            dpg.add_file_extension(".parquet")
+            dpg.add_file_extension(".feather")
             dpg.add_file_extension(".xml")
             dpg.add_file_extension(".json")
 
@@ -51,6 +65,7 @@ class WindowScraping(Modal):
                             width=-1
                         )
                         dpg.bind_item_theme(dpg.last_item(), "success_button_theme")
+                        dpg.add_text("", tag=EXPORT_PROGRESS_TAG)
                         # clear table
                         dpg.add_button(
                            label="Clear table",
@@ -93,53 +108,102 @@ class WindowScraping(Modal):
                                         width=-1
                                     )
                                     dpg.add_spacer(height=5)
+                with dpg.group(tag=JOBS_GROUP_TAG):
+                    dpg.add_spacer(height=10)
+                    dpg.add_text("Jobs")
             dispatcher.connect(self.__added_row_table, signal=SIGNAL_TABLE_LOADED_DATA)
             dispatcher.connect(self.__empty_table, signal=SIGNAL_TABLE_EMPTY)
 
-    @staticmethod
-    def export_scraping_data(sender: int, app_data: dict) -> None:
+    @classmethod
+    def export_scraping_data(cls, sender: int, app_data: dict) -> None:
         file_path = Path(app_data["file_path_name"]).resolve()
-        # save
+        # save on a background thread, the table can be used in the meantime
+        dpg.disable_item("export_file")
+        Thread(target=cls.__export, args=(file_path,), daemon=True).start()
+
+    @classmethod
+    def __export(cls, file_path: Path) -> None:
         format_file = file_path.suffix
-        df = WindowTable.df
-        df.reset_index(drop=True, inplace=True)
-        if format_file == ".xml":
-            df.to_xml(file_path, index=False)
-            return
-        if format_file == ".csv":
-            df.to_csv(file_path, index=False)
-            return
-        if format_file == ".xlsx":
-            df.to_excel(file_path, index=False)
-            return
-        if format_file == ".json":
-            df.to_json(file_path, index=False, indent=4, orient='records', date_format='iso')
+        # jobs may still be adding rows, the export writes the rows of the moment
+        store = WindowTable.store.snapshot()
+        total = len(store)
+        try:
+            if format_file in (".xml", ".json"):
+                df = store.frame()
+                if format_file == ".xml":
+                    df.to_xml(file_path, index=False)
+                else:
+                    df.to_json(file_path, index=False, indent=4, orient='records', date_format='iso')
+            else:
+                # columnar and row formats are written in batches, with constant memory
+                with RecordWriter.open(str(file_path), store.columns) as writer:
+                    for start in range(0, total, EXPORT_BATCH_SIZE):
+                        writer.write_frame(store.rows(start, start + EXPORT_BATCH_SIZE))
+                        dpg.set_value(EXPORT_PROGRESS_TAG, f"Exporting {writer.count}/{total} rows...")
+            dpg.set_value(EXPORT_PROGRESS_TAG, f"{total} rows exported to {file_path.name}")
+        except Exception as e:
+            dpg.set_value(EXPORT_PROGRESS_TAG, f"Error on exporting {file_path.name}: {e}")
+            if DEBUG:
+                raise e
+        finally:
+            dpg.enable_item("export_file")
 
     @classmethod
     def __apply_entity_method(cls, sender: int, app_data: dict, user_data: dict) -> None:
         class_name = user_data["class"]
         method_name = user_data["method"]
         args = user_data["args"]
-        from multiprocessing import Manager
-        with Manager() as m:
-            try:
-                q = m.Queue()
-                # start scraping and open a log window
-                a = {arg.name: arg.type(dpg.get_value(f"{class_name.__name__}_{method_name}_{arg.name}")) for arg in args}
-                WindowLog(q)
-                obj = class_name()
-                df = getattr(obj, method_name)(**a,queue=q)
+        # queue the job and open its log window, the gui stays responsive while it runs
+        a = {arg.name: arg.type(dpg.get_value(f"{class_name.__name__}_{method_name}_{arg.name}")) for arg in args}
+        q = Queue()
+        job = JobRunner.submit(class_name, method_name, queue=q, **a)
+        WindowLog(q, job)
+        cls.__add_job(job)
+        for arg in args:
+            dpg.set_value(f"{class_name.__name__}_{method_name}_{arg.name}", "")
+
+    @classmethod
+    def __add_job(cls, job: Job) -> None:
+        with dpg.group(horizontal=True, parent=JOBS_GROUP_TAG):
+            dpg.add_button(label="Cancel", tag=f"job_{job.id}_cancel", callback=lambda: job.cancel())
+            dpg.bind_item_theme(dpg.last_item(), "alert_button_theme")
+            dpg.add_text(f"#{job.id} {job.name}: {job.state}", tag=f"job_{job.id}_progress")
+        with cls.__jobs_lock:
+            cls.__jobs.append(job)
+            if not cls.__monitor:
+                cls.__monitor = Thread(target=cls.__monitor_jobs, daemon=True)
+                cls.__monitor.start()
+
+    @classmethod
+    def __monitor_jobs(cls) -> None:
+        """
+        move the records of the running jobs to the table and refresh their progress, until all of them are over.
+        """
+        while True:
+            time.sleep(JOB_POLL_SECONDS)
+            with cls.__jobs_lock:
+                jobs = list(cls.__jobs)
+            for job in jobs:
+                # read the state first, so the records taken afterwards are the last ones of a completed job
+                done = job.done
+                df = job.take()
                 if not df.empty:
                     WindowTable.add_rows(df)
-                for arg in args:
-                    dpg.set_value(f"{class_name.__name__}_{method_name}_{arg.name}", "")
-            except Exception as e:
-                message = f"\n\nError!"
-                if DEBUG:
-                    message += f" - {e}\n\n"
-                    raise e
-                q.put(message)
-            dispatcher.send(SIGNAL_SCRAPING_COMPLETED, cls, event=None)
+                dpg.set_value(f"job_{job.id}_progress", f"#{job.id} {job.name}: {job.state} {job.progress}")
+                if done:
+                    if job.error:
+                        message = f"\n\nError!"
+                        if DEBUG:
+                            message += f" - {job.error}\n\n"
+                        job.queue.put(message)
+                    dpg.disable_item(f"job_{job.id}_cancel")
+                    with cls.__jobs_lock:
+                        cls.__jobs.remove(job)
+                    dispatcher.send(SIGNAL_SCRAPING_COMPLETED, job, event=None)
+            with cls.__jobs_lock:
+                if not cls.__jobs:
+                    cls.__monitor = None
+                    return
 
     @classmethod
     def __added_row_table(cls, row: object) -> None:
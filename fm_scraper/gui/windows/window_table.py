@@ -1,24 +1,40 @@
+import math
 import dearpygui.dearpygui as dpg
 import pandas as pd
 from pydispatch import dispatcher
+from fm_scraper.core import RecordStore
 from fm_scraper.gui.components import Modal
 from fm_scraper.gui.settings import (
     SIGNAL_TABLE_LOADED_DATA,
     SIGNAL_TABLE_EMPTY,
+    TABLE_PAGE_LABEL_TAG,
+    TABLE_PAGE_SIZE,
     TABLE_TAG,
     WINDOW_TABLE_TAG
 )
 
 
 class WindowTable:
-    df = pd.DataFrame()
+    """
+    paged view of the scraped rows, kept in a chunked store: only the rows of the current page are rendered, the
+    details of a row are built when it is selected.
+    """
+    store = RecordStore()
     __headers = ["type", "club", "last_name", "first_name", "date_of_birth"]
+    __page = 0
 
     def __init__(self) -> None:
         with dpg.group(label="Table"):
             with dpg.child_window(height=-1, width=-1, label="Table", tag=WINDOW_TABLE_TAG):
                 dpg.add_spacer(height=5)
+                with dpg.group(horizontal=True):
+                    dpg.add_button(label="<<", callback=lambda: self.show_page(0))
+                    dpg.add_button(label="<", callback=lambda: self.show_page(self.__page - 1))
+                    dpg.add_text(tag=TABLE_PAGE_LABEL_TAG)
+                    dpg.add_button(label=">", callback=lambda: self.show_page(self.__page + 1))
+                    dpg.add_button(label=">>", callback=lambda: self.show_page(self.__get_pages() - 1))
                 self.create_table()
+                self.show_page(0)
 
     @classmethod
     def create_table(cls) -> None:
@@ -35,21 +51,44 @@ class WindowTable:
 
     @classmethod
     def add_rows(cls, rows: pd.DataFrame) -> None:
-        for index, row in rows.iterrows():
-            with dpg.table_row(parent=TABLE_TAG):
-                for column in [c for c in cls.__headers if c in row]:
-                    dpg.add_selectable(label=f"{row[column]}", span_columns=True, callback=RowTable.show_row, user_data=row)
-        cls.df = pd.concat([cls.df, rows])
-        if not cls.df.empty:
+        cls.store.append(rows)
+        cls.show_page(cls.__page)
+        if not cls.store.empty:
             dispatcher.send(SIGNAL_TABLE_LOADED_DATA, dpg.last_item(), row=None)
 
+    @classmethod
+    def show_page(cls, page: int) -> None:
+        """
+        render the rows of the given page, replacing the ones on screen.
+        """
+        cls.__page = max(0, min(page, cls.__get_pages() - 1))
+        dpg.delete_item(TABLE_TAG, children_only=True, slot=1)
+        start = cls.__page * TABLE_PAGE_SIZE
+        page_rows = cls.store.rows(start, start + TABLE_PAGE_SIZE)
+        columns = [c for c in cls.__headers if c in page_rows.columns]
+        for index, values in zip(range(start, start + len(page_rows)), page_rows[columns].itertuples(index=False)):
+            with dpg.table_row(parent=TABLE_TAG):
+                for value in values:
+                    dpg.add_selectable(label=f"{value}", span_columns=True, callback=RowTable.show_row,
+                                       user_data=index)
+        dpg.set_value(TABLE_PAGE_LABEL_TAG, f"page {cls.__page + 1} of {cls.__get_pages()} ({len(cls.store)} rows)")
+
+    @classmethod
+    def get_row(cls, index: int) -> pd.Series:
+        return cls.store.row(index)
+
     @classmethod
     def clear_table(cls) -> None:
-        cls.entities = pd.DataFrame()
+        cls.store.clear()
         dpg.delete_item(TABLE_TAG)
         cls.create_table()
+        cls.show_page(0)
         dispatcher.send(SIGNAL_TABLE_EMPTY, dpg.last_item())
 
+    @classmethod
+    def __get_pages(cls) -> int:
+        return max(1, math.ceil(len(cls.store) / TABLE_PAGE_SIZE))
+
 
 class RowTable(Modal):
 
@@ -59,13 +98,14 @@ class RowTable(Modal):
     def show_row(cls, sender, app_data, user_data) -> None:
         if cls.__latest_window and dpg.does_alias_exist(cls.__latest_window):
             dpg.delete_item(cls.__latest_window)
+        row = WindowTable.get_row(user_data)
         with dpg.mutex():
-            tag = f"row_tooltip_{user_data['tag']}"
+            tag = f"row_tooltip_{user_data}"
             with dpg.window(width=400, height=400, tag=tag):
                 with dpg.table(header_row=False, row_background=True):
                     dpg.add_table_column()
                     dpg.add_table_column()
-                    for k, v in user_data.items():
+                    for k, v in row.items():
                         with dpg.table_row():
                             dpg.add_text(k)
                             dpg.add_text(v)
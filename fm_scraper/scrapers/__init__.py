@@ -1,2 +1,4 @@
 from .transfermarkt import TransfermarktScraper
 from .tuttocampo import TuttocampoScraper
+from .record_writers import RecordWriter
+from .job_runner import Job, JobRunner
@@ -1,11 +1,34 @@
+import contextvars
+import pandas as pd
+import threading
 from abc import ABC
 from bs4 import Tag
-from fm_scraper.core import BaseRequest
-from .settings import DEBUG
+from queue import Empty, Full, Queue
+from typing import Callable, Iterator, List
+from fm_scraper.core import BaseRequest, CrawlJournal, Dedup, Metrics, ResponseCache
+from fm_scraper.fillers import Enrichment
+from .record_writers import RecordWriter
+from .settings import DEBUG, METRICS_PATH, STREAM_BUFFER_SIZE
+
+
+class _StreamClosed(Exception):
+    pass
 
 
 class BaseScraper(ABC, BaseRequest):
 
+    # fixed schema of the scraped records
+    _columns = [
+        "entity", "type", "first_name", "last_name", "date_of_birth", "citizenship", "club", "job", "squad_number",
+        "height", "weight", "left_foot", "right_foot", "date_joined", "contract_expires", "loan_to", "loan_start",
+        "loan_end", "goalkeeper", "defender_left", "defender_central", "defender_right", "wing_back_left",
+        "wing_back_right", "defensive_midfielder", "midfielder_left", "midfielder_central", "midfielder_right",
+        "attacking_midfielder_left", "attacking_midfielder_central", "attacking_midfielder_right", "striker",
+        "db_unique_id"
+    ]
+    # journals opened by the running job from its job_id, closed with it
+    __job_journals = contextvars.ContextVar("fm_scraper_job_journals", default=None)
+
     @staticmethod
     def _send_message(text: str, queue) -> None:
         if DEBUG:
@@ -13,6 +36,218 @@ class BaseScraper(ABC, BaseRequest):
         if queue:
             queue.put(text)
 
+    @classmethod
+    def _to_dataframe(cls, records: List[dict]) -> pd.DataFrame:
+        """
+        build a single dataframe from the scraped records, keeping unexpected fields after the fixed schema.
+        """
+        extra = [k for k in dict.fromkeys(k for r in records for k in r) if k not in cls._columns]
+        return pd.DataFrame.from_records(records, columns=cls._columns + extra)
+
+    @classmethod
+    def stream_division(cls, division_url: str, job_id: str = None, **kwargs) -> Iterator[dict]:
+        """
+        yield the records of the division as soon as each person is completed.
+        :param division_url: url of the division
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
+        :return:
+        """
+        return cls._stream(cls.extract_division_async, division_url, job_id=job_id, **kwargs)
+
+    @classmethod
+    def stream_team(cls, team_url: str, job_id: str = None, **kwargs) -> Iterator[dict]:
+        """
+        yield the records of the team as soon as each person is completed.
+        :param team_url: url of the team
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
+        :return:
+        """
+        return cls._stream(cls.extract_team_async, team_url, job_id=job_id, **kwargs)
+
+    @classmethod
+    def stream_person(cls, person_url: str, job_id: str = None, **kwargs) -> Iterator[dict]:
+        """
+        yield the record of the person once completed.
+        :param person_url: url of the person
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
+        :return:
+        """
+        return cls._stream(cls.extract_person_async, person_url, job_id=job_id, **kwargs)
+
+    @classmethod
+    def open_writer(cls, path: str, **kwargs) -> RecordWriter:
+        """
+        incremental writer with the schema of the scraped records, the format is chosen by the extension of the path.
+        """
+        return RecordWriter.open(path, cls._columns, **kwargs)
+
+    @classmethod
+    def _stream(cls, method: Callable, url: str, **kwargs) -> Iterator[dict]:
+        """
+        run the crawl on a background thread and yield its records through a bounded buffer: when the consumer is
+        slower than the crawl, the crawl waits. Closing the generator stops the crawl.
+        """
+        records = Queue(maxsize=STREAM_BUFFER_SIZE)
+        closed = threading.Event()
+        done = object()
+
+        def sink(record: dict) -> None:
+            while not closed.is_set():
+                try:
+                    records.put(record, timeout=0.1)
+                    return
+                except Full:
+                    continue
+            raise _StreamClosed()
+
+        def run() -> None:
+            error = None
+            try:
+                cls._run_job(method(url, sink=sink, **kwargs), kwargs.get("queue"))
+            except _StreamClosed:
+                pass
+            except Exception as e:
+                error = e
+            while not closed.is_set():
+                try:
+                    records.put(error or done, timeout=0.1)
+                    return
+                except Full:
+                    continue
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        try:
+            while True:
+                try:
+                    item = records.get(timeout=0.1)
+                except Empty:
+                    if not worker.is_alive():
+                        return
+                    continue
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            closed.set()
+
+    @classmethod
+    def _run_job(cls, coroutine, queue=None) -> any:
+        """
+        run a whole scraping job on a new event loop, see _run_job_async.
+        """
+        return cls._run_async(cls._run_job_async(coroutine, queue))
+
+    @classmethod
+    async def _run_job_async(cls, coroutine, queue=None) -> any:
+        """
+        run a whole scraping job with the enrichment of its records, then send the summary of its metrics and export
+        them to METRICS_PATH if set. The journals opened by the job from its job_id are closed at the end, a journal
+        passed by the caller is left open.
+        """
+        start = Metrics.snapshot()
+        journals = list()
+        cls.__job_journals.set(journals)
+        if ResponseCache.offline:
+            cls._send_message("\nOffline: only cached pages are used, whatever their age\n", queue)
+        elif ResponseCache.enabled:
+            cls._send_message("\nUsing cached pages, they can be some days old (see CACHE_TTL)\n", queue)
+        try:
+            try:
+                result = await coroutine
+            except BaseException:
+                # the loop may outlive the job, its queued records are not filled anymore
+                Enrichment.cancel()
+                raise
+            # the records still queued to the fillers are part of the job
+            await Enrichment.close()
+            return result
+        finally:
+            # the fillers complete the records in the journal until Enrichment.close(), it is closed only afterwards
+            for journal in journals:
+                journal.close()
+            cls._send_message(f"\n{Metrics.summary(start)}\n", queue)
+            if METRICS_PATH:
+                Metrics.export(METRICS_PATH, start)
+
+    @classmethod
+    def _report_missing(cls, url: str, queue) -> None:
+        """
+        tell that the page of url is skipped: not cached in offline mode, every fetch failed otherwise.
+        """
+        reason = "not cached" if ResponseCache.offline else "could not be fetched"
+        cls._send_message(f"\n{url} skipped: {reason}", queue)
+
+    @classmethod
+    def _enrich(cls, person_url: str, record: dict | None, kwargs: dict, journal: CrawlJournal = None) -> None:
+        """
+        queue a scraped person to the enrichment stage, it is stored, reported and emitted once filled.
+        """
+        if record:
+            Enrichment.submit(record, lambda r: cls._complete_person(person_url, r, kwargs, journal),
+                              kwargs.get("parent"))
+        else:
+            cls._complete_person(person_url, record, kwargs)
+
+    @classmethod
+    def _complete_person(cls, person_url: str, record: dict | None, kwargs: dict, journal: CrawlJournal = None) -> None:
+        if journal and record:
+            journal.complete(person_url, "person", [record], kwargs.get("parent"))
+        message = f"\n{record.get('first_name')} {record.get('last_name')} ({record.get('type')}) completed!" if record else f"\nError on scraping this person {person_url}"
+        cls._send_message(message, kwargs.get("queue"))
+        cls._emit(record, kwargs)
+        cls._complete("person", kwargs)
+
+    @staticmethod
+    def _emit(record: dict | None, kwargs: dict) -> None:
+        if record and kwargs.get("sink"):
+            kwargs["sink"](record)
+
+    @classmethod
+    def _seen(cls, kind: str, url: str, kwargs: dict) -> bool:
+        """
+        True if the url was already found in this crawl, e.g. a loaned player or a member of the staff of several
+        teams: it is counted as completed but neither scraped nor emitted again.
+        """
+        if Dedup.first((kind, url), kind):
+            return False
+        cls._complete(kind, kwargs)
+        return True
+
+    @staticmethod
+    def _discover(kind: str, count: int, kwargs: dict) -> None:
+        """
+        report to the progress of the job that count items of the given kind (team, person) are going to be scraped.
+        """
+        if count and kwargs.get("progress"):
+            kwargs["progress"].discover(kind, count)
+
+    @staticmethod
+    def _complete(kind: str, kwargs: dict, count: int = 1) -> None:
+        if count and kwargs.get("progress"):
+            kwargs["progress"].complete(kind, count)
+
+    @staticmethod
+    def _collect(records: List[dict | None], kwargs: dict) -> List[dict]:
+        """
+        records to hand back to the caller: nothing when they are streamed to a sink.
+        """
+        return list() if kwargs.get("sink") else [r for r in records if r]
+
+    @classmethod
+    def _get_journal(cls, kwargs: dict) -> CrawlJournal | None:
+        if kwargs.get("journal"):
+            return kwargs["journal"]
+        if kwargs.get("job_id"):
+            journal = CrawlJournal(kwargs["job_id"])
+            journals = cls.__job_journals.get()
+            if journals is not None:
+                journals.append(journal)
+            return journal
+        return None
+
     @staticmethod
     def _safe_extract_text(tag: Tag) -> str | None:
         if tag and tag.text:
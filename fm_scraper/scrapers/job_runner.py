@@ -0,0 +1,203 @@
+import asyncio
+import pandas as pd
+import threading
+from concurrent.futures import Future
+from itertools import count
+from typing import List, Type
+from fm_scraper.core import AsyncBrowserPool, AsyncHttpPool, CrawlContext
+from .base_scraper import BaseScraper
+from .settings import JOB_WORKERS
+
+
+class JobProgress:
+    """
+    items of a job by kind (team, person): how many were found so far and how many are completed.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__total = dict()
+        self.__done = dict()
+
+    def discover(self, kind: str, count: int = 1) -> None:
+        with self.__lock:
+            self.__total[kind] = self.__total.get(kind, 0) + count
+
+    def complete(self, kind: str, count: int = 1) -> None:
+        with self.__lock:
+            self.__done[kind] = self.__done.get(kind, 0) + count
+
+    def counts(self) -> dict:
+        """
+        :return: {kind: (done, total)}
+        """
+        with self.__lock:
+            kinds = dict.fromkeys([*self.__total, *self.__done])
+            return {k: (self.__done.get(k, 0), max(self.__total.get(k, 0), self.__done.get(k, 0))) for k in kinds}
+
+    def __str__(self) -> str:
+        return ", ".join(f"{kind}s {done}/{total}" for kind, (done, total) in self.counts().items())
+
+
+class Job:
+    """
+    handle of a scraping job submitted to the JobRunner. The records scraped so far are taken with take(), the job
+    can be cancelled while it is queued or running.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id: int, scraper: Type[BaseScraper], method: str, arguments: dict, queue=None) -> None:
+        self.id = job_id
+        self.scraper = scraper
+        self.method = method
+        self.arguments = arguments
+        self.queue = queue
+        self.state = Job.QUEUED
+        self.error = None
+        self.progress = JobProgress()
+        self.future: Future | None = None
+        self.__records = list()
+        self.__lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return f"{self.scraper.__name__}.{self.method}"
+
+    @property
+    def done(self) -> bool:
+        return self.state in (Job.COMPLETED, Job.FAILED, Job.CANCELLED)
+
+    def cancel(self) -> None:
+        """
+        drop the job if still queued, otherwise cancel its crawl: the records already scraped are kept.
+        """
+        if self.future:
+            self.future.cancel()
+
+    def take(self) -> pd.DataFrame:
+        """
+        records scraped since the previous call.
+        """
+        with self.__lock:
+            records, self.__records = self.__records, list()
+        return self.scraper._to_dataframe(records)
+
+    async def _run(self, slots: asyncio.Semaphore) -> None:
+        """
+        run the job once one of the slots of the runner is free.
+        """
+        async with slots:
+            self.state = Job.RUNNING
+            # the urls seen and the records enriched are kept apart from the other jobs of the loop
+            CrawlContext.enter(self.id)
+            kind = self.method.split("_")[-1]
+            if kind in ("team", "person"):
+                self.progress.discover(kind)
+            method = getattr(self.scraper, f"{self.method}_async")
+            try:
+                await self.scraper._run_job_async(
+                    method(**self.arguments, queue=self.queue, sink=self.__add, progress=self.progress), self.queue
+                )
+                self.state = Job.COMPLETED
+            except asyncio.CancelledError:
+                self.state = Job.CANCELLED
+                raise
+            except Exception as e:
+                self.error = e
+                self.state = Job.FAILED
+
+    def _finish(self, future: Future) -> None:
+        # a job cancelled before it started never ran
+        if not self.done:
+            self.state = Job.CANCELLED if future.cancelled() else Job.FAILED
+
+    def __add(self, record: dict) -> None:
+        with self.__lock:
+            self.__records.append(record)
+
+
+class JobRunner:
+    """
+    runs scraping jobs in the background, on a single event loop living in its own thread. At most JOB_WORKERS jobs
+    run at the same time, and all of them share the scheduler slots, rate limits, browser contexts and connection
+    pools of the loop, so parallel jobs do not multiply the load on a host.
+    """
+
+    workers = JOB_WORKERS
+    jobs: List[Job] = list()
+    __loop = None
+    __thread = None
+    __slots = None
+    __ids = count(1)
+    __lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, workers: int = None) -> None:
+        """
+        change the number of jobs running at the same time, applies to the jobs submitted afterwards.
+        """
+        with cls.__lock:
+            if workers:
+                cls.workers = workers
+            cls.__slots = None
+
+    @classmethod
+    def submit(cls, scraper: Type[BaseScraper], method: str, queue=None, **arguments) -> Job:
+        """
+        queue a job running method (e.g. extract_division) of the scraper with the given arguments.
+        """
+        with cls.__lock:
+            if cls.__loop is None:
+                cls.__loop = asyncio.new_event_loop()
+                cls.__thread = threading.Thread(target=cls.__loop.run_forever, name="fm_scraper_jobs", daemon=True)
+                cls.__thread.start()
+            if cls.__slots is None:
+                cls.__slots = asyncio.Semaphore(cls.workers)
+            job = Job(next(cls.__ids), scraper, method, arguments, queue)
+            job.future = asyncio.run_coroutine_threadsafe(job._run(cls.__slots), cls.__loop)
+            job.future.add_done_callback(job._finish)
+            cls.jobs.append(job)
+        return job
+
+    @classmethod
+    def active(cls) -> List[Job]:
+        return [j for j in cls.jobs if not j.done]
+
+    @classmethod
+    def cancel_all(cls) -> None:
+        for job in cls.active():
+            job.cancel()
+
+    @classmethod
+    def shutdown(cls, timeout: float = 30) -> None:
+        """
+        cancel the jobs, close the browsers and http clients of the loop and stop it.
+        """
+        cls.cancel_all()
+        with cls.__lock:
+            loop, thread = cls.__loop, cls.__thread
+            cls.__loop, cls.__thread, cls.__slots = None, None, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(cls.__close(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+
+    @staticmethod
+    async def __close() -> None:
+        # the cancelled jobs and the enrichment workers unwind before the browsers are closed
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await AsyncBrowserPool.close()
+        await AsyncHttpPool.close()
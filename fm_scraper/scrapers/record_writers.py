@@ -0,0 +1,218 @@
+import csv
+import json
+import os
+import pandas as pd
+from abc import ABC, abstractmethod
+from typing import Iterable, List
+from .settings import PARQUET_ROW_GROUP_SIZE
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    ipc = None
+    pq = None
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+
+class RecordWriter(ABC):
+    """
+    incremental sink for scraped records: every record is written as soon as it is received, so a crawl of any
+    size runs in bounded memory. Writers are context managers and can be passed as sink of the extract methods,
+    e.g. TransfermarktScraper.extract_division_async(url, sink=writer.write).
+    """
+
+    def __init__(self, path: str, columns: List[str]) -> None:
+        self.path = path
+        self.columns = columns
+        self.count = 0
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    def open(path: str, columns: List[str], **kwargs) -> "RecordWriter":
+        """
+        writer matching the extension of the path (.csv, .jsonl, .parquet, .feather, .arrow, .xlsx).
+        """
+        extension = os.path.splitext(path)[1].lower()
+        writers = {".csv": CsvRecordWriter, ".jsonl": JsonlRecordWriter, ".parquet": ParquetRecordWriter,
+                   ".feather": FeatherRecordWriter, ".arrow": FeatherRecordWriter, ".xlsx": XlsxRecordWriter}
+        if extension not in writers:
+            raise ValueError(f"Unsupported file extension {extension}, use one of {', '.join(writers)}")
+        return writers[extension](path, columns, **kwargs)
+
+    def write(self, record: dict) -> None:
+        self._write(record)
+        self.count += 1
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def write_frame(self, df: pd.DataFrame) -> int:
+        """
+        write the rows of a dataframe, missing values are written as empty.
+        """
+        return self.write_all(df.astype(object).where(df.notna(), None).to_dict("records"))
+
+    @abstractmethod
+    def _write(self, record: dict) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class CsvRecordWriter(RecordWriter):
+    """
+    one row per record with the fixed schema as header, fields outside the schema are dropped.
+    """
+
+    def __init__(self, path: str, columns: List[str]) -> None:
+        super().__init__(path, columns)
+        self.__file = open(path, "w", newline="", encoding="utf-8")
+        self.__writer = csv.DictWriter(self.__file, fieldnames=columns, extrasaction="ignore")
+        self.__writer.writeheader()
+
+    def _write(self, record: dict) -> None:
+        self.__writer.writerow(record)
+        self.__file.flush()
+
+    def close(self) -> None:
+        if not self.__file.closed:
+            self.__file.close()
+
+
+class JsonlRecordWriter(RecordWriter):
+    """
+    one json object per line, fields outside the schema are kept.
+    """
+
+    def __init__(self, path: str, columns: List[str]) -> None:
+        super().__init__(path, columns)
+        self.__file = open(path, "w", encoding="utf-8")
+
+    def _write(self, record: dict) -> None:
+        self.__file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.__file.flush()
+
+    def close(self) -> None:
+        if not self.__file.closed:
+            self.__file.close()
+
+
+class _ArrowRecordWriter(RecordWriter):
+    """
+    buffers up to row_group_size records and writes them as a single arrow batch.
+    Ratings (feet and positions) are stored as integers, any other column as string.
+    """
+
+    __int_columns = ("left_foot", "right_foot", "goalkeeper", "defender_left", "defender_central", "defender_right",
+                     "wing_back_left", "wing_back_right", "defensive_midfielder", "midfielder_left",
+                     "midfielder_central", "midfielder_right", "attacking_midfielder_left",
+                     "attacking_midfielder_central", "attacking_midfielder_right", "striker")
+
+    def __init__(self, path: str, columns: List[str], row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> None:
+        if pa is None:
+            raise ImportError(f"pyarrow is required to write {os.path.splitext(path)[1]} files")
+        super().__init__(path, columns)
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([(c, pa.int64() if c in self.__int_columns else pa.string()) for c in columns])
+        self.__buffer = list()
+
+    def _write(self, record: dict) -> None:
+        self.__buffer.append(record)
+        if len(self.__buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.__buffer:
+            return
+        data = {c: [self.__convert(c, r.get(c)) for r in self.__buffer] for c in self.columns}
+        self._write_table(pa.Table.from_pydict(data, schema=self.schema))
+        self.__buffer = list()
+
+    @abstractmethod
+    def _write_table(self, table: "pa.Table") -> None:
+        pass
+
+    def __convert(self, column: str, value) -> int | str | None:
+        if value is None:
+            return None
+        if column in self.__int_columns:
+            return int(value)
+        return str(value)
+
+
+class ParquetRecordWriter(_ArrowRecordWriter):
+    """
+    every batch is a parquet row group.
+    """
+
+    def __init__(self, path: str, columns: List[str], row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> None:
+        super().__init__(path, columns, row_group_size)
+        self.__writer = pq.ParquetWriter(path, self.schema)
+
+    def _write_table(self, table: "pa.Table") -> None:
+        self.__writer.write_table(table)
+
+    def close(self) -> None:
+        if self.__writer:
+            self.flush()
+            self.__writer.close()
+            self.__writer = None
+
+
+class FeatherRecordWriter(_ArrowRecordWriter):
+    """
+    feather (v2) file, i.e. an arrow ipc file with a record batch per batch of records.
+    """
+
+    def __init__(self, path: str, columns: List[str], row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> None:
+        super().__init__(path, columns, row_group_size)
+        self.__writer = ipc.new_file(path, self.schema)
+
+    def _write_table(self, table: "pa.Table") -> None:
+        self.__writer.write_table(table)
+
+    def close(self) -> None:
+        if self.__writer:
+            self.flush()
+            self.__writer.close()
+            self.__writer = None
+
+
+class XlsxRecordWriter(RecordWriter):
+    """
+    excel sheet written in write-only mode: rows are streamed to disk instead of being kept in the workbook.
+    """
+
+    def __init__(self, path: str, columns: List[str]) -> None:
+        if Workbook is None:
+            raise ImportError("openpyxl is required to write xlsx files")
+        super().__init__(path, columns)
+        self.__workbook = Workbook(write_only=True)
+        self.__sheet = self.__workbook.create_sheet()
+        self.__sheet.append(columns)
+
+    def _write(self, record: dict) -> None:
+        self.__sheet.append([self.__convert(record.get(c)) for c in self.columns])
+
+    def close(self) -> None:
+        if self.__workbook:
+            self.__workbook.save(self.path)
+            self.__workbook = None
+
+    @staticmethod
+    def __convert(value) -> any:
+        return value if value is None or isinstance(value, (int, float, str)) else str(value)
@@ -7,3 +7,105 @@ NUM_PROCESSORS = int(cpu_num/3) if cpu_num > 3 else 1
 MAX_THREAD_WORKERS = 5
 MAX_RETRIES = 20
 MAX_WAIT_SECONDS = 25
+MAX_BROWSER_CONTEXTS = 5
+MAX_ASYNC_BROWSER_CONTEXTS = 10
+MAX_PAGES_PER_CONTEXT = 50
+MAX_PAGES_PER_BROWSER = 500
+READY_TIMEOUT_SECONDS = 15
+READY_MAX_RELOADS = 2
+# resource types aborted by the browser pages, by host of the page
+BLOCKED_RESOURCES_DEFAULT = ("image", "media", "font")
+BLOCKED_RESOURCES = {
+    "www.tuttocampo.it": ("image", "media", "font", "stylesheet"),
+    "fmtransferupdate.com": ("image", "media", "font", "stylesheet"),
+}
+# ad and analytics hosts, blocked on every page
+BLOCKED_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adnxs.com", "amazon-adsystem.com", "criteo.com",
+    "criteo.net", "taboola.com", "outbrain.com", "scorecardresearch.com", "quantserve.com", "facebook.net",
+    "hotjar.com", "teads.tv", "rubiconproject.com", "pubmatic.com", "casalemedia.com",
+)
+# load state ("commit", "domcontentloaded", "load", "networkidle") or css selector waited for by the browser fetches.
+# The content of tuttocampo and fmtransferupdate is rendered client side: their fetches wait for the blocks read by
+# the scrapers (division ranking, squad and staff tables, search results, person card), at most READY_TIMEOUT_SECONDS
+WAIT_UNTIL_DEFAULT = "load"
+WAIT_UNTIL = {
+    "www.tuttocampo.it": "#last_match_ranking, table.tc-table, table.tc-table-slim, #team_staff",
+    "fmtransferupdate.com": "#fmtu-content-pane, [itemscope]",
+}
+HTTP_POOL_DEFAULT_SIZE = MAX_THREAD_WORKERS
+HTTP_POOL_SIZES = {
+    "www.transfermarkt.com": MAX_THREAD_WORKERS * 2,
+    "fminside.net": MAX_THREAD_WORKERS,
+}
+HTTP2_ENABLED = False
+# cached pages can be as old as their CACHE_TTL, so the cache is opt-in
+CACHE_ENABLED = False
+CACHE_OFFLINE = False
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".fm_scraper", "cache")
+CACHE_MAX_BYTES = 1024 * 1024 * 1024
+CACHE_DEFAULT_TTL = 24 * 60 * 60
+CACHE_TTL = {
+    "www.transfermarkt.com": 3 * 24 * 60 * 60,
+    "www.tuttocampo.it": 3 * 24 * 60 * 60,
+    "fminside.net": 7 * 24 * 60 * 60,
+    "fmtransferupdate.com": 7 * 24 * 60 * 60,
+}
+RATE_LIMIT_DEFAULT = (2.0, 5)
+RATE_LIMITS = {
+    "www.transfermarkt.com": (2.0, 5),
+    "www.tuttocampo.it": (2.0, 5),
+    "fminside.net": (1.0, 3),
+    "fmtransferupdate.com": (1.0, 3),
+}
+THROTTLE_STATUS_CODES = (429, 503)
+BACKOFF_BASE_SECONDS = 1
+JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".fm_scraper", "journal.sqlite")
+ENRICHMENT_CACHE_ENABLED = True
+ENRICHMENT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".fm_scraper", "enrichment.sqlite")
+ENRICHMENT_CACHE_TTL = 30 * 24 * 60 * 60
+ENRICHMENT_NEGATIVE_TTL = 7 * 24 * 60 * 60
+ENRICHMENT_MODE = "pipeline"
+ENRICHMENT_WORKERS = {
+    "FMInsideFiller": 4,
+    "FMTransferUpdateFiller": 4,
+}
+FMINSIDE_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".fm_scraper", "fminside_index.json.gz")
+FMINSIDE_INDEX_PAGE_URL = "https://fminside.net/players?page={page}"
+FMINSIDE_INDEX_TTL = 180 * 24 * 60 * 60
+HTML_PARSER = "lxml"
+PARTIAL_PARSING = True
+STREAM_BUFFER_SIZE = 1000
+PARQUET_ROW_GROUP_SIZE = 5000
+TASK_LIMITS = {
+    "team": 4,
+    "squad": 4,
+    "staff": 4,
+    "person": 20,
+    "enrichment": 10,
+}
+HOST_CONCURRENCY_DEFAULT = MAX_THREAD_WORKERS
+HOST_CONCURRENCY = {
+    "www.transfermarkt.com": MAX_THREAD_WORKERS * 2,
+    "www.tuttocampo.it": MAX_ASYNC_BROWSER_CONTEXTS,
+    "fminside.net": MAX_THREAD_WORKERS,
+    "fmtransferupdate.com": MAX_THREAD_WORKERS,
+}
+METRICS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS_PATH = None
+JOB_WORKERS = 2
+# pages fetched with the browser are tried over plain http first, the http response is used when it contains one of
+# the markers of its url pattern. Markers belong to the data blocks read by the scrapers, not to the page shell
+CONTENT_MARKERS = {
+    "tuttocampo_division": ('id="last_match_ranking"',),
+    "tuttocampo_team": ('class="tc-table',),
+    "tuttocampo_staff": ('id="team_staff"',),
+    "tuttocampo_squad": ('class="tc-table',),
+    "tuttocampo_person": ('class="tc-table-slim',),
+    "fmtransferupdate_search": ('id="fmtu-content-pane"',),
+    "fmtransferupdate_person": ('itemprop="birthDate"',),
+    "fminside_index": ('id="player_table"',),
+}
+STRATEGY_PATH = os.path.join(os.path.expanduser("~"), ".fm_scraper", "fetch_strategies.json")
+STRATEGY_PROBE_INTERVAL = 100
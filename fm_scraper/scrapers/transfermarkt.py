@@ -1,15 +1,15 @@
+import asyncio
 import Levenshtein
 import pandas as pd
 import random
 import re
 from bs4 import BeautifulSoup, Tag
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
-from functools import partial
+from typing import List
 from urllib.parse import urljoin, urlparse
-from fm_scraper.fillers import FMInsideFiller, FMTransferUpdateFiller
+from fm_scraper.core import HtmlParser, Scheduler
+from fm_scraper.fillers import Enrichment
 from .base_scraper import BaseScraper
-from .settings import MAX_THREAD_WORKERS, NUM_PROCESSORS
 
 
 class TransfermarktScraper(BaseScraper):
@@ -60,105 +60,197 @@ class TransfermarktScraper(BaseScraper):
 
     @classmethod
     def _send_get_request(cls, url: str, *args, **kwargs) -> str | None:
+        return super()._send_request(cls.__check_url(url), *args, **kwargs)
+
+    @classmethod
+    async def _send_get_request_async(cls, url: str, *args, **kwargs) -> str | None:
+        return await super()._send_request_async(cls.__check_url(url), *args, **kwargs)
+
+    @classmethod
+    def __check_url(cls, url: str) -> str:
         if not "https" in url:
             url = urljoin(cls.__base_url, url)
         parsed_url = urlparse(url)
         if not parsed_url.netloc == "www.transfermarkt.com":
             raise Exception(f"Please, give a correct url from transfermarkt english version")
-        return super()._send_request(url, *args, **kwargs)
+        return url
 
     @classmethod
-    def extract_division(cls, division_url: str, **kwargs) -> pd.DataFrame:
+    def extract_division(cls, division_url: str, job_id: str = None, **kwargs) -> pd.DataFrame:
         """
         extract the squad of all teams of the specified division.
         :param division_url: this url must be part of the domain transfermarkt.com and concern a division
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
         :return:
         """
+        return cls._to_dataframe(cls._run_job(cls.extract_division_async(division_url, job_id=job_id, **kwargs),
+                                              kwargs.get("queue")))
+
+    @classmethod
+    async def extract_division_async(cls, division_url: str, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
-        soup = BeautifulSoup(cls._send_get_request(division_url), cls._parser)
+        journal = cls._get_journal(kwargs)
+        content = await cls._send_get_request_async(division_url)
+        if content is None:
+            cls._report_missing(division_url, queue)
+            return list()
+        soup = HtmlParser.parse(content, "transfermarkt_division")
 
-        data = None
+        records = list()
         division_table = soup.find("div", attrs={"class":"grid-view"})
         if division_table:
             team_urls = list()
             for row in division_table.find_all("td",attrs={"class":"hauptlink no-border-links"}):
                 team_urls.append(row.find_next("a").get("href"))
             if team_urls:
-                # return pd.concat([cls.extract_team(t) for t in team_urls])
-                worker = partial(cls.extract_team, queue=queue)
-                with ProcessPoolExecutor(max_workers=NUM_PROCESSORS) as executor:
-                    data = list(executor.map(worker, team_urls))
+                cls._discover("team", len(team_urls), kwargs)
+                if journal:
+                    journal.discover(team_urls, "team", division_url)
+                teams = await Scheduler.map(
+                    "team",
+                    lambda t: cls.extract_team_async(t, queue=queue, journal=journal, sink=kwargs.get("sink"),
+                                                     progress=kwargs.get("progress")),
+                    team_urls
+                )
+                records = [r for team in teams for r in team]
 
         cls._send_message(f"\n{division_url} completed!", queue)
-        if data:
-            return pd.concat(data, axis=0)
-        return pd.DataFrame()
+        return records
 
     @classmethod
-    def extract_team(cls, team_url: str, **kwargs) -> pd.DataFrame:
+    def extract_team(cls, team_url: str, job_id: str = None, **kwargs) -> pd.DataFrame:
         """
         extract players and staff of the specified team.
         :param team_url: the url must be part of the domain transfermarkt.com and concern a team.
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
         :return:
         """
+        return cls._to_dataframe(cls._run_job(cls.extract_team_async(team_url, job_id=job_id, **kwargs),
+                                              kwargs.get("queue")))
+
+    @classmethod
+    async def extract_team_async(cls, team_url: str, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
-        soup = BeautifulSoup(cls._send_get_request(team_url), cls._parser)
+        if cls._seen("team", team_url, kwargs):
+            return list()
+        journal = cls._get_journal(kwargs)
+        if journal and journal.is_completed(team_url):
+            cls._send_message(f"\n\n{team_url} already completed!\n", queue)
+            records = journal.children_records(team_url)
+            cls._discover("person", len(records), kwargs)
+            for record in records:
+                cls._emit(record, kwargs)
+            cls._complete("person", kwargs, len(records))
+            cls._complete("team", kwargs)
+            return cls._collect(records, kwargs)
+        content = await cls._send_get_request_async(team_url)
+        if content is None:
+            cls._report_missing(team_url, queue)
+            cls._complete("team", kwargs)
+            return list()
+        soup = HtmlParser.parse(content, "transfermarkt_team")
         club_name = soup.find("h1", attrs={"class":"data-header__headline-wrapper data-header__headline-wrapper--oswald"})
-        dfs = list()
-        # extract squad
-        dfs.append(cls.__extract_squad(soup, queue=queue))
-        # extract staff
+        # extract squad and staff
+        tasks = [Scheduler.run("squad", cls.__extract_squad(soup, queue=queue, journal=journal, parent=team_url,
+                                                         sink=kwargs.get("sink"), progress=kwargs.get("progress")))]
         match = re.search(r'\d+', team_url)
         club_tfm_id = match.group() if match else None
         club_name_tfm = team_url.split("/")[3]
         if club_tfm_id and club_name_tfm:
-            dfs.append(cls.__extract_staff(club_name_tfm, club_tfm_id, queue=queue))
-        cls._send_message(f"\n\n{club_name.text.strip()} completed!\n", queue)
-        return pd.concat(dfs) if dfs else pd.DataFrame()
+            tasks.append(Scheduler.run("staff", cls.__extract_staff(club_name_tfm, club_tfm_id, queue=queue, journal=journal,
+                                                                parent=team_url, sink=kwargs.get("sink"),
+                                                                progress=kwargs.get("progress"))))
+        groups = await asyncio.gather(*tasks)
+        await Enrichment.wait(team_url)
+        if journal and not journal.pending_children(team_url):
+            journal.complete(team_url, "team")
+        cls._complete("team", kwargs)
+        cls._send_message(f"\n\n{club_name.text.strip() if club_name else team_url} completed!\n", queue)
+        return [r for group in groups for r in group]
 
     @classmethod
-    def __extract_staff(cls, club_name:str, club_id: str, **kwargs) -> pd.DataFrame:
+    async def __extract_staff(cls, club_name:str, club_id: str, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
-        soup = BeautifulSoup(cls._send_get_request(f"{club_name}/mitarbeiter/verein/{club_id}"), cls._parser)
-        if not soup:
-            return pd.DataFrame()
-        staff_urls = list()
+        journal = kwargs.get("journal")
+        parent = kwargs.get("parent")
+        staff_url = f"{club_name}/mitarbeiter/verein/{club_id}"
+        content = await cls._send_get_request_async(staff_url)
+        if content is None:
+            cls._report_missing(staff_url, queue)
+            return list()
+        soup = HtmlParser.parse(content, "transfermarkt_staff")
         staff_data = soup.find("div", attrs={"class":"large-8 columns"})
+        if not staff_data:
+            return list()
+        staff_urls = list()
         for box in staff_data.find_all("tbody"):
             staff_urls += [td.find("a").get("href") for td in box.find_all("td",attrs={"class":"hauptlink"})]
-        with ThreadPoolExecutor(max_workers=MAX_THREAD_WORKERS) as executor:
-            dfs = list(executor.map(lambda url: cls.extract_person(url, queue=queue), staff_urls))
-        return pd.concat(dfs) if dfs else pd.DataFrame()
+        cls._discover("person", len(staff_urls), kwargs)
+        if journal:
+            journal.discover(staff_urls, "person", parent)
+        records = await Scheduler.map(
+            "person",
+            lambda url: cls.extract_person_async(url, queue=queue, journal=journal, parent=parent, sink=kwargs.get("sink"),
+                                                 progress=kwargs.get("progress")),
+            staff_urls
+        )
+        return cls._collect(records, kwargs)
 
     @classmethod
-    def __extract_squad(cls, soup: BeautifulSoup, **kwargs) -> pd.DataFrame:
+    async def __extract_squad(cls, soup: BeautifulSoup, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
+        journal = kwargs.get("journal")
+        parent = kwargs.get("parent")
         roster_data = soup.find("table", attrs={"class":"items"})
         if not roster_data:
-            return pd.DataFrame()
+            return list()
         player_urls = [r.find("a",attrs={"title": None}).get("href") for r in roster_data.find("tbody").find_all("tr", recursive=False)]
-        with ThreadPoolExecutor(max_workers=MAX_THREAD_WORKERS) as executor:
-            dfs = list(executor.map(lambda url: cls.extract_person(url, queue=queue), player_urls))
-            return pd.concat(dfs) if dfs else pd.DataFrame()
+        cls._discover("person", len(player_urls), kwargs)
+        if journal:
+            journal.discover(player_urls, "person", parent)
+        records = await Scheduler.map(
+            "person",
+            lambda url: cls.extract_person_async(url, queue=queue, journal=journal, parent=parent, sink=kwargs.get("sink"),
+                                                 progress=kwargs.get("progress")),
+            player_urls
+        )
+        return cls._collect(records, kwargs)
 
     @classmethod
-    def extract_person(cls, person_url: str, **kwargs) -> pd.DataFrame:
+    def extract_person(cls, person_url: str, job_id: str = None, **kwargs) -> pd.DataFrame:
         """
         extract the info of the specified person.
         :param person_url: this url must be part of the domain transfermarkt.com and concern a person
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
         :return:
         """
-        queue = None if "queue" not in kwargs else kwargs["queue"]
-        soup = BeautifulSoup(cls._send_get_request(person_url), cls._parser)
-        regex = re.compile('.*Player data.*')
-        player_data = soup.find("h2", string=regex)
-        df = cls.__extract_player(soup) if player_data else cls.__extract_non_player(soup)
-        message = f"\n{df.loc[0]['first_name']} {df.loc[0]['last_name']} ({df.loc[0]['type']}) completed!" if not df.empty else f"\nError on scraping this person {person_url}"
-        cls._send_message(message, queue)
-        return df
+        record = cls._run_job(cls.extract_person_async(person_url, job_id=job_id, **kwargs), kwargs.get("queue"))
+        return cls._to_dataframe([record] if record else list())
+
+    @classmethod
+    async def extract_person_async(cls, person_url: str, **kwargs) -> dict | None:
+        if cls._seen("person", person_url, kwargs):
+            return None
+        journal = cls._get_journal(kwargs)
+        records = journal.completed_records(person_url) if journal else None
+        if records is not None:
+            record = records[0] if records else None
+            cls._complete_person(person_url, record, kwargs)
+        else:
+            content = await cls._send_get_request_async(person_url)
+            if content is None:
+                cls._report_missing(person_url, kwargs.get("queue"))
+                record = None
+            else:
+                soup = HtmlParser.parse(content, "transfermarkt_person")
+                regex = re.compile('.*Player data.*')
+                player_data = soup.find("h2", string=regex)
+                record = cls.__extract_player(soup) if player_data else cls.__extract_non_player(soup)
+            cls._enrich(person_url, record, kwargs, journal)
+        return record
 
     @classmethod
-    def __extract_non_player(cls, soup: Tag) -> pd.DataFrame:
+    def __extract_non_player(cls, soup: Tag) -> dict | None:
         data = {
             "type": "staff"
         }
@@ -195,11 +287,10 @@ class TransfermarktScraper(BaseScraper):
                     data[cls.__player_headers[key]] = value
                 if "date of birth" in key:
                     data["date_of_birth"] = datetime.strptime(value.split("(")[0].strip(), cls.__format_date).strftime("%d/%m/%Y")
-        data = FMTransferUpdateFiller(data).check_and_fill()
-        return pd.DataFrame(data, index=[0]) if data else pd.DataFrame()
+        return data
 
     @classmethod
-    def __extract_player(cls, soup: Tag) -> pd.DataFrame:
+    def __extract_player(cls, soup: Tag) -> dict:
         data = {
             "entity": "Person",
             "type": "player"
@@ -276,8 +367,7 @@ class TransfermarktScraper(BaseScraper):
                     p = pos_box.parent.find_all("dd")
                     for i in p:
                         cls.__set_player_position(data, cls._safe_extract_text(i), is_main)
-        data = FMInsideFiller(data).check_and_fill()
-        return pd.DataFrame(data, index=[0])
+        return data
 
     @classmethod
     def __set_player_position(cls, player_data:dict, position:str, is_main:bool=True) -> None:
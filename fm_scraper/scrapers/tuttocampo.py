@@ -1,12 +1,12 @@
+import asyncio
 import dateparser
 import pandas as pd
 import random
-from bs4 import BeautifulSoup, Tag
-from functools import partial
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from bs4 import Tag
+from typing import List
 from urllib.parse import urlparse
-from fm_scraper.fillers import FMInsideFiller, FMTransferUpdateFiller
-from .settings import MAX_THREAD_WORKERS, NUM_PROCESSORS
+from fm_scraper.core import HtmlParser, Scheduler
+from fm_scraper.fillers import Enrichment
 from .base_scraper import BaseScraper
 
 
@@ -18,8 +18,6 @@ class TuttocampoScraper(BaseScraper):
         "numero di maglia": "squad_number",
     }
 
-    __parser = "html.parser"
-
     __positions = {
         "portiere": "goalkeeper",
         "difensore": ["defender_left", "defender_central","defender_right"],
@@ -43,21 +41,41 @@ class TuttocampoScraper(BaseScraper):
 
     @classmethod
     def _send_request(cls, url: str, *args, **kwargs) -> str | None:
+        cls.__check_url(url)
+        return super()._send_request(url, *args, **kwargs)
+
+    @classmethod
+    async def _send_request_async(cls, url: str, *args, **kwargs) -> str | None:
+        cls.__check_url(url)
+        return await super()._send_request_async(url, *args, **kwargs)
+
+    @staticmethod
+    def __check_url(url: str) -> None:
         parsed_url = urlparse(url)
         if not parsed_url.netloc == "www.tuttocampo.it":
             raise Exception(f"Please, give a correct url from tuttocampo italian version")
-        return super()._send_request(url, *args, **kwargs)
 
     @classmethod
-    def extract_division(cls, division_url: str, **kwargs) -> pd.DataFrame:
+    def extract_division(cls, division_url: str, job_id: str = None, **kwargs) -> pd.DataFrame:
         """
         extract the squad of all teams of the specified division.
         :param division_url: this url must be part of the domain tuttocampo.it and concern a division
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
         :return:
         """
+        return cls._to_dataframe(cls._run_job(cls.extract_division_async(division_url, job_id=job_id, **kwargs),
+                                              kwargs.get("queue")))
+
+    @classmethod
+    async def extract_division_async(cls, division_url: str, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
+        journal = cls._get_journal(kwargs)
 
-        soup = BeautifulSoup(cls._send_request(url=division_url, with_session=True), cls.__parser)
+        content = await cls._send_request_async(url=division_url, with_session=True, pattern="tuttocampo_division")
+        if content is None:
+            cls._report_missing(division_url, queue)
+            return list()
+        soup = HtmlParser.parse(content, "tuttocampo_division")
         table = soup.find("div", id="last_match_ranking")
 
         team_urls = list()
@@ -67,45 +85,86 @@ class TuttocampoScraper(BaseScraper):
                 a = r.find("a")
                 team_urls.append(a.get("href"))
 
-        worker = partial(cls.extract_team, queue=queue)
-        with ProcessPoolExecutor(max_workers=NUM_PROCESSORS) as executor:
-            data = list(executor.map(worker, team_urls))
+        cls._discover("team", len(team_urls), kwargs)
+        if journal:
+            journal.discover(team_urls, "team", division_url)
+        teams = await Scheduler.map(
+            "team",
+            lambda t: cls.extract_team_async(t, queue=queue, journal=journal, sink=kwargs.get("sink"),
+                                             progress=kwargs.get("progress")),
+            team_urls
+        )
 
         cls._send_message(f"\n{division_url} completed!", queue)
-        if data:
-            return pd.concat(data, axis=0)
-        return pd.DataFrame()
+        return [r for team in teams for r in team]
 
     @classmethod
-    def extract_team(cls, team_url: str, **kwargs) -> pd.DataFrame:
+    def extract_team(cls, team_url: str, job_id: str = None, **kwargs) -> pd.DataFrame:
         """
         extract players and staff of the specified team.
         :param team_url: the url must be part of the domain tuttocampo.it and concern a team.
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
         :return:
         """
+        return cls._to_dataframe(cls._run_job(cls.extract_team_async(team_url, job_id=job_id, **kwargs),
+                                              kwargs.get("queue")))
+
+    @classmethod
+    async def extract_team_async(cls, team_url: str, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
+        if cls._seen("team", team_url, kwargs):
+            return list()
+        journal = cls._get_journal(kwargs)
+        if journal and journal.is_completed(team_url):
+            cls._send_message(f"\n\n{team_url} already completed!\n", queue)
+            records = journal.children_records(team_url)
+            cls._discover("person", len(records), kwargs)
+            for record in records:
+                cls._emit(record, kwargs)
+            cls._complete("person", kwargs, len(records))
+            cls._complete("team", kwargs)
+            return cls._collect(records, kwargs)
 
-        soup = BeautifulSoup(cls._send_request(team_url.replace("Scheda", "Rosa"), with_session=True), cls.__parser)
+        # the squad is read from the same page, nothing of the team can be scraped without it
+        content = await cls._send_request_async(team_url.replace("Scheda", "Rosa"), with_session=True,
+                                                pattern="tuttocampo_team")
+        if content is None:
+            cls._report_missing(team_url, queue)
+            cls._complete("team", kwargs)
+            return list()
+        soup = HtmlParser.parse(content, "tuttocampo_team")
         club_name = soup.find("h1", attrs={"class": "team", "itemprop": "name"})
         # get players and staff data
-        df_staff = cls.__extract_staff(team_url, queue=queue)
-        df_players = cls.__extract_squad(team_url, queue=queue)
-        cls._send_message(f"\n\n{club_name.text} completed!\n",queue)
-        return pd.concat([df_staff, df_players])
+        staff, players = await asyncio.gather(
+            Scheduler.run("staff", cls.__extract_staff(team_url, queue=queue, journal=journal, sink=kwargs.get("sink"),
+                                                       progress=kwargs.get("progress"))),
+            Scheduler.run("squad", cls.__extract_squad(team_url, queue=queue, journal=journal, sink=kwargs.get("sink"),
+                                                       progress=kwargs.get("progress")))
+        )
+        await Enrichment.wait(team_url)
+        if journal and not journal.pending_children(team_url):
+            journal.complete(team_url, "team")
+        cls._complete("team", kwargs)
+        cls._send_message(f"\n\n{club_name.text if club_name else team_url} completed!\n",queue)
+        return staff + players
 
     @classmethod
-    def __extract_staff(cls, team_url: str, **kwargs) -> pd.DataFrame:
+    async def __extract_staff(cls, team_url: str, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
+        journal = kwargs.get("journal")
         staff_url = team_url
         if "Scheda" in team_url:
             staff_url = staff_url.replace("Scheda", "Staff")
         if not "Staff" in staff_url:
             staff_url += "/Staff" if not team_url[-1]=="/" else "Staff"
-        soup = BeautifulSoup(cls._send_request(staff_url, with_session=True),
-                             cls.__parser)
+        content = await cls._send_request_async(staff_url, with_session=True, pattern="tuttocampo_staff")
+        if content is None:
+            cls._report_missing(staff_url, queue)
+            return list()
+        soup = HtmlParser.parse(content, "tuttocampo_team")
         staff_table = soup.find("div", id="team_staff")
         if not staff_table:
-            return pd.DataFrame()
+            return list()
         staff_table = staff_table.findNext("tbody")
         staff_urls = list()
         for row in staff_table.find_all('tr'):
@@ -115,23 +174,34 @@ class TuttocampoScraper(BaseScraper):
                     a = td[-1].find('a')
                     if a and len(a.text)>0:
                         staff_urls.append(a.get('href'))
-        with ThreadPoolExecutor(max_workers=MAX_THREAD_WORKERS) as executor:
-            staff_dfs = list(executor.map(lambda url: cls.extract_person(url, queue=queue), staff_urls))
-        return pd.concat(staff_dfs, axis=0) if staff_dfs else pd.DataFrame()
+        cls._discover("person", len(staff_urls), kwargs)
+        if journal:
+            journal.discover(staff_urls, "person", team_url)
+        staff = await Scheduler.map(
+            "person",
+            lambda url: cls.extract_person_async(url, queue=queue, journal=journal, parent=team_url, sink=kwargs.get("sink"),
+                                                 progress=kwargs.get("progress")),
+            staff_urls
+        )
+        return cls._collect(staff, kwargs)
 
     @classmethod
-    def __extract_squad(cls, team_url: str, **kwargs):
+    async def __extract_squad(cls, team_url: str, **kwargs) -> List[dict]:
         queue = None if "queue" not in kwargs else kwargs["queue"]
+        journal = kwargs.get("journal")
         squad_url = team_url
         if "Scheda" in team_url:
             squad_url = squad_url.replace("Scheda", "Rosa")
         if not "Rosa" in squad_url:
             squad_url += "/Rosa" if not team_url[-1]=="/" else "Rosa"
-        soup = BeautifulSoup(cls._send_request(squad_url, with_session=True),
-                             cls.__parser)
+        content = await cls._send_request_async(squad_url, with_session=True, pattern="tuttocampo_squad")
+        if content is None:
+            cls._report_missing(squad_url, queue)
+            return list()
+        soup = HtmlParser.parse(content, "tuttocampo_team")
         players_table = soup.find("table", attrs={"class": "tc-table"})
         if not players_table:
-            return pd.DataFrame()
+            return list()
         players_table = players_table.findNext("tbody")
         players_urls = list()
         for row in players_table.find_all('tr'):
@@ -140,27 +210,47 @@ class TuttocampoScraper(BaseScraper):
                 a = td.find('a')
                 if a and len(a.text) > 0:
                     players_urls.append(a.get("href"))
-        with ThreadPoolExecutor(max_workers=MAX_THREAD_WORKERS) as executor:
-            player_dfs = list(executor.map(lambda url: cls.extract_person(url, queue=queue), players_urls))
-            return pd.concat(player_dfs, axis=0) if player_dfs else pd.DataFrame()
+        cls._discover("person", len(players_urls), kwargs)
+        if journal:
+            journal.discover(players_urls, "person", team_url)
+        players = await Scheduler.map(
+            "person",
+            lambda url: cls.extract_person_async(url, queue=queue, journal=journal, parent=team_url, sink=kwargs.get("sink"),
+                                                 progress=kwargs.get("progress")),
+            players_urls
+        )
+        return cls._collect(players, kwargs)
 
     @classmethod
-    def extract_person(cls, person_url: str, **kwargs) -> pd.DataFrame:
+    def extract_person(cls, person_url: str, job_id: str = None, **kwargs) -> pd.DataFrame:
         """
         extract the info of the specified person.
         :param person_url: this url must be part of the domain tuttocampo.it and concern a person
+        :param job_id: optional id of the job, re-running a job with the same id only scrapes what is missing
         :return:
         """
+        record = cls._run_job(cls.extract_person_async(person_url, job_id=job_id, **kwargs), kwargs.get("queue"))
+        return cls._to_dataframe([record] if record else list())
+
+    @classmethod
+    async def extract_person_async(cls, person_url: str, **kwargs) -> dict | None:
         queue = None if "queue" not in kwargs else kwargs["queue"]
-        df = cls.__extract_player(person_url) if "giocatore" in person_url.lower() else cls.__extract_non_player(person_url)
-        message = f"\n{df.loc[0]['first_name']} {df.loc[0]['last_name']} ({df.loc[0]['type']}) completed!" if not df.empty else f"\nError on scraping this person {person_url}"
-        cls._send_message(message,queue)
-        return df
+        if cls._seen("person", person_url, kwargs):
+            return None
+        journal = cls._get_journal(kwargs)
+        records = journal.completed_records(person_url) if journal else None
+        if records is not None:
+            record = records[0] if records else None
+            cls._complete_person(person_url, record, kwargs)
+        else:
+            record = await cls.__extract_player(person_url, queue) if "giocatore" in person_url.lower() else await cls.__extract_non_player(person_url, queue)
+            cls._enrich(person_url, record, kwargs, journal)
+        return record
 
     # non player
     @classmethod
-    def __extract_non_player(cls, person_url: str) -> pd.DataFrame:
-        soup, data_table = cls.__retry_request(person_url)
+    async def __extract_non_player(cls, person_url: str, queue=None) -> dict | None:
+        soup, data_table = await cls.__ready_request(person_url, queue)
         if data_table:
             data = {"entity":"Person", "type": "staff", "club": cls.__extract_club(soup)}
             for row in data_table.find_all('tr'):
@@ -180,15 +270,13 @@ class TuttocampoScraper(BaseScraper):
                     if t:
                         job = t[-1].text.lower()
             data["job"] = cls.__staff_job[job] if job in cls.__staff_job else "director"
-            FMTransferUpdateFiller(data).check_and_fill()
-            df = pd.DataFrame(data, index=[0])
-            return df
-        return pd.DataFrame()
+            return data
+        return None
 
     # player
     @classmethod
-    def __extract_player(cls, person_url: str) -> pd.DataFrame:
-        soup, data_table = cls.__retry_request(person_url)
+    async def __extract_player(cls, person_url: str, queue=None) -> dict | None:
+        soup, data_table = await cls.__ready_request(person_url, queue)
         if data_table:
             data = {"entity":"Person", "type": "player", "club": cls.__extract_club(soup),"job": "player"}
             for row in data_table.find_all('tr'):
@@ -208,21 +296,20 @@ class TuttocampoScraper(BaseScraper):
                     cls.__extract_foot(data, columns)
                 if col_name == "ruolo":
                     cls.__extract_role(data, columns)
-            data = FMInsideFiller(data).check_and_fill()
-            df = pd.DataFrame(data, index=[0])
-            return df
-        return pd.DataFrame()
+            return data
+        return None
 
     @classmethod
-    def __retry_request(cls, url: str) -> tuple:
-        count = 0
-        soup = None
-        data_table = None
-        while count < 10 and data_table is None:
-            soup = BeautifulSoup(cls._send_request(url, with_session=True), cls.__parser)
-            data_table = soup.find('table', attrs={"class": 'tc-table-slim'})
-            count+=1
-        return soup, data_table
+    async def __ready_request(cls, url: str, queue=None) -> tuple:
+        """
+        person page once its data table is rendered, waiting for it inside a single browser page.
+        """
+        cls.__check_url(url)
+        content, reason = await cls._ready_request_async(url, "table.tc-table-slim", pattern="tuttocampo_person")
+        if reason:
+            cls._send_message(f"\n{url} not ready: {reason}", queue)
+        soup = HtmlParser.parse(content, "tuttocampo_person")
+        return soup, soup.find('table', attrs={"class": 'tc-table-slim'})
 
     @staticmethod
     def __extract_date_of_birth(data_player:dict, tags: list) -> None:
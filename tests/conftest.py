@@ -0,0 +1,3 @@
+# fm_scraper.core reads the settings of the scrapers package, which imports fm_scraper.core in turn: the scrapers
+# package is loaded first, as the gui and the cli do
+import fm_scraper.scrapers  # noqa: F401
@@ -0,0 +1,105 @@
+import os
+import pytest
+from fm_scraper.core import CrawlJournal, ResponseCache
+from fm_scraper.scrapers import TransfermarktScraper, base_scraper
+
+TEAM = "https://example.org/team/1"
+PERSONS = [f"https://example.org/person/{i}" for i in range(3)]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return os.path.join(tmp_path, "journal.sqlite")
+
+
+def test_resume_only_returns_what_is_missing(path):
+    journal = CrawlJournal("job", path)
+    journal.discover([TEAM], "team")
+    journal.discover(PERSONS, "person", TEAM)
+    journal.complete(PERSONS[0], "person", [{"last_name": "Rossi"}], TEAM)
+    journal.close()
+
+    resumed = CrawlJournal("job", path)
+    assert resumed.completed_records(PERSONS[0]) == [{"last_name": "Rossi"}]
+    assert resumed.completed_records(PERSONS[1]) is None
+    assert resumed.pending_children(TEAM) == 2
+    assert resumed.progress() == {"team": (0, 1), "person": (1, 3)}
+    resumed.close()
+
+
+def test_completed_team_keeps_the_records_of_its_persons(path):
+    journal = CrawlJournal("job", path)
+    journal.discover(PERSONS[:2], "person", TEAM)
+    journal.complete(PERSONS[0], "person", [{"last_name": "Rossi"}], TEAM)
+    journal.complete(PERSONS[1], "person", [{"last_name": "Verdi"}], TEAM)
+    journal.complete(TEAM, "team")
+    assert journal.is_completed(TEAM)
+    assert journal.pending_children(TEAM) == 0
+    assert sorted(r["last_name"] for r in journal.children_records(TEAM)) == ["Rossi", "Verdi"]
+    journal.close()
+
+
+def test_person_without_records(path):
+    journal = CrawlJournal("job", path)
+    journal.complete(PERSONS[0], "person")
+    assert journal.completed_records(PERSONS[0]) == []
+    journal.close()
+
+
+def test_discover_does_not_reset_completed_urls(path):
+    journal = CrawlJournal("job", path)
+    journal.complete(PERSONS[0], "person", [{"last_name": "Rossi"}], TEAM)
+    journal.discover(PERSONS, "person", TEAM)
+    assert journal.is_completed(PERSONS[0])
+    assert journal.pending_children(TEAM) == 2
+    journal.close()
+
+
+def test_jobs_are_kept_apart(path):
+    first = CrawlJournal("first", path)
+    first.complete(PERSONS[0], "person", [{"last_name": "Rossi"}])
+    second = CrawlJournal("second", path)
+    assert second.completed_records(PERSONS[0]) is None
+    first.close()
+    second.close()
+
+
+class RecordingJournal(CrawlJournal):
+    """
+    journal written in the temporary directory, remembering whether it was closed.
+    """
+
+    path = None
+    opened = list()
+
+    def __init__(self, job_id: str) -> None:
+        super().__init__(job_id, RecordingJournal.path)
+        self.closed = False
+        RecordingJournal.opened.append(self)
+
+    def close(self) -> None:
+        self.closed = True
+        super().close()
+
+
+@pytest.fixture
+def scraper(path, tmp_path, monkeypatch):
+    monkeypatch.setattr(RecordingJournal, "path", path)
+    monkeypatch.setattr(RecordingJournal, "opened", list())
+    monkeypatch.setattr(base_scraper, "CrawlJournal", RecordingJournal)
+    monkeypatch.setattr(ResponseCache, "offline", True)
+    monkeypatch.setattr(ResponseCache, "directory", str(tmp_path))
+    return TransfermarktScraper
+
+
+def test_job_closes_the_journal_it_opened(scraper):
+    scraper.extract_team("https://www.transfermarkt.com/inter/startseite/verein/46", job_id="job")
+    assert [j.closed for j in RecordingJournal.opened] == [True]
+
+
+def test_job_leaves_a_passed_journal_open(scraper, path):
+    journal = CrawlJournal("job", path)
+    scraper.extract_team("https://www.transfermarkt.com/inter/startseite/verein/46", journal=journal)
+    assert RecordingJournal.opened == []
+    assert journal.progress() == {}
+    journal.close()
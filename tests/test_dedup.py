@@ -0,0 +1,98 @@
+import asyncio
+from fm_scraper.core import CrawlContext, Dedup
+
+
+def test_first_is_per_crawl():
+    async def crawl(crawl_id: str) -> list:
+        CrawlContext.enter(crawl_id)
+        return [Dedup.first("url"), Dedup.first("url"), Dedup.first("other")]
+
+    async def main() -> list:
+        return await asyncio.gather(crawl("a"), crawl("b"))
+
+    assert asyncio.run(main()) == [[True, False, True], [True, False, True]]
+
+
+def test_first_is_per_loop():
+    async def main() -> bool:
+        return Dedup.first("url")
+
+    assert asyncio.run(main()) and asyncio.run(main())
+
+
+def test_run_coalesces_concurrent_calls():
+    calls = list()
+
+    async def work() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main() -> list:
+        return await asyncio.gather(*(Dedup.run("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(calls) == 1
+
+
+def test_run_again_once_done():
+    calls = list()
+
+    async def work() -> int:
+        calls.append(1)
+        return len(calls)
+
+    async def main() -> list:
+        return [await Dedup.run("key", work), await Dedup.run("key", work)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_run_shares_exceptions():
+    async def work() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main() -> list:
+        return await asyncio.gather(*(Dedup.run("key", work) for _ in range(3)), return_exceptions=True)
+
+    assert [type(r) for r in asyncio.run(main())] == [ValueError] * 3
+
+
+def test_cancelled_waiter_does_not_cancel_the_work():
+    async def work() -> str:
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def main() -> tuple:
+        owner = asyncio.create_task(Dedup.run("key", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(Dedup.run("key", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await owner, await asyncio.gather(waiter, return_exceptions=True)
+
+    result, [waited] = asyncio.run(main())
+    assert result == "result"
+    assert isinstance(waited, asyncio.CancelledError)
+
+
+def test_waiter_runs_the_work_when_the_owner_is_cancelled():
+    calls = list()
+
+    async def work() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return len(calls)
+
+    async def main() -> tuple:
+        owner = asyncio.create_task(Dedup.run("key", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(Dedup.run("key", work))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await asyncio.gather(owner, return_exceptions=True), await waiter
+
+    [owned], waited = asyncio.run(main())
+    assert isinstance(owned, asyncio.CancelledError)
+    assert waited == 2
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import pytest
+from fm_scraper.fillers import enrichment_cache
+from fm_scraper.fillers.base_filler import BaseFiller
+from fm_scraper.fillers.enrichment_cache import EnrichmentCache
+
+PERSON = {"first_name": "Mario", "last_name": "Rossi", "date_of_birth": "01/01/2000", "type": "player"}
+
+
+class FakeFiller(BaseFiller):
+    """
+    filler answering with the given result, counting the lookups.
+    """
+
+    result = BaseFiller.FOUND
+    lookups = 0
+
+    @staticmethod
+    def _get_base_url() -> str:
+        return "https://example.org/"
+
+    async def _fill_async(self) -> str:
+        FakeFiller.lookups += 1
+        if FakeFiller.result == BaseFiller.FOUND:
+            self.item["db_unique_id"] = "42"
+        return FakeFiller.result
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(EnrichmentCache, "enabled", True)
+    monkeypatch.setattr(EnrichmentCache, "path", os.path.join(tmp_path, "enrichment.sqlite"))
+    monkeypatch.setattr(EnrichmentCache, "_EnrichmentCache__connection", None)
+    FakeFiller.lookups = 0
+    return EnrichmentCache
+
+
+def fill(result: str) -> dict:
+    FakeFiller.result = result
+    return asyncio.run(FakeFiller(dict(PERSON)).check_and_fill_async())
+
+
+def test_key_ignores_accents_case_and_spaces():
+    key = EnrichmentCache.key(PERSON)
+    assert EnrichmentCache.key({**PERSON, "first_name": "  MÀRIO "}) == key
+    assert EnrichmentCache.key({**PERSON, "type": "staff"}) != key
+    assert EnrichmentCache.key({"type": "player"}) is None
+
+
+def test_found_fields_are_cached():
+    assert fill(BaseFiller.FOUND)["db_unique_id"] == "42"
+    assert fill(BaseFiller.FAILED)["db_unique_id"] == "42"
+    assert FakeFiller.lookups == 1
+    assert EnrichmentCache.get("FakeFiller", EnrichmentCache.key(PERSON)) == {"db_unique_id": "42"}
+
+
+def test_not_found_is_cached_as_negative():
+    fill(BaseFiller.NOT_FOUND)
+    assert "db_unique_id" not in fill(BaseFiller.FOUND)
+    assert FakeFiller.lookups == 1
+    assert EnrichmentCache.get("FakeFiller", EnrichmentCache.key(PERSON)) == {}
+
+
+def test_failed_lookup_is_not_cached():
+    fill(BaseFiller.FAILED)
+    assert EnrichmentCache.get("FakeFiller", EnrichmentCache.key(PERSON)) is None
+    assert fill(BaseFiller.FOUND)["db_unique_id"] == "42"
+    assert FakeFiller.lookups == 2
+
+
+def test_negative_results_expire_first(monkeypatch):
+    EnrichmentCache.set("FakeFiller", "found", {"db_unique_id": "42"})
+    EnrichmentCache.set("FakeFiller", "missing", {})
+    monkeypatch.setattr(enrichment_cache, "ENRICHMENT_NEGATIVE_TTL", -1)
+    assert EnrichmentCache.get("FakeFiller", "found") == {"db_unique_id": "42"}
+    assert EnrichmentCache.get("FakeFiller", "missing") is None
+
+
+def test_invalidate():
+    EnrichmentCache.set("FakeFiller", "found", {"db_unique_id": "42"})
+    EnrichmentCache.set("OtherFiller", "found", {"db_unique_id": "43"})
+    EnrichmentCache.invalidate(filler="FakeFiller")
+    assert EnrichmentCache.get("FakeFiller", "found") is None
+    assert EnrichmentCache.get("OtherFiller", "found") == {"db_unique_id": "43"}
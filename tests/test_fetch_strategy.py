@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import pytest
+from fm_scraper.core import BaseRequest, FetchStrategy, RateLimiter, ResponseCache
+
+URL = "https://example.org/team/1"
+PATTERN = "example_team"
+RENDERED = '<html><div id="team">squad</div></html>'
+SHELL = "<html><script>app()</script></html>"
+
+
+@pytest.fixture(autouse=True)
+def strategy(tmp_path, monkeypatch):
+    monkeypatch.setattr(FetchStrategy, "markers", {PATTERN: ['id="team"']})
+    monkeypatch.setattr(FetchStrategy, "path", os.path.join(tmp_path, "strategies.json"))
+    monkeypatch.setattr(FetchStrategy, "probe_interval", 3)
+    monkeypatch.setattr(FetchStrategy, "_FetchStrategy__strategies", None)
+    monkeypatch.setattr(FetchStrategy, "_FetchStrategy__browser_fetches", dict())
+    monkeypatch.setattr(FetchStrategy, "_FetchStrategy__dirty", False)
+    return FetchStrategy
+
+
+def test_observe_learns_only_from_200():
+    assert FetchStrategy.observe(PATTERN, 200, RENDERED) == FetchStrategy.HTTP
+    assert FetchStrategy.observe(PATTERN, 503, None) is None
+    assert FetchStrategy.observe(PATTERN, None, None) is None
+    assert FetchStrategy.observe(PATTERN, 404, SHELL) is None
+    assert FetchStrategy.get(PATTERN) == FetchStrategy.HTTP
+    assert FetchStrategy.observe(PATTERN, 200, SHELL) == FetchStrategy.BROWSER
+    assert FetchStrategy.get(PATTERN) == FetchStrategy.BROWSER
+
+
+def test_browser_patterns_are_probed_again_every_interval():
+    assert FetchStrategy.use_http(PATTERN)
+    FetchStrategy.remember(PATTERN, FetchStrategy.BROWSER)
+    assert [FetchStrategy.use_http(PATTERN) for _ in range(6)] == [False, False, True, False, False, True]
+
+
+def test_save_and_load():
+    FetchStrategy.remember(PATTERN, FetchStrategy.BROWSER)
+    FetchStrategy.save()
+    with open(FetchStrategy.path, encoding="utf-8") as f:
+        assert json.load(f) == {PATTERN: FetchStrategy.BROWSER}
+    FetchStrategy._FetchStrategy__strategies = None
+    assert FetchStrategy.get(PATTERN) == FetchStrategy.BROWSER
+
+
+def test_corrupt_file_loads_empty():
+    with open(FetchStrategy.path, "w", encoding="utf-8") as f:
+        f.write('{"example_team": "carrier pigeon"}')
+    assert FetchStrategy.get(PATTERN) is None
+    assert FetchStrategy.use_http(PATTERN)
+
+
+class Transport:
+    """
+    fake transport answering http and browser requests, recording them.
+    """
+
+    def __init__(self, monkeypatch, http) -> None:
+        self.http = http
+        self.calls = list()
+        self.throttled = list()
+        monkeypatch.setattr(ResponseCache, "enabled", False)
+        monkeypatch.setattr(ResponseCache, "offline", False)
+        monkeypatch.setattr(RateLimiter, "acquire_async", classmethod(lambda cls, url: asyncio.sleep(0)))
+        monkeypatch.setattr(RateLimiter, "throttled", classmethod(lambda cls, url, *args: self.throttled.append(url)))
+        monkeypatch.setattr(BaseRequest, "_BaseRequest__send_get_request_async", staticmethod(self.send))
+
+    async def send(self, url: str, with_session: bool = False, data: dict = None) -> tuple:
+        self.calls.append("browser" if with_session else "http")
+        if with_session:
+            return 200, RENDERED, dict()
+        if isinstance(self.http, Exception):
+            raise self.http
+        return self.http
+
+    def fetch(self, with_session: bool = True) -> str:
+        return asyncio.run(BaseRequest._send_request_async(URL, with_session=with_session, pattern=PATTERN))
+
+
+def test_probe_with_markers_skips_the_browser(monkeypatch):
+    transport = Transport(monkeypatch, (200, RENDERED, dict()))
+    assert transport.fetch() == RENDERED
+    assert transport.calls == ["http"]
+    assert FetchStrategy.get(PATTERN) == FetchStrategy.HTTP
+
+
+def test_probe_without_markers_falls_back_to_the_browser(monkeypatch):
+    transport = Transport(monkeypatch, (200, SHELL, dict()))
+    assert transport.fetch() == RENDERED
+    assert transport.calls == ["http", "browser"]
+    assert FetchStrategy.get(PATTERN) == FetchStrategy.BROWSER
+    transport.calls.clear()
+    assert transport.fetch() == RENDERED
+    assert transport.calls == ["browser"]
+
+
+@pytest.mark.parametrize("http", [(503, "busy", {"retry-after": "5"}), ConnectionError("reset")])
+def test_failed_probe_keeps_the_strategy(monkeypatch, http):
+    FetchStrategy.remember(PATTERN, FetchStrategy.HTTP)
+    transport = Transport(monkeypatch, http)
+    assert transport.fetch() == RENDERED
+    assert transport.calls == ["http", "browser"]
+    assert FetchStrategy.get(PATTERN) == FetchStrategy.HTTP
+    assert transport.throttled == ([URL] if isinstance(http, tuple) else [])
+
+
+def test_no_probe_without_session(monkeypatch):
+    transport = Transport(monkeypatch, (200, SHELL, dict()))
+    assert transport.fetch(with_session=False) == SHELL
+    assert transport.calls == ["http"]
+    assert FetchStrategy.get(PATTERN) is None
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import pytest
+from fm_scraper.core import DateUtilities, HtmlParser
+from fm_scraper.fillers.fm_inside import FMInsideFiller
+from fm_scraper.fillers.fm_inside_index import FMInsideIndex
+
+LISTING = """<div id="player_table">
+<ul class="player"><li class="player"><b><a href="/players/7-fm-24/2000255018-mario-rossi">Mario Rossi</a></b></li>
+<li class="age">24</li></ul>
+<ul class="player"><li class="player"><b><a href="/players/7-fm-24/luca-bianchi">Luca Bianchi</a></b></li></ul>
+</div>"""
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(FMInsideIndex, "path", os.path.join(tmp_path, "index.json.gz"))
+    monkeypatch.setattr(FMInsideIndex, "_FMInsideIndex__entries", None)
+    monkeypatch.setattr(FMInsideIndex, "_FMInsideIndex__by_url", dict())
+    monkeypatch.setattr(FMInsideIndex, "_FMInsideIndex__grams", dict())
+    monkeypatch.setattr(FMInsideIndex, "_FMInsideIndex__dirty", False)
+    return FMInsideIndex
+
+
+def reload():
+    FMInsideIndex._FMInsideIndex__entries = None
+
+
+def test_search_finds_close_names():
+    FMInsideIndex.add("Mario Rossi", "/players/1", 24, "1")
+    FMInsideIndex.add("Luca Bianchi", "/players/2", 30, "2")
+    assert [e.url for e in FMInsideIndex.search("Màrio  ROSSI")] == ["/players/1"]
+    assert [e.url for e in FMInsideIndex.search("Mario Rosi")] == ["/players/1"]
+    assert FMInsideIndex.search("Giovanni Verdi") == []
+
+
+def test_re_add_updates_the_entry():
+    FMInsideIndex.add("Mario Rossi", "/players/1")
+    FMInsideIndex.add(None, "/players/1", 24, "1")
+    [entry] = FMInsideIndex.search("Mario Rossi")
+    assert (entry.name, entry.age, entry.unique_id) == ("mario rossi", 24, "1")
+    assert FMInsideIndex.current_age(entry) == 24
+
+
+def test_re_add_with_a_new_name_reindexes():
+    FMInsideIndex.add("Mario Rossi", "/players/1", 24, "1")
+    FMInsideIndex.add("Giovanni Verdi", "/players/1")
+    assert FMInsideIndex.search("Mario Rossi") == []
+    [entry] = FMInsideIndex.search("Giovanni Verdi")
+    assert (entry.url, entry.age, entry.unique_id) == ("/players/1", 24, "1")
+
+
+def test_unknown_age_is_not_trusted():
+    FMInsideIndex.add("Mario Rossi", "/players/1")
+    [entry] = FMInsideIndex.search("Mario Rossi")
+    assert FMInsideIndex.current_age(entry) is None
+
+
+def test_save_and_load():
+    FMInsideIndex.add("Mario Rossi", "/players/1", 24, "1")
+    FMInsideIndex.save()
+    assert os.path.exists(FMInsideIndex.path)
+    reload()
+    [entry] = FMInsideIndex.search("Mario Rossi")
+    assert (entry.url, entry.age, entry.unique_id) == ("/players/1", 24, "1")
+
+
+def test_missing_or_corrupt_file_loads_empty():
+    with open(FMInsideIndex.path, "wb") as f:
+        f.write(b"not gzip")
+    assert FMInsideIndex.search("Mario Rossi") == []
+
+
+def test_listing_indexes_age_and_unique_id(monkeypatch):
+    monkeypatch.setattr(HtmlParser, "partial", False)
+    players = FMInsideFiller._FMInsideFiller__index_player_table(LISTING)
+    assert [url for _, url in players] == ["/players/7-fm-24/2000255018-mario-rossi", "/players/7-fm-24/luca-bianchi"]
+    [rossi] = FMInsideIndex.search("Mario Rossi")
+    assert (rossi.age, rossi.unique_id) == (24, "2000255018")
+    [bianchi] = FMInsideIndex.search("Luca Bianchi")
+    assert (bianchi.age, bianchi.unique_id) == (None, None)
+
+
+def test_listed_player_is_resolved_without_its_page(monkeypatch):
+    monkeypatch.setattr(HtmlParser, "partial", False)
+    monkeypatch.setattr(DateUtilities, "get_years_from_today", staticmethod(lambda date: 24))
+    FMInsideFiller._FMInsideFiller__index_player_table(LISTING)
+    filler = FMInsideFiller({"first_name": "Mario", "last_name": "Rossi", "date_of_birth": "01/01/2000"})
+    assert asyncio.run(filler._fill_async()) == FMInsideFiller.FOUND
+    assert filler.item["db_unique_id"] == "2000255018"
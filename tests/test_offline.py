@@ -0,0 +1,52 @@
+from queue import Queue
+import pytest
+from fm_scraper.core import HtmlParser, ResponseCache
+from fm_scraper.scrapers import TransfermarktScraper, TuttocampoScraper
+
+
+@pytest.fixture(autouse=True)
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResponseCache, "offline", True)
+    monkeypatch.setattr(ResponseCache, "directory", str(tmp_path))
+    monkeypatch.setattr(HtmlParser, "partial", False)
+    ResponseCache.configure(directory=str(tmp_path))
+
+
+def messages(queue: Queue) -> str:
+    return "".join(queue.get() for _ in range(queue.qsize()))
+
+
+@pytest.mark.parametrize("scraper, url", [
+    (TransfermarktScraper, "https://www.transfermarkt.com/inter/startseite/verein/46"),
+    (TuttocampoScraper, "https://www.tuttocampo.it/Lombardia/Eccellenza/GironeA/Squadra/Inter/1/Scheda"),
+])
+def test_uncached_team_is_skipped(scraper, url):
+    queue = Queue()
+    df = scraper.extract_team(url, queue=queue)
+    assert df.empty
+    assert f"{url} skipped: not cached" in messages(queue)
+
+
+@pytest.mark.parametrize("scraper, url", [
+    (TransfermarktScraper, "https://www.transfermarkt.com/serie-a/startseite/wettbewerb/IT1"),
+    (TuttocampoScraper, "https://www.tuttocampo.it/Lombardia/Eccellenza/GironeA/Classifica"),
+])
+def test_uncached_division_is_skipped(scraper, url):
+    queue = Queue()
+    assert scraper.extract_division(url, queue=queue).empty
+    assert f"{url} skipped: not cached" in messages(queue)
+
+
+def test_partly_cached_team_skips_the_missing_pages():
+    url = "https://www.transfermarkt.com/inter/startseite/verein/46"
+    ResponseCache.configure(enabled=True)
+    ResponseCache.set(ResponseCache.key("GET", url), """
+        <h1 class="data-header__headline-wrapper data-header__headline-wrapper--oswald">Inter</h1>
+        <table class="items"><tbody><tr><td><a href="/mario-rossi/profil/spieler/1">Mario Rossi</a></td></tr>
+        </tbody></table>""")
+    queue = Queue()
+    assert TransfermarktScraper.extract_team(url, queue=queue).empty
+    text = messages(queue)
+    assert "inter/mitarbeiter/verein/46 skipped: not cached" in text
+    assert "/mario-rossi/profil/spieler/1 skipped: not cached" in text
+    assert "Inter completed!" in text
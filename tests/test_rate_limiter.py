@@ -0,0 +1,89 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from fm_scraper.core import RateLimiter
+from fm_scraper.core import rate_limiter
+from fm_scraper.core.rate_limiter import _TokenBucket
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_burst_is_free_then_requests_are_spaced(clock):
+    bucket = _TokenBucket(rate=2.0, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    # reservations queue the callers one after the other
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_tokens_refill_up_to_the_burst(clock):
+    bucket = _TokenBucket(rate=2.0, burst=3)
+    for _ in range(3):
+        bucket.reserve()
+    clock.now += 10
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() > 0
+
+
+def test_throttling_halves_the_rate_and_blocks(clock):
+    bucket = _TokenBucket(rate=2.0, burst=3)
+    bucket.throttled(5)
+    assert bucket.rate == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(5.0)
+
+
+def test_success_restores_the_rate_slowly(clock):
+    bucket = _TokenBucket(rate=2.0, burst=3)
+    bucket.throttled(0)
+    bucket.success()
+    assert bucket.rate == pytest.approx(1.1)
+    for _ in range(50):
+        bucket.success()
+    assert bucket.rate == pytest.approx(2.0)
+
+
+def test_rate_never_drops_below_a_twentieth(clock):
+    bucket = _TokenBucket(rate=2.0, burst=3)
+    for _ in range(20):
+        bucket.throttled(0)
+    assert bucket.rate == pytest.approx(0.1)
+
+
+def test_configure_overrides_every_host(clock):
+    RateLimiter.configure(rate=1.0, burst=1)
+    try:
+        RateLimiter.acquire("https://example.org/a")
+        assert RateLimiter._RateLimiter__get_bucket("https://example.org/b").reserve() == pytest.approx(1.0)
+        assert RateLimiter._RateLimiter__get_bucket("https://other.org/").reserve() == 0.0
+    finally:
+        RateLimiter.configure()
+
+
+def test_parse_retry_after():
+    assert RateLimiter.parse_retry_after(None) is None
+    assert RateLimiter.parse_retry_after("120") == 120.0
+    assert RateLimiter.parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= RateLimiter.parse_retry_after(later) <= 60
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=60), usegmt=True)
+    assert RateLimiter.parse_retry_after(earlier) == 0.0
+
+
+def test_backoff_is_bounded(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "MAX_WAIT_SECONDS", 8)
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE_SECONDS", 1)
+    assert all(0 <= RateLimiter.backoff(attempt) <= 8 for attempt in range(10))
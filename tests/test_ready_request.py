@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from fm_scraper.core import AsyncBrowserPool, BaseRequest, RateLimiter, ResponseCache, Scheduler
+
+HOST = "example.org"
+PERSON_URL = f"https://{HOST}/person/1"
+TEAM_URL = f"https://{HOST}/team/1"
+
+
+class Response:
+
+    status = 200
+    headers = dict()
+
+
+class Page:
+    """
+    fake page, the readiness selector of the person page shows up only at the second load.
+    """
+
+    def __init__(self, browser: "Browser") -> None:
+        self.browser = browser
+        self.url = None
+
+    async def route(self, *args) -> None:
+        pass
+
+    async def goto(self, url: str, **kwargs) -> Response:
+        self.url = url
+        await asyncio.sleep(0)
+        return Response()
+
+    async def wait_for_selector(self, selector: str, **kwargs) -> None:
+        await asyncio.sleep(0.01)
+        if self.url == PERSON_URL:
+            self.browser.person_loads += 1
+            if self.browser.person_loads == 1:
+                raise PlaywrightTimeoutError(f"{selector} not found")
+
+    async def content(self) -> str:
+        return f"<html>{self.url}</html>"
+
+    async def close(self) -> None:
+        pass
+
+
+class Browser:
+    """
+    fake browser pool with a single context.
+    """
+
+    def __init__(self, monkeypatch) -> None:
+        self.person_loads = 0
+        self.slots = None
+        monkeypatch.setattr(AsyncBrowserPool, "lease", classmethod(lambda cls, **kwargs: self.lease()))
+        monkeypatch.setattr(Scheduler, "host_limits", {HOST: 1})
+        monkeypatch.setattr(ResponseCache, "enabled", False)
+        monkeypatch.setattr(ResponseCache, "offline", False)
+        monkeypatch.setattr(RateLimiter, "acquire_async", classmethod(lambda cls, url: asyncio.sleep(0)))
+
+    @asynccontextmanager
+    async def lease(self):
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(1)
+        async with self.slots:
+            yield self
+
+    async def new_page(self) -> Page:
+        return Page(self)
+
+
+@pytest.mark.parametrize("delay", [0, 0.005, 0.015])
+def test_ready_request_does_not_deadlock_with_browser_fetches(monkeypatch, delay):
+    Browser(monkeypatch)
+
+    async def team() -> str:
+        await asyncio.sleep(delay)
+        return await BaseRequest._send_request_async(TEAM_URL, with_session=True)
+
+    async def main() -> list:
+        return await asyncio.wait_for(asyncio.gather(
+            BaseRequest._ready_request_async(PERSON_URL, "#ready", timeout=0.01, reloads=2), team()), 2)
+
+    ready, content = asyncio.run(main())
+    assert ready == (f"<html>{PERSON_URL}</html>", None)
+    assert content == f"<html>{TEAM_URL}</html>"
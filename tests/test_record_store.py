@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+from fm_scraper.core.record_store import RecordStore
+
+
+def chunk(*names: str, **columns) -> pd.DataFrame:
+    return pd.DataFrame({"name": list(names), **columns})
+
+
+@pytest.fixture
+def store():
+    store = RecordStore()
+    store.append(chunk("a", "b"))
+    store.append(chunk("c"))
+    store.append(chunk("d", "e", club=["x", "y"]))
+    return store
+
+
+def test_append_ignores_empty_chunks():
+    store = RecordStore()
+    store.append(None)
+    store.append(pd.DataFrame())
+    assert store.empty and len(store) == 0
+    assert store.frame().empty
+
+
+def test_length_and_columns(store):
+    assert len(store) == 5
+    assert store.columns == ["name", "club"]
+
+
+def test_frame_concatenates_once(store):
+    frame = store.frame()
+    assert list(frame["name"]) == ["a", "b", "c", "d", "e"]
+    assert frame.index.equals(pd.RangeIndex(5))
+    assert store.frame() is frame
+
+
+@pytest.mark.parametrize("start, stop, expected", [
+    (0, 5, "abcde"), (1, 4, "bcd"), (2, 3, "c"), (3, 5, "de"), (-3, 2, "ab"), (4, 10, "e"), (3, 3, "")
+])
+def test_rows_across_chunks(store, start, stop, expected):
+    rows = store.rows(start, stop)
+    assert "".join(rows.get("name", [])) == expected
+
+
+def test_row(store):
+    assert store.row(0)["name"] == "a"
+    assert store.row(2)["name"] == "c"
+    assert store.row(4)["club"] == "y"
+    with pytest.raises(IndexError):
+        store.row(5)
+    with pytest.raises(IndexError):
+        store.row(-1)
+
+
+def test_snapshot_ignores_later_appends(store):
+    snapshot = store.snapshot()
+    store.append(chunk("f"))
+    store.frame()
+    assert len(snapshot) == 5 and len(store) == 6
+    assert list(snapshot.frame()["name"]) == ["a", "b", "c", "d", "e"]
+
+
+def test_clear(store):
+    store.clear()
+    assert store.empty
+    assert store.rows(0, 5).empty
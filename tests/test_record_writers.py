@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+import pandas as pd
+import pytest
+from fm_scraper.scrapers.record_writers import (CsvRecordWriter, JsonlRecordWriter, ParquetRecordWriter,
+                                                FeatherRecordWriter, XlsxRecordWriter, RecordWriter)
+
+COLUMNS = ["name", "club", "left_foot"]
+RECORDS = [{"name": "Mario Rossi", "club": "Inter", "left_foot": 20, "extra": "x"},
+           {"name": "Luca Bianchi", "club": None, "left_foot": "15"}]
+
+
+@pytest.mark.parametrize("extension, writer", [
+    (".csv", CsvRecordWriter), (".jsonl", JsonlRecordWriter), (".PARQUET", ParquetRecordWriter),
+    (".feather", FeatherRecordWriter), (".arrow", FeatherRecordWriter), (".xlsx", XlsxRecordWriter)
+])
+def test_open_picks_writer_by_extension(tmp_path, extension, writer):
+    with RecordWriter.open(os.path.join(tmp_path, f"out{extension}"), COLUMNS) as w:
+        assert type(w) is writer
+
+
+def test_open_rejects_unknown_extension(tmp_path):
+    with pytest.raises(ValueError):
+        RecordWriter.open(os.path.join(tmp_path, "out.txt"), COLUMNS)
+
+
+def test_csv_keeps_the_schema(tmp_path):
+    path = os.path.join(tmp_path, "out.csv")
+    with CsvRecordWriter(path, COLUMNS) as w:
+        assert w.write_all(RECORDS) == 2
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows == [{"name": "Mario Rossi", "club": "Inter", "left_foot": "20"},
+                    {"name": "Luca Bianchi", "club": "", "left_foot": "15"}]
+
+
+def test_jsonl_keeps_every_field(tmp_path):
+    path = os.path.join(tmp_path, "out.jsonl")
+    with JsonlRecordWriter(path, COLUMNS) as w:
+        w.write_all(RECORDS)
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == RECORDS
+
+
+def test_parquet_row_groups_and_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = os.path.join(tmp_path, "out.parquet")
+    with ParquetRecordWriter(path, COLUMNS, row_group_size=1) as w:
+        w.write_all(RECORDS)
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 2
+    assert parquet.read().to_pylist() == [{"name": "Mario Rossi", "club": "Inter", "left_foot": 20},
+                                          {"name": "Luca Bianchi", "club": None, "left_foot": 15}]
+
+
+def test_feather_record_batches(tmp_path):
+    ipc = pytest.importorskip("pyarrow.ipc")
+    path = os.path.join(tmp_path, "out.feather")
+    with FeatherRecordWriter(path, COLUMNS, row_group_size=1) as w:
+        w.write_all(RECORDS)
+    reader = ipc.open_file(path)
+    assert reader.num_record_batches == 2
+    assert reader.read_all().to_pylist() == [{"name": "Mario Rossi", "club": "Inter", "left_foot": 20},
+                                             {"name": "Luca Bianchi", "club": None, "left_foot": 15}]
+
+
+def test_xlsx_rows(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = os.path.join(tmp_path, "out.xlsx")
+    with XlsxRecordWriter(path, COLUMNS) as w:
+        w.write_all(RECORDS)
+    rows = list(openpyxl.load_workbook(path).active.iter_rows(values_only=True))
+    assert rows == [tuple(COLUMNS), ("Mario Rossi", "Inter", 20), ("Luca Bianchi", None, "15")]
+
+
+def test_write_frame_writes_missing_values_as_none(tmp_path):
+    path = os.path.join(tmp_path, "out.jsonl")
+    df = pd.DataFrame({"name": ["Mario Rossi", "Luca Bianchi"], "club": ["Inter", float("nan")],
+                       "left_foot": [20, 15]})
+    with JsonlRecordWriter(path, COLUMNS) as w:
+        assert w.write_frame(df) == 2
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [{"name": "Mario Rossi", "club": "Inter", "left_foot": 20},
+                                                    {"name": "Luca Bianchi", "club": None, "left_foot": 15}]
@@ -0,0 +1,84 @@
+import os
+import pytest
+from fm_scraper.core import ResponseCache
+from fm_scraper.core import response_cache
+
+URL = "https://example.org/page"
+
+
+def entry_path(directory, key: str) -> str:
+    return os.path.join(directory, key[:2], f"{key}.gz")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResponseCache, "enabled", True)
+    monkeypatch.setattr(ResponseCache, "offline", False)
+    monkeypatch.setattr(ResponseCache, "max_bytes", 1024 * 1024)
+    monkeypatch.setattr(ResponseCache, "directory", str(tmp_path))
+    ResponseCache.configure(directory=str(tmp_path))
+    return ResponseCache
+
+
+def test_set_and_get(cache):
+    key = cache.key("GET", URL)
+    cache.set(key, "<html>page</html>")
+    assert cache.get(URL, key) == "<html>page</html>"
+
+
+def test_key_depends_on_method_url_and_body(cache):
+    assert cache.key("GET", URL) != cache.key("POST", URL)
+    assert cache.key("GET", URL) != cache.key("GET", URL + "?page=2")
+    assert cache.key("POST", URL, {"a": 1, "b": 2}) == cache.key("POST", URL, {"b": 2, "a": 1})
+
+
+def test_disabled_cache_is_a_miss(cache, monkeypatch):
+    key = cache.key("GET", URL)
+    cache.set(key, "content")
+    monkeypatch.setattr(ResponseCache, "enabled", False)
+    assert cache.get(URL, key) is None
+
+
+def test_expired_entry_is_a_miss(cache, monkeypatch):
+    key = cache.key("GET", URL)
+    cache.set(key, "content")
+    monkeypatch.setattr(response_cache, "CACHE_DEFAULT_TTL", -1)
+    assert cache.get(URL, key) is None
+
+
+def test_offline_serves_expired_entries(cache, monkeypatch):
+    key = cache.key("GET", URL)
+    cache.set(key, "content")
+    monkeypatch.setattr(response_cache, "CACHE_DEFAULT_TTL", -1)
+    monkeypatch.setattr(ResponseCache, "offline", True)
+    assert cache.get(URL, key) == "content"
+
+
+def test_eviction_drops_least_recently_used(cache, tmp_path):
+    keys = [cache.key("GET", f"{URL}/{i}") for i in range(3)]
+    for age, key in zip((300, 200, 100), keys):
+        cache.set(key, os.urandom(2000).hex())
+        # the modification time is the last use of the entry
+        used = os.path.getmtime(entry_path(tmp_path, key)) - age
+        os.utime(entry_path(tmp_path, key), (used, used))
+    entry_size = os.path.getsize(entry_path(tmp_path, keys[0]))
+    cache.max_bytes = int(entry_size * 3.5)
+    cache.set(cache.key("GET", f"{URL}/new"), os.urandom(2000).hex())
+    assert cache.get(f"{URL}/0", keys[0]) is None
+    assert cache.get(f"{URL}/2", keys[2]) is not None
+    assert cache.get(f"{URL}/new", cache.key("GET", f"{URL}/new")) is not None
+
+
+def test_overwrite_does_not_grow_the_size(cache, tmp_path):
+    key = cache.key("GET", URL)
+    for _ in range(5):
+        cache.set(key, "x" * 1000)
+    size = os.path.getsize(entry_path(tmp_path, key))
+    assert ResponseCache._ResponseCache__size == size
+
+
+def test_clear(cache):
+    key = cache.key("GET", URL)
+    cache.set(key, "content")
+    cache.clear()
+    assert cache.get(URL, key) is None